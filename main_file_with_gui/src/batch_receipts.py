@@ -0,0 +1,46 @@
+import sys
+import os
+import argparse
+import json
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.utils.receipt_batch import OUTPUTS, iter_bills, render_batch
+from src.utils.receipt_generator import FORMATS
+from src.utils.settings import load_settings
+
+
+def main():
+    settings = load_settings()["receipts"]
+
+    parser = argparse.ArgumentParser(description="Re-render stored bills as receipts, in parallel, for audits and reprints")
+    parser.add_argument("bills", nargs="?", default="output/sales.db",
+                        help="Sales database, or a JSON Lines file of bills")
+    parser.add_argument("--output", required=True,
+                        help="Directory for files and merged output, or a .zip file for zip output")
+    parser.add_argument("--mode", choices=OUTPUTS, default="files",
+                        help="One file per receipt, merged PDFs of --chunk-size receipts (or one text stream), or a zip")
+    parser.add_argument("--format", choices=sorted(FORMATS), default=settings["format"])
+    parser.add_argument("--start", help="First day as YYYY-MM-DD")
+    parser.add_argument("--end", help="Last day as YYYY-MM-DD, defaults to --start")
+    parser.add_argument("--lane", help="Only receipts from this lane")
+    parser.add_argument("--workers", type=int, help="Worker processes, defaults to one per CPU")
+    parser.add_argument("--chunk-size", type=int, default=100, help="Receipts per worker task")
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+    if args.mode == "merged" and args.format == "html":
+        parser.error("HTML receipts cannot be merged; use --mode files or zip")
+
+    bills = iter_bills(args.bills, args.start, args.end, args.lane)
+    report = render_batch(bills, args.output, output_format=args.format, output=args.mode,
+                          workers=args.workers, chunk_size=max(args.chunk_size, 1),
+                          text_width=settings["text_width"])
+
+    if report["receipts"]:
+        print(f"{report['receipts_per_second']} receipts/s on {report['workers']} workers, "
+              f"{report['seconds'] / report['receipts'] * 1000:.2f} ms per receipt")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
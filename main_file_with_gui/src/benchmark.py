@@ -0,0 +1,243 @@
+import sys
+import os
+import argparse
+import json
+import time
+import cv2
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.object_billing import ObjectBillingSystem
+from src.utils.settings import load_settings
+from src.utils.roi import RegionOfInterest
+from src.utils.detection_cache import DetectionCache
+from src.utils.stub_model import StubModel
+from src.utils.clock import CaptureClock, ManualClock
+from src.utils.video_source import list_images
+
+# Frame timestamps are added to this, because the item tracker treats time 0 as "never seen"
+SIMULATED_EPOCH = 1_000_000_000.0
+
+STAGES = ("read", "detect", "process", "encode", "total")
+
+
+def iter_frames(source, fps):
+    """
+    Yield (frame index, seconds since the first frame, frame) from a video file or image folder
+
+    Args:
+        source (str): Video file or directory of images
+        fps (float): Frame rate of image folders, and of videos that do not report one
+    """
+    if os.path.isdir(source):
+        for index, path in enumerate(list_images(source)):
+            frame = cv2.imread(path)
+            if frame is None:
+                print(f"Skipping unreadable image {path}")
+                continue
+            yield index, index / fps, frame
+        return
+
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise ValueError(f"Cannot open video {source}")
+    # Stream position from 0 at the first frame
+    capture_clock = CaptureClock(cap, use_position=True, clock=lambda: 0.0)
+    index = 0
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield index, capture_clock.stamp(), frame
+            index += 1
+    finally:
+        cap.release()
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB, or None where it cannot be read"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def latency_summary(samples):
+    """p50/p95/p99/mean of a list of latencies in seconds, in milliseconds"""
+    if not samples:
+        return {"p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "mean_ms": 0.0}
+    ms = np.asarray(samples) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {"p50_ms": round(float(p50), 3), "p95_ms": round(float(p95), 3),
+            "p99_ms": round(float(p99), 3), "mean_ms": round(float(ms.mean()), 3)}
+
+
+def compare_bill(billed, ground_truth):
+    """
+    Compare final counts with the expected bill
+
+    Args:
+        billed (dict): Counted quantity per class name
+        ground_truth (dict): Expected quantity per class name
+
+    Returns:
+        dict: Per-item expected and counted quantities, and whether the whole bill matches
+    """
+    items = {}
+    for name in sorted(set(billed) | set(ground_truth)):
+        expected = ground_truth.get(name, 0)
+        counted = billed.get(name, 0)
+        items[name] = {"expected": expected, "counted": counted, "error": counted - expected}
+    return {
+        "items": items,
+        "exact": all(item["error"] == 0 for item in items.values()),
+        "absolute_error": sum(abs(item["error"]) for item in items.values())
+    }
+
+
+def run_benchmark(system, frames, stub=None, jpeg_quality=80, max_frames=None):
+    """
+    Replay frames through detection, counting, drawing and encoding on a simulated clock
+
+    Args:
+        system (ObjectBillingSystem): Billing system to drive
+        frames (iterable): (index, seconds, frame) tuples from iter_frames
+        stub (StubModel): Scripted model to keep in step with the frame index, or None
+        jpeg_quality (int): Quality of the encode stage
+        max_frames (int): Stop after this many frames, or None for all
+
+    Returns:
+        dict: Latency per stage, throughput, memory and the final bill
+    """
+    latencies = {stage: [] for stage in STAGES}
+    params = [int(cv2.IMWRITE_JPEG_QUALITY), jpeg_quality]
+    processed = 0
+    simulated = 0.0
+    start = time.perf_counter()
+
+    iterator = iter(frames)
+    while max_frames is None or processed < max_frames:
+        t0 = time.perf_counter()
+        try:
+            index, seconds, frame = next(iterator)
+        except StopIteration:
+            break
+        t1 = time.perf_counter()
+
+        current_time = SIMULATED_EPOCH + seconds
+        if isinstance(system.clock, ManualClock):
+            system.clock.set(current_time)
+        if stub is not None:
+            stub.frame_index = index
+        detections = system.detect(frame, current_time)
+        t2 = time.perf_counter()
+
+        system.process_frame(frame, detections=detections, current_time=current_time)
+        t3 = time.perf_counter()
+
+        cv2.imencode('.jpg', frame, params)
+        t4 = time.perf_counter()
+
+        for stage, latency in zip(STAGES, (t1 - t0, t2 - t1, t3 - t2, t4 - t3, t4 - t0)):
+            latencies[stage].append(latency)
+        processed += 1
+        simulated = seconds
+
+    # Items still in view at the end are counted the way they would be if they were taken away
+    system.process_frame(np.zeros((1, 1, 3), dtype=np.uint8), detections=system.last_detections.subset([]),
+                         current_time=SIMULATED_EPOCH + simulated + 1e-3)
+
+    wall = time.perf_counter() - start
+    return {
+        "frames": processed,
+        "wall_seconds": round(wall, 3),
+        "simulated_seconds": round(simulated, 3),
+        "fps": round(processed / wall, 2) if wall > 0 else 0.0,
+        "speedup": round(simulated / wall, 2) if wall > 0 else 0.0,
+        "stages": {stage: latency_summary(samples) for stage, samples in latencies.items()},
+        "inference_scheduler": system.scheduler.stats(),
+        "detection_cache": system.detection_cache.stats() if system.detection_cache is not None else None,
+        "peak_rss_mb": peak_rss_mb(),
+        "bill": dict(system.tracker.billed())
+    }
+
+
+def print_report(report):
+    print(f"Frames: {report['frames']} in {report['wall_seconds']}s "
+          f"({report['fps']} FPS, {report['speedup']}x real time)")
+    print(f"{'stage':<10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'mean ms':>10}")
+    for stage, summary in report["stages"].items():
+        print(f"{stage:<10}{summary['p50_ms']:>10.2f}{summary['p95_ms']:>10.2f}"
+              f"{summary['p99_ms']:>10.2f}{summary['mean_ms']:>10.2f}")
+    if report["peak_rss_mb"] is not None:
+        print(f"Peak RSS: {report['peak_rss_mb']:.1f} MB")
+    cache = report.get("detection_cache")
+    if cache is not None:
+        print(f"Detection cache: {cache['hits']} hits, {cache['misses']} misses (hit rate {cache['hit_rate']:.1%})")
+    print(f"Final bill: {report['bill']}")
+    if "accuracy" in report:
+        accuracy = report["accuracy"]
+        for name, item in accuracy["items"].items():
+            print(f"  {name}: counted {item['counted']}, expected {item['expected']}")
+        print(f"Bill matches ground truth: {accuracy['exact']} (absolute error {accuracy['absolute_error']})")
+
+
+def main():
+    settings = load_settings()
+
+    parser = argparse.ArgumentParser(description="Replay a video or image folder through the billing pipeline and report latency and counting accuracy")
+    parser.add_argument("source", help="Video file or directory of images")
+    parser.add_argument("--model", default="models/yolo/last.pt", help="Path to the trained .pt weights")
+    parser.add_argument("--stub", metavar="SCRIPT", help="Use a scripted stub model from this JSON file instead of the weights")
+    parser.add_argument("--ground-truth", help="JSON file with the expected {item: quantity} bill")
+    parser.add_argument("--fps", type=float, default=30.0, help="Frame rate of image folders")
+    parser.add_argument("--max-frames", type=int)
+    parser.add_argument("--confidence", type=float, default=0.5)
+    parser.add_argument("--time-threshold", type=float, default=5.0)
+    parser.add_argument("--inference-interval", type=int, default=3)
+    parser.add_argument("--motion-threshold", type=float, default=4.0, help="Negative to disable the motion gate")
+    parser.add_argument("--no-detection-cache", action="store_true",
+                        help="Infer every scheduled frame instead of reusing detections of near-identical frames")
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    stub = None
+    if args.stub:
+        stub = StubModel.from_script(args.stub)
+        model = stub
+        input_size = None
+    else:
+        from src.utils.inference_backend import load_configured_model
+        model = load_configured_model(args.model, settings["inference"], confidence=args.confidence)
+        input_size = settings["inference"]["imgsz"]
+
+    system = ObjectBillingSystem(model_path=args.model, confidence=args.confidence,
+                                 time_threshold=args.time_threshold,
+                                 inference_interval=args.inference_interval,
+                                 motion_threshold=args.motion_threshold if args.motion_threshold >= 0 else None,
+                                 model=model, input_size=input_size,
+                                 roi=RegionOfInterest.from_config(settings["roi"]),
+                                 clock=ManualClock(SIMULATED_EPOCH),
+                                 detection_cache=None if args.no_detection_cache
+                                 else DetectionCache.from_config(settings["detection_cache"]))
+
+    report = run_benchmark(system, iter_frames(args.source, args.fps), stub=stub, max_frames=args.max_frames)
+
+    if args.ground_truth:
+        with open(args.ground_truth, 'r') as f:
+            report["accuracy"] = compare_bill(report["bill"], json.load(f))
+
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if "accuracy" in report and not report["accuracy"]["exact"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
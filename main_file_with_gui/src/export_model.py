@@ -0,0 +1,45 @@
+import sys
+import os
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.utils.inference_backend import BACKENDS, export_model, find_calibration_images, check_parity
+from src.utils.settings import load_settings
+
+
+def main():
+    settings = load_settings()["inference"]
+
+    parser = argparse.ArgumentParser(description="Export the YOLO weights for a faster CPU backend and check parity")
+    parser.add_argument("--model", default="models/yolo/last.pt", help="Path to the trained .pt weights")
+    # The app may run the plain weights ("pytorch"), which is nothing to export
+    default_backend = settings["backend"] if settings["backend"] != "pytorch" else "onnx"
+    parser.add_argument("--backend", default=default_backend, choices=[b for b in BACKENDS if b != "pytorch"],
+                        help="Export format, defaults to the configured backend or onnx if that is pytorch")
+    parser.add_argument("--int8", action=argparse.BooleanOptionalAction, default=settings["int8"],
+                        help="Quantize to int8; --no-int8 overrides the settings")
+    parser.add_argument("--imgsz", type=int, default=settings["imgsz"])
+    parser.add_argument("--calibration-dir", default=settings["calibration_dir"])
+    parser.add_argument("--confidence", type=float, default=0.5)
+    args = parser.parse_args()
+
+    exported = export_model(args.model, args.backend, args.int8, args.imgsz, settings["export_dir"],
+                            args.calibration_dir, settings["calibration_images"])
+    print(f"Exported model cached at {exported}")
+
+    images = find_calibration_images(args.calibration_dir, settings["calibration_images"])
+    if not images:
+        print("No images found for the parity check")
+        return
+
+    from ultralytics import YOLO
+    report = check_parity(YOLO(args.model), YOLO(exported, task="detect"), images, args.confidence)
+    for key, value in report.items():
+        print(f"{key}: {value}")
+    if report["reference_boxes"] == 0:
+        print(f"The PyTorch model found no items in {args.calibration_dir}, so nothing was compared. "
+              f"Point --calibration-dir at pictures of the tray; they are also what int8 is calibrated on.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,26 @@
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from flask import Flask, render_template, Response, jsonify
+from flask import Flask, render_template, Response, jsonify, send_file, request
 import cv2
-import threading
 import time
+import json
 from src.object_billing import ObjectBillingSystem
+from src.utils.pipeline import FramePipeline
+from src.utils.lane_server import Lane, LaneServer, load_lane_config
+from src.utils.inference_backend import load_configured_model
+from src.utils.settings import load_settings
+from src.utils.roi import RegionOfInterest
+from src.utils.object_tracker import ObjectTracker
+from src.utils.detection_cache import DetectionCache
+from src.utils.receipt_generator import ReceiptGenerator, FORMATS as RECEIPT_FORMATS
+from src.utils.receipt_queue import ReceiptJobQueue
+from src.utils.sales_store import SalesStore, day_of
+from src.utils.frame_hub import FrameHub
+from src.utils.metrics import Metrics
+from src.utils.profiler import SamplingProfiler
+from src.utils.model_loader import ModelLoader, warm_up
+from src.utils.video_source import VideoSource, RECONNECTING, ENDED
 import numpy as np
 import signal
 
@@ -13,93 +28,176 @@ app = Flask(__name__,
     template_folder='../templates',
     static_folder='../static')
 
-# Initialize the billing system
+# Runtime settings from config/settings.json
+settings = load_settings()
+
+# Stage timers and counters served on /metrics and /api/stats
+metrics = Metrics(enabled=settings["metrics"]["enabled"], window=settings["metrics"]["window"])
+profiler = SamplingProfiler()
+
+def create_object_tracker():
+    """Build the per-instance tracker from settings, or None to count with per-class timers"""
+    tracking = settings["tracking"]
+    if not tracking["enabled"]:
+        return None
+    return ObjectTracker(iou_threshold=tracking["iou_threshold"],
+                         min_hits=tracking["min_hits"],
+                         max_age=tracking["max_age"])
+
+# Browsers draw boxes over the raw frame from JSON instead of the server drawing them
+CLIENT_OVERLAY = settings["overlay"]["client_side"]
+
+# Every item added, bill paid and receipt rendered is recorded here
+SALES_DB = "output/sales.db"
+sales_store = SalesStore(SALES_DB)
+
+# The model is loaded and warmed up in the background while the web server
+# already answers; billing_system is None until it is ready
 model_path = "models/yolo/last.pt"
-billing_system = ObjectBillingSystem(model_path=model_path, confidence=0.5, time_threshold=5.0)
+model_loader = ModelLoader(lambda: load_configured_model(model_path, settings["inference"], confidence=0.5),
+                           warmup_runs=settings["inference"]["warmup_runs"],
+                           warmup_size=settings["inference"]["warmup_size"],
+                           input_size=settings["inference"]["imgsz"], confidence=0.5, metrics=metrics)
+billing_system = None
 
-# Define items to exclude from detection
-excluded_items = ["kissan mixed fruit jam"]
+# Full inference runs on every INFERENCE_INTERVAL-th frame and backs off further
+# while the model is slower than TARGET_LATENCY seconds per pass
+INFERENCE_INTERVAL = 3
+TARGET_LATENCY = 0.25
+# Frames whose downscaled grayscale difference stays below this are not re-inferred
+MOTION_THRESHOLD = 4.0
 
-# Monkey patch the process_frame method to skip kissan jam
-original_process_frame = billing_system.process_frame
+def create_billing_system(model):
+    """Build the main lane's billing system around the loaded model"""
+    return ObjectBillingSystem(model_path=model_path, confidence=0.5, time_threshold=5.0,
+                               inference_interval=INFERENCE_INTERVAL, target_latency=TARGET_LATENCY,
+                               motion_threshold=MOTION_THRESHOLD,
+                               model=model,
+                               input_size=settings["inference"]["imgsz"],
+                               roi=RegionOfInterest.from_config(settings["roi"]),
+                               object_tracker=create_object_tracker(),
+                               sales_store=sales_store,
+                               metrics=metrics,
+                               client_overlay=CLIENT_OVERLAY,
+                               detection_cache=DetectionCache.from_config(settings["detection_cache"]))
 
-def filtered_process_frame(self, frame):
-    # Store current items state
-    current_items = self.items.copy()
-    
-    # Call the original method
-    processed_frame = original_process_frame(frame)
-    
-    # Remove the excluded items from tracking/counting
-    for item in excluded_items:
-        if item in self.items:
-            # Restore previous count for this item (effectively ignoring it)
-            if item in current_items:
-                self.items[item] = current_items[item]
-            else:
-                # If it wasn't there before, remove it completely
-                del self.items[item]
+# Frames held between pipeline stages before the oldest is dropped (live sources)
+PIPELINE_QUEUE_SIZE = 2
+JPEG_QUALITY = 80
+
+# Video feed clients per camera, and the smallest preview width they may ask for
+MAX_STREAM_CLIENTS = 8
+MIN_PREVIEW_WIDTH = 160
+
+# Extra checkout lanes served from this process, sharing one copy of the model
+LANES_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config', 'lanes.json')
+lane_server = None
+
+def create_lane_server():
+    """Build a LaneServer for the lanes in LANES_CONFIG, or None if there are none"""
+    lane_config = load_lane_config(LANES_CONFIG)
+    if not lane_config:
+        return None
     
-    return processed_frame
+    # The main billing system keeps its own model because ultralytics
+    # predictors are not safe to call from two threads at once
+    lane_model = load_configured_model(model_path, settings["inference"], confidence=0.5)
+    warm_up(lane_model, settings["inference"]["warmup_runs"], settings["inference"]["warmup_size"],
+            settings["inference"]["imgsz"], confidence=0.5, batch_size=len(lane_config))
+    lanes = []
+    for entry in lane_config:
+        hub = FrameHub(max_clients=MAX_STREAM_CLIENTS, jpeg_quality=JPEG_QUALITY)
+        lanes.append(Lane(entry["id"], entry["source"], ObjectBillingSystem(
+            model_path=model_path, confidence=0.5, time_threshold=5.0,
+            inference_interval=INFERENCE_INTERVAL, target_latency=TARGET_LATENCY,
+            motion_threshold=MOTION_THRESHOLD, model=lane_model,
+            roi=RegionOfInterest.from_config(entry.get("roi")),
+            object_tracker=create_object_tracker(),
+            catalogue=billing_system.catalogue,
+            sales_store=sales_store, lane_id=f"lane{entry['id']}",
+            metrics=metrics, client_overlay=CLIENT_OVERLAY,
+            detection_cache=DetectionCache.from_config(settings["detection_cache"])),
+            hub,
+            # A lane entry can override the resolution, frame rate and reconnect settings
+            video_config={**settings["video"], **entry},
+            on_status=source_status_publisher(hub)))
+    print(f"Serving {len(lanes)} checkout lanes: {[lane.lane_id for lane in lanes]}")
+    return LaneServer(lane_model, lanes, confidence=0.5, jpeg_quality=JPEG_QUALITY,
+                      input_size=settings["inference"]["imgsz"], metrics=metrics)
+
+def record_receipt(job):
+    """Log a finished receipt job in the sales store"""
+    sales_store.record_receipt(job["id"], job["bill_id"], job["status"], job["filename"])
+
+# Receipts are rendered on a worker pool so checkout requests return at once
+receipt_queue = ReceiptJobQueue(ReceiptGenerator("output/receipts", text_width=settings["receipts"]["text_width"]),
+                                max_workers=2, on_finished=record_receipt)
 
-# Apply the monkey patch
-billing_system.process_frame = filtered_process_frame.__get__(billing_system, ObjectBillingSystem)
+# How each receipt format is sent back; HTML and text open in the browser, the others download
+RECEIPT_MIMETYPES = {
+    "pdf": ("application/pdf", True),
+    "html": ("text/html", False),
+    "text": ("text/plain", False),
+    "escpos": ("application/octet-stream", True)
+}
 
 # Global variables for sharing camera frames and bill data
-frame_buffer = None
-last_frame_time = 0
-
-def camera_thread():
-    """Background thread that captures frames and processes them"""
-    global frame_buffer, last_frame_time
-    print("Starting camera thread...")
-    
-    # Try different backends
-    print("Attempting to open camera with DirectShow backend...")
-    # Try different backends
-    cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)  # Try DirectShow backend on Windows
-    
-    if not cap.isOpened():
-        print("Failed to open camera with DirectShow, trying default...")
-        cap = cv2.VideoCapture(0)
-    
-    if not cap.isOpened():
-        print("Failed to open camera with index 0, trying index 1...")
-        cap = cv2.VideoCapture(1)
-        
-    if not cap.isOpened():
-        print("All camera attempts failed. Using a placeholder image instead.")
-        # Use a placeholder image
-        placeholder = np.ones((480, 640, 3), dtype=np.uint8) * 200  # Gray image
-        cv2.putText(placeholder, "Camera not available", (100, 240), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 0), 2)
-        
-        while True:
-            # Process placeholder instead
-            processed_frame = billing_system.process_frame(placeholder)
-            _, buffer = cv2.imencode('.jpg', processed_frame)
-            frame_buffer = buffer.tobytes()
-            last_frame_time = time.time()
-            time.sleep(0.1)
-    
-    # If camera opened successfully, continue with normal operation
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            print("Failed to read frame")
-            time.sleep(0.1)
-            continue
-        
-        # Process the frame with your detection system
-        processed_frame = billing_system.process_frame(frame)
-        
-        # Encode as JPEG for streaming
-        _, buffer = cv2.imencode('.jpg', processed_frame)
-        frame_buffer = buffer.tobytes()
-        last_frame_time = time.time()
-        
-        # Slight delay to reduce CPU usage
-        time.sleep(0.01)
+frame_hub = FrameHub(max_clients=MAX_STREAM_CLIENTS, jpeg_quality=JPEG_QUALITY)
+video_source = None
+pipeline = None
+
+def placeholder_frame(text):
+    """Create a gray frame with a status message"""
+    placeholder = np.full((480, 640, 3), 200, dtype=np.uint8)  # Gray image
+    cv2.putText(placeholder, text, (100, 240), 
+               cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 0), 2)
+    return placeholder
+
+# Encoded once, since they never change
+WAITING_JPEG = cv2.imencode('.jpg', placeholder_frame("Waiting for camera..."))[1].tobytes()
+LOADING_JPEG = cv2.imencode('.jpg', placeholder_frame("Loading model..."))[1].tobytes()
+
+# Shown on the video feed while a source is down; nothing is inferred meanwhile
+SOURCE_STATUS_JPEGS = {
+    RECONNECTING: cv2.imencode('.jpg', placeholder_frame("Camera not available"))[1].tobytes(),
+    ENDED: cv2.imencode('.jpg', placeholder_frame("End of video"))[1].tobytes()
+}
+
+def source_status_publisher(hub):
+    """Status callback for a VideoSource that shows a placeholder on hub while it is down"""
+    def on_status(status):
+        jpeg_bytes = SOURCE_STATUS_JPEGS.get(status)
+        if jpeg_bytes is not None:
+            hub.publish(jpeg_bytes)
+    return on_status
+
+def publish_frame(jpeg_bytes, frame):
+    """Make a freshly encoded frame available to every video feed client"""
+    frame_hub.publish(jpeg_bytes, frame, billing_system.overlay)
+
+def start_camera():
+    """Open the configured video source and start the capture, inference and encode pipeline"""
+    global pipeline, video_source
+    print("Starting camera...")
+    
+    # Grabbed on its own thread, which keeps only the newest frame and
+    # reconnects with backoff when the source drops out
+    video_source = VideoSource.from_config(settings["video"]["source"], settings["video"],
+                                           clock=billing_system.clock, name="Camera",
+                                           on_status=source_status_publisher(frame_hub))
+    video_source.start()
+    
+    def read_frame():
+        # None while the source is down, so the model is not run on anything
+        return video_source.read(timeout=0.5)
+    
+    # Capture, inference and encoding each run in their own thread so that a
+    # slow YOLO pass never stops the camera from being drained
+    pipeline = FramePipeline(read_frame, billing_system.process_frame, publish_frame,
+                             queue_size=PIPELINE_QUEUE_SIZE, jpeg_quality=JPEG_QUALITY,
+                             metrics=metrics, backpressure=lambda: video_source.replay)
+    metrics.register_collector(pipeline.collect_metrics)
+    pipeline.start()
 
 # Route for the main page
 @app.route('/terminate_program')
@@ -112,85 +210,400 @@ def terminate_program():
 
 @app.route('/')
 def index():
-    return render_template('index.html')
+    return render_template('index.html', client_overlay=CLIENT_OVERLAY)
+
+# Routes that work before the model is ready; the rest answer 503 until then
+SERVED_WHILE_LOADING = {
+    "static", "index", "healthz", "video_feed", "overlay_stream", "terminate_program", "get_metrics",
+    "get_stats", "get_profile", "get_daily_sales", "get_receipt_status", "download_receipt"
+}
+
+@app.before_request
+def wait_for_model():
+    if billing_system is None and request.endpoint not in SERVED_WHILE_LOADING:
+        return jsonify({"success": False, "status": model_loader.state,
+                        "message": "The model is still loading"}), 503
+
+# Readiness for load balancers and supervisors: 200 while frames are being billed, 503
+# while the model loads or the camera is down
+@app.route('/healthz')
+def healthz():
+    status = model_loader.status()
+    status["camera"] = video_source.status if video_source is not None else None
+    status["lanes"] = len(lane_server.lanes) if lane_server is not None else 0
+    status["ready"] = model_loader.ready and video_source is not None and video_source.connected
+    return jsonify(status), 200 if status["ready"] else 503
+
+def stream_frames(hub, width=None, quality=None, fps=None):
+    """Yield MJPEG parts each time the hub publishes a newer frame"""
+    sequence = 0
+    min_interval = 1.0 / fps if fps else 0
+    next_frame_time = 0
+    
+    while True:
+        # Waits for a new frame instead of re-sending the same one; a slow
+        # client always jumps straight to the newest frame
+        new_sequence = hub.wait_for_frame(sequence, timeout=1.0)
+        if new_sequence == sequence and sequence != 0:
+            continue
+        sequence = new_sequence
+        
+        jpeg_bytes = hub.get_jpeg(width, quality)
+        if jpeg_bytes is None:
+            jpeg_bytes = WAITING_JPEG if model_loader.ready else LOADING_JPEG
+        yield (b'--frame\r\n'
+               b'Content-Type: image/jpeg\r\n\r\n' + jpeg_bytes + b'\r\n')
+        
+        # Optional per-client frame rate cap
+        if min_interval:
+            now = time.time()
+            if next_frame_time > now:
+                time.sleep(next_frame_time - now)
+            next_frame_time = max(now, next_frame_time) + min_interval
+
+def stream_response(hub):
+    """Open an MJPEG stream on a hub, honouring ?width=, ?quality= and ?fps="""
+    width = request.args.get('width', type=int)
+    quality = request.args.get('quality', type=int)
+    fps = request.args.get('fps', type=float)
+    if width is not None:
+        width = max(MIN_PREVIEW_WIDTH, width)
+    if quality is not None:
+        quality = min(max(quality, 10), 95)
+    if fps is not None and fps <= 0:
+        fps = None
+    
+    if not hub.acquire_client():
+        return jsonify({"success": False, "message": "Too many video feed clients"}), 503
+    
+    response = Response(stream_frames(hub, width, quality, fps),
+                        mimetype='multipart/x-mixed-replace; boundary=frame')
+    response.call_on_close(hub.release_client)
+    return response
 
 # Route for video feed
 @app.route('/video_feed')
 def video_feed():
-    def generate_frames():
-        global frame_buffer, last_frame_time
-        
-        while True:
-            # Add a timeout check to avoid hanging if frame_buffer is None
-            if frame_buffer is None:
-                # Create a simple placeholder frame
-                placeholder = np.ones((480, 640, 3), dtype=np.uint8) * 200
-                cv2.putText(placeholder, "Waiting for camera...", (100, 240), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 0), 2)
-                _, buffer = cv2.imencode('.jpg', placeholder)
-                yield (b'--frame\r\n'
-                       b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
-            else:
-                yield (b'--frame\r\n'
-                       b'Content-Type: image/jpeg\r\n\r\n' + frame_buffer + b'\r\n')
-            time.sleep(0.03)  # ~30 FPS
-            
-    return Response(generate_frames(), mimetype='multipart/x-mixed-replace; boundary=frame')
+    return stream_response(frame_hub)
 
-# API to get current bill data
-@app.route('/api/current_bill')
-def get_current_bill():
+def overlay_events(hub):
+    """Yield a server-sent event with the boxes of every newly published frame"""
+    sequence = 0
+    while True:
+        new_sequence = hub.wait_for_frame(sequence, timeout=15)
+        if new_sequence == sequence:
+            yield ": keep-alive\n\n"
+            continue
+        sequence, overlay = hub.get_overlay()
+        if overlay is not None:
+            yield f"id: {sequence}\nevent: overlay\ndata: {json.dumps(overlay)}\n\n"
+
+def overlay_stream_response(hub):
+    return Response(overlay_events(hub), mimetype='text/event-stream',
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# Boxes for the browser to draw when overlay.client_side is set
+@app.route('/api/overlay_stream')
+def overlay_stream():
+    return overlay_stream_response(frame_hub)
+
+def build_bill(system, lines):
+    """Build the JSON-ready bill from a snapshot's (name, count, unit price) lines"""
     items_list = []
     total = 0
     
-    for cls_name, item_info in billing_system.items.items():
-        # Skip excluded items in the bill as well
-        if item_info["count"] > 0 and cls_name not in excluded_items:
-            price = billing_system.prices.get(cls_name, 0)
-            amount = item_info["count"] * price
-            total += amount
-            
-            items_list.append({
-                "name": cls_name,
-                "quantity": item_info["count"],
-                "unit_price": price,
-                "total": amount
-            })
+    for cls_name, count, price in lines:
+        amount = count * price
+        total += amount
+        
+        items_list.append({
+            "name": system.catalogue.item(cls_name).display_name,
+            "quantity": count,
+            "unit_price": price,
+            "total": amount
+        })
     
-    return jsonify({
+    return {
         "items": items_list,
         "subtotal": total,
         "tax": total * 0.07,  # 7% tax as in your code
         "total": total * 1.07
-    })
+    }
+
+# Seconds /reset_bill waits for the camera thread to apply the reset
+RESET_TIMEOUT = 1.0
+
+# Part of every bill ETag, so versions from before a restart never match
+BILL_EPOCH = int(time.time())
+
+def bill_response(system, etag_prefix):
+    """Serve the bill as JSON, or 304 if the client already has this version"""
+    version, bill = system.bill_state.bill(lambda lines: build_bill(system, lines))
+    etag = f"{etag_prefix}-{BILL_EPOCH}-{version}"
+    if request.if_none_match.contains(etag):
+        return Response(status=304, headers={"ETag": f'"{etag}"'})
+    response = jsonify(bill)
+    response.set_etag(etag)
+    return response
+
+def bill_events(system):
+    """Yield a server-sent event with the bill every time its version changes"""
+    version = None
+    while True:
+        snapshot = system.bill_state.wait_for_change(version, timeout=15)
+        if snapshot.version == version:
+            # Keep idle connections from being closed by proxies
+            yield ": keep-alive\n\n"
+            continue
+        version, bill = system.bill_state.bill(lambda lines: build_bill(system, lines))
+        yield f"id: {version}\nevent: bill\ndata: {json.dumps(bill)}\n\n"
+
+def bill_stream_response(system):
+    return Response(bill_events(system), mimetype='text/event-stream',
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# API to get current bill data
+@app.route('/api/current_bill')
+def get_current_bill():
+    return bill_response(billing_system, "main")
+
+# Pushes the bill to the browser whenever it changes
+@app.route('/api/bill_stream')
+def bill_stream():
+    return bill_stream_response(billing_system)
+
+def get_lane(lane_id):
+    """Look up a configured checkout lane, or None"""
+    if lane_server is None:
+        return None
+    return lane_server.lanes.get(lane_id)
+
+# Per-lane video feed for multi-lane setups
+@app.route('/lane/<lane_id>/video_feed')
+def lane_video_feed(lane_id):
+    lane = get_lane(lane_id)
+    if lane is None:
+        return jsonify({"success": False, "message": f"Unknown lane {lane_id}"}), 404
+    return stream_response(lane.frame_hub)
+
+# Per-lane bill for multi-lane setups
+@app.route('/lane/<lane_id>/api/current_bill')
+def get_lane_bill(lane_id):
+    lane = get_lane(lane_id)
+    if lane is None:
+        return jsonify({"success": False, "message": f"Unknown lane {lane_id}"}), 404
+    return bill_response(lane.billing_system, f"lane{lane_id}")
+
+# Per-lane bill updates for multi-lane setups
+@app.route('/lane/<lane_id>/api/bill_stream')
+def lane_bill_stream(lane_id):
+    lane = get_lane(lane_id)
+    if lane is None:
+        return jsonify({"success": False, "message": f"Unknown lane {lane_id}"}), 404
+    return bill_stream_response(lane.billing_system)
+
+# Per-lane boxes for browsers that draw them
+@app.route('/lane/<lane_id>/api/overlay_stream')
+def lane_overlay_stream(lane_id):
+    lane = get_lane(lane_id)
+    if lane is None:
+        return jsonify({"success": False, "message": f"Unknown lane {lane_id}"}), 404
+    return overlay_stream_response(lane.frame_hub)
+
+# API to get batching and per-lane capture counters
+@app.route('/api/lane_stats')
+def get_lane_stats():
+    if lane_server is None:
+        return jsonify({"running": False})
+    stats = lane_server.stats()
+    stats["running"] = True
+    return jsonify(stats)
+
+def bill_snapshot(system, snapshot):
+    """Billed items of a published snapshot with their display names and captured prices"""
+    return tuple(
+        (system.catalogue.item(cls_name).display_name, count, price)
+        for cls_name, count, price in snapshot.lines
+    )
 
 @app.route('/generate_receipt')
 def generate_receipt():
-    # Make sure excluded items don't appear in the receipt
-    original_items = billing_system.items.copy()
-    for item in excluded_items:
-        if item in billing_system.items:
-            del billing_system.items[item]
-            
-    filename = billing_system.generate_bill_pdf("output/receipts/receipt.pdf")
-    
-    # Restore original items
-    billing_system.items = original_items
-    return jsonify({"success": True, "filename": filename})
+    # ?format=pdf|html|text|escpos, defaulting to receipts.format in settings.json
+    output_format = request.args.get('format', settings["receipts"]["format"])
+    if output_format not in RECEIPT_FORMATS:
+        return jsonify({"success": False, "message": f"Unknown receipt format {output_format}"}), 400
+    
+    snapshot = billing_system.bill_state.snapshot
+    lines = bill_snapshot(billing_system, snapshot)
+    
+    # Generating a receipt finalizes the bill in the sales record
+    billing_system.finalize_bill(snapshot)
+    
+    job_id = receipt_queue.submit(lines, bill_id=snapshot.bill_id, output_format=output_format)
+    return jsonify({
+        "success": True,
+        "job_id": job_id,
+        "status_url": f"/api/receipt/{job_id}",
+        "download_url": f"/receipt/{job_id}/download"
+    })
+
+# API to check on a queued receipt
+@app.route('/api/receipt/<job_id>')
+def get_receipt_status(job_id):
+    job = receipt_queue.get(job_id)
+    if job is None:
+        return jsonify({"success": False, "message": f"Unknown receipt job {job_id}"}), 404
+    return jsonify({
+        "success": job["status"] != "failed",
+        "job_id": job_id,
+        "status": job["status"],
+        "format": job["format"],
+        "filename": job["filename"],
+        "error": job["error"]
+    })
+
+@app.route('/receipt/<job_id>/download')
+def download_receipt(job_id):
+    job = receipt_queue.get(job_id)
+    if job is None:
+        return jsonify({"success": False, "message": f"Unknown receipt job {job_id}"}), 404
+    if job["status"] != "done":
+        return jsonify({"success": False, "status": job["status"], "message": "Receipt is not ready"}), 409
+    mimetype, as_attachment = RECEIPT_MIMETYPES[job["format"]]
+    return send_file(os.path.abspath(job["filename"]), mimetype=mimetype, as_attachment=as_attachment)
+
+# API to get pipeline throughput and queue counters
+@app.route('/api/pipeline_stats')
+def get_pipeline_stats():
+    if pipeline is None:
+        return jsonify({"running": False})
+    stats = pipeline.stats()
+    stats["running"] = True
+    stats["stream"] = frame_hub.stats()
+    stats["video"] = video_source.stats()
+    stats["inference_scheduler"] = billing_system.scheduler.stats()
+    if billing_system.motion_gate is not None:
+        stats["motion_gate"] = billing_system.motion_gate.stats()
+    if billing_system.detection_cache is not None:
+        stats["detection_cache"] = billing_system.detection_cache.stats()
+    stats["roi"] = billing_system.roi.stats()
+    stats["catalogue"] = billing_system.catalogue.stats()
+    stats["sales_store"] = sales_store.stats()
+    if billing_system.object_tracker is not None:
+        stats["object_tracker"] = billing_system.object_tracker.stats()
+    return jsonify(stats)
+
+# Units and revenue per product per day, from paid bills
+@app.route('/api/sales/daily')
+def get_daily_sales():
+    today = day_of(time.time())
+    start = request.args.get('start', today)
+    end = request.args.get('end', start)
+    lane = request.args.get('lane')
+    try:
+        totals = sales_store.daily_totals(start, end, lane)
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+    return jsonify({
+        "success": True,
+        "start": start,
+        "end": end,
+        "lane": lane,
+        "items": totals,
+        "quantity": sum(row["quantity"] for row in totals),
+        "amount": sum(row["amount"] for row in totals)
+    })
+
+def collect_app_metrics():
+    """Counters the billing components already keep, read only when metrics are scraped"""
+    if billing_system is None:
+        return []
+    scheduler = billing_system.scheduler
+    samples = [
+        ("inference_interval", "gauge", {}, scheduler.interval),
+        ("frames_scheduled", "counter", {}, scheduler.scheduled),
+        ("frames_skipped", "counter", {"reason": "interval"}, scheduler.skipped),
+        ("bill_version", "gauge", {"lane": billing_system.lane_id}, billing_system.bill_state.version),
+        ("stream_clients", "gauge", {}, frame_hub.clients),
+        ("stream_rejected", "counter", {}, frame_hub.rejected),
+        ("sales_pending", "gauge", {}, sales_store.stats()["pending"]),
+        ("sales_write_errors", "counter", {}, sales_store.errors),
+        ("price_reloads", "counter", {}, billing_system.catalogue.reloads)
+    ]
+    if video_source is not None:
+        samples += [
+            ("video_source_up", "gauge", {"lane": billing_system.lane_id}, int(video_source.connected)),
+            ("video_source_reconnects", "counter", {"lane": billing_system.lane_id}, video_source.reconnects)
+        ]
+    if lane_server is not None:
+        for lane in lane_server.lanes.values():
+            samples += [
+                ("video_source_up", "gauge", {"lane": lane.billing_system.lane_id}, int(lane.video_source.connected)),
+                ("video_source_reconnects", "counter", {"lane": lane.billing_system.lane_id},
+                 lane.video_source.reconnects)
+            ]
+    if billing_system.motion_gate is not None:
+        samples.append(("frames_skipped", "counter", {"reason": "static"}, billing_system.motion_gate.gated))
+    cache = billing_system.detection_cache
+    if cache is not None:
+        samples += [
+            ("frames_skipped", "counter", {"reason": "cached"}, cache.hits),
+            ("detection_cache_lookups", "counter", {"result": "hit"}, cache.hits),
+            ("detection_cache_lookups", "counter", {"result": "miss"}, cache.misses),
+            ("detection_cache_entries", "gauge", {}, len(cache))
+        ]
+    return samples
+
+metrics.register_collector(collect_app_metrics)
+
+# Prometheus scrape endpoint
+@app.route('/metrics')
+def get_metrics():
+    return Response(metrics.prometheus(), mimetype='text/plain; version=0.0.4')
+
+# Stage latency percentiles and counters as JSON
+@app.route('/api/stats')
+def get_stats():
+    return jsonify(metrics.snapshot())
+
+# Sample every thread's stack for ?seconds= (default 5) and report the hottest code
+@app.route('/api/profile')
+def get_profile():
+    seconds = request.args.get('seconds', default=5.0, type=float)
+    report = profiler.profile(max(0.1, seconds), top=request.args.get('top', default=25, type=int))
+    if report is None:
+        return jsonify({"success": False, "message": "A profile is already running"}), 409
+    return jsonify(report)
 
 # Route to reset the bill
 @app.route('/reset_bill')
 def reset_bill():
-    billing_system.items.clear()
-    return jsonify({"success": True})
+    # The camera thread owns the tracker; wait briefly so the next bill fetch sees the reset
+    version = billing_system.bill_state.version
+    billing_system.reset_bill()
+    snapshot = billing_system.bill_state.wait_for_change(version, timeout=RESET_TIMEOUT)
+    return jsonify({"success": True, "applied": snapshot.version != version})
 
-if __name__ == "__main__":
-    print(f"Starting with excluded items: {excluded_items}")
+def start_billing(model):
+    """Build the billing system and start the camera and lanes once the model is warmed up"""
+    global billing_system, lane_server
+    billing_system = create_billing_system(model)
+    print(f"Starting with excluded items: {billing_system.catalogue.excluded_names}")
+    
+    # Price changes are picked up while running, since restarting reloads the model
+    billing_system.catalogue.start_watching()
+    
+    # Start the camera
+    start_camera()
     
-    # Start the camera thread
-    thread = threading.Thread(target=camera_thread)
-    thread.daemon = True
-    thread.start()
+    # Start any extra checkout lanes
+    lane_server = create_lane_server()
+    if lane_server is not None:
+        lane_server.start()
+
+if __name__ == "__main__":
+    # The page, /healthz and /metrics are served while the model loads
+    model_loader.start(on_ready=start_billing)
     
     # Start the Flask app
     app.run(host='0.0.0.0', port=5000, threaded=True)
\ No newline at end of file
@@ -1,18 +1,29 @@
 import cv2
 import time
 import os
-import json
+import sys
+import uuid
 import numpy as np
-from collections import defaultdict
-from ultralytics import YOLO
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib import colors
-import datetime
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.utils.detections import Detections
+from src.utils.inference_scheduler import InferenceScheduler
+from src.utils.motion_gate import MotionGate
+from src.utils.preprocess import LetterboxPreprocessor
+from src.utils.inference_backend import run_detection
+from src.utils.roi import RegionOfInterest
+from src.utils.item_tracker import ItemTracker
+from src.utils.bill_state import BillState, RESET_BILL
+from src.utils.catalogue import Catalogue
+from src.utils.metrics import DISABLED
+from src.utils.receipt_generator import ReceiptGenerator
+from src.utils.overlay import LabelSprites, BillPanel, BOX_COLOR, ROI_COLOR
 
 class ObjectBillingSystem:
-    def __init__(self, model_path, confidence=0.5, time_threshold=5.0):
+    def __init__(self, model_path, confidence=0.5, time_threshold=5.0,
+                 inference_interval=1, inference_budget=None, target_latency=None,
+                 motion_threshold=None, model=None, input_size=None, roi=None,
+                 object_tracker=None, catalogue=None, sales_store=None, lane_id="main",
+                 clock=time.time, metrics=DISABLED, client_overlay=False, detection_cache=None):
         """
         Initialize the real-time object detection and billing system
         
@@ -20,243 +31,361 @@ class ObjectBillingSystem:
             model_path (str): Path to the trained YOLOv8 model
             confidence (float): Confidence threshold for detections
             time_threshold (float): Time in seconds to increment quantity counter
+            inference_interval (int): Run full inference on every Nth frame and reuse the last detections in between
+            inference_budget (float): Minimum seconds between inferences, or None to only use the frame interval
+            target_latency (float): Inference latency in seconds above which the interval is raised automatically
+            motion_threshold (float): Mean grayscale frame difference below which inference is skipped, or None to always infer
+            model (YOLO): Already loaded model to share with other billing systems, or None to load model_path
+            input_size (int): Letterbox frames into reusable buffers of this size, or None to let ultralytics preprocess
+            roi (RegionOfInterest): Part of the frame sent to the model, or None for the whole frame
+            object_tracker (ObjectTracker): Count each tracked physical item once instead of using per-class timers, or None
+            catalogue (Catalogue): Prices and exclusions by class id, or None to build one from config/prices.json
+            sales_store (SalesStore): Where added items and resets are logged, or None to keep no record
+            lane_id (str): Lane name stored with every logged sale
+            clock (callable): Returns the current time for frames processed without a capture timestamp
+            metrics (Metrics): Records preprocess, inference, tracking and overlay stage times
+            client_overlay (bool): Leave frames undrawn and keep the boxes in self.overlay for the browser to draw
+            detection_cache (DetectionCache): Reuse the detections of near-identical earlier frames, or None to always infer
         """
-        # Dictionary to store item counts and their last seen timestamps
-        self.items = defaultdict(lambda: {
-            "count": 0, 
-            "last_seen": 0, 
-            "continuous_time": 0,
-            "last_added_time": 0  # Track when the item was last added to the bill
-        })
-
-        # Load the YOLO model
-        self.model = YOLO(model_path)
+        # Load the YOLO model unless one is shared with us; ultralytics pulls in
+        # torch, so it is only imported when this is the one loading it
+        if model is None:
+            from ultralytics import YOLO
+            model = YOLO(model_path)
+        self.model = model
         self.confidence = confidence
         self.time_threshold = time_threshold
+        self.clock = clock
+        self.metrics = metrics
         
         # Get class names from model
         self.class_names = self.model.names
         
-        # Load product prices from JSON file
-        self.prices = self._load_prices()
+        # Per-class counts and timers, stored in arrays indexed by class id
+        self.tracker = ItemTracker(self.class_names, time_threshold=time_threshold, clock=clock)
         
-        # Add default prices for any classes not in the price list
-        for class_id, class_name in self.class_names.items():
-            if class_name not in self.prices:
-                self.prices[class_name] = 2.00  # Default price for unknown items
-
-    def _load_prices(self):
-        """Load product prices from JSON file"""
-        price_file = os.path.join(os.path.dirname(__file__), 'config', 'prices.json')
-        
-        # If price file exists, load it
-        if os.path.exists(price_file):
-            try:
-                with open(price_file, 'r') as f:
-                    return json.load(f)
-            except Exception as e:
-                print(f"Error loading prices from {price_file}: {e}")
-        
-        # Fallback to default prices
-        return {
-            'apple': 20,
-            'Blue bottle': 100,
-            'nivea': 50,
-            'parachute hair oil': 60,
-            'Nivea Facewash': 30,
-            'Moong Dal': 40,
-            'Colgate Toothpaste': 70,
-            'Kissan mixed fruit jam': 80
-        }
-
-    def generate_bill_pdf(self, filename="receipt.pdf"):
-        """Generate a PDF bill with the detected items"""
-        # Ensure output directory exists
-        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        # Immutable bill snapshots for web clients, and the commands they send back
+        self.bill_state = BillState()
+        
+        # Optional per-instance tracking that replaces the per-class timers
+        self.object_tracker = object_tracker
+        self._tracked_detections = None
+        self._track_ids = None
+        
+        # Decide which frames get a full model pass
+        self.scheduler = InferenceScheduler(
+            interval=inference_interval,
+            time_budget=inference_budget,
+            target_latency=target_latency
+        )
+        self.last_detections = Detections()
+        self.preprocessor = LetterboxPreprocessor(input_size) if input_size else None
         
-        # Get current date and time
-        current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        # Only the checkout tray area is sent to the model
+        self.roi = roi if roi is not None else RegionOfInterest()
         
-        # Create a PDF document
-        doc = SimpleDocTemplate(filename, pagesize=letter)
-        styles = getSampleStyleSheet()
-        elements = []
+        # Skip the model entirely while the counter scene is static
+        self.motion_gate = MotionGate(threshold=motion_threshold) if motion_threshold is not None else None
         
-        # Add header
-        header = Paragraph("<b>Retail Billing Receipt</b>", styles["Title"])
-        elements.append(header)
+        # Serve frames that look like a recently inferred one from that frame's detections
+        self.detection_cache = detection_cache
         
-        # Add date and time
-        date_time = Paragraph(f"Date: {current_time}", styles["Normal"])
-        elements.append(date_time)
-        elements.append(Paragraph("<br/><br/>", styles["Normal"]))
+        # Prices, exclusions and display names compiled per class id from config/prices.json
+        self.catalogue = catalogue if catalogue is not None else Catalogue(self.class_names)
         
-        # Create data for table
-        data = [['Item', 'Quantity', 'Unit Price', 'Total']]
-        total_amount = 0
+        # Unit price of each product when it was first added to the current bill
+        self.captured_prices = {}
+        self.bill_id = uuid.uuid4().hex
+        # Last bill paid through finalize_bill; set by web handlers, read by the camera thread
+        self.finalized_bill_id = None
         
+        # Optional durable record of sales
+        self.sales_store = sales_store
+        self.lane_id = lane_id
+        
+        # Box labels and the bill panel are rendered once and pasted onto frames
+        self.client_overlay = client_overlay
+        self.overlay = None
+        self.label_sprites = LabelSprites()
+        self.bill_panel = BillPanel()
+
+    @property
+    def items(self):
+        """Dictionary-style view of the tracked items, keyed by class name"""
+        return self.tracker.items
+    
+    @items.setter
+    def items(self, items):
+        self.tracker.load(items)
+    
+    @property
+    def prices(self):
+        """Unit price of every product in the catalogue, keyed by class name"""
+        return {cls_name: item.price for cls_name, item in self.catalogue.entries.by_name.items()}
+    
+    def generate_bill_pdf(self, filename="receipt.pdf"):
+        """Generate a PDF bill with the detected items"""
         # Debug - print all items with their counts before generating bill
         print("\nItems in bill:")
         for cls_name, item_info in self.items.items():
             print(f"- {cls_name}: count={item_info['count']}")
         
-        # Add items to the bill
-        items_added = False
-        for cls_name, item_info in dict(self.items).items():
-            if item_info["count"] > 0:
-                items_added = True
-                unit_price = self.prices.get(cls_name, 0)
-                total_price = unit_price * item_info["count"]
-                total_amount += total_price
-                
-                data.append([
-                    cls_name, 
-                    str(item_info["count"]), 
-                    f"{unit_price:.2f}", 
-                    f"{total_price:.2f}"
-                ])
-        
-        # If no items were added, show a placeholder
-        if not items_added:
-            print("Warning: No items with count > 0 found")
-            data.append(['No items detected', '0', '0.00', '0.00'])
-        
-        # Add subtotal, tax, and total
-        tax_rate = 0.07  # 7% tax rate
-        tax_amount = total_amount * tax_rate
-        final_total = total_amount + tax_amount
-        
-        data.append(['', '', 'Subtotal:', f"{total_amount:.2f}"])
-        data.append(['', '', 'Tax (7%):', f"{tax_amount:.2f}"])
-        data.append(['', '', 'Total:', f"{final_total:.2f}"])
-        
-        # Create table and set style
-        table = Table(data)
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -2), 1, colors.black),
-            ('ALIGN', (1, 1), (-1, -1), 'RIGHT'),
-            ('FONTNAME', (0, -3), (-1, -1), 'Helvetica-Bold'),
-        ]))
-        
-        elements.append(table)
-        elements.append(Paragraph("<br/><br/>Thank you for shopping with us!", styles["Normal"]))
-        
-        # Build PDF
-        doc.build(elements)
-        print(f"Receipt generated: {filename}")
-        return filename
+        generator = ReceiptGenerator(os.path.dirname(filename) or ".")
+        return generator.write_receipt(self.bill_lines(), tax_rate=0.07, filename=filename)
     
-    def process_frame(self, frame):
-        """Process a single frame for object detection and tracking"""
-        current_time = time.time()
-        
-        # Run YOLOv8 inference on the frame
-        results = self.model(frame, conf=self.confidence)
-        
-        # Get detected objects from this frame
-        detected_items = set()
-        
-        # Process the results
-        for r in results:
-            boxes = r.boxes
-            for box in boxes:
-                # Get class ID and confidence
-                cls_id = int(box.cls[0].item())
-                conf = box.conf[0].item()
-                
-                # Get class name
-                cls_name = self.class_names[cls_id]
-                
-                # Skip apple class
-                if cls_name.lower() == 'apple':
-                    continue
-                    
-                detected_items.add(cls_name)
-                
-                # Draw bounding box on frame
-                x1, y1, x2, y2 = map(int, box.xyxy[0])
-                cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                
-                # Add label
-                label = f"{cls_name}: {conf:.2f}"
-                cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+    def finalize_bill(self, snapshot):
+        """
+        Store a paid bill in the sales record, so clearing it later is not logged as a reset
         
-        # Update item tracking and counts
-        for cls_name in list(self.items.keys()) + list(detected_items):
-            # Initialize if not exists
-            if cls_name not in self.items:
-                self.items[cls_name] = {
-                    "count": 0, 
-                    "last_seen": 0, 
-                    "continuous_time": 0,
-                    "last_added_time": 0
-                }
-                
-            if cls_name in detected_items:
-                # Item is currently visible
-                if self.items[cls_name]["last_seen"] == 0:
-                    # First time seeing this item in this sequence
-                    self.items[cls_name]["last_seen"] = current_time
-                    self.items[cls_name]["continuous_time"] = 0
-                else:
-                    # Calculate continuous visibility time
-                    elapsed = current_time - self.items[cls_name]["last_seen"]
-                    self.items[cls_name]["continuous_time"] += elapsed
-                    self.items[cls_name]["last_seen"] = current_time
-                    
-                    # Check if the cooldown period has elapsed since last adding this item
-                    cooldown_elapsed = current_time - self.items[cls_name]["last_added_time"]
-                    
-                    # If continuously visible for more than threshold AND cooldown has elapsed, increment count
-                    if (self.items[cls_name]["continuous_time"] >= self.time_threshold and 
-                        (self.items[cls_name]["last_added_time"] == 0 or cooldown_elapsed >= self.time_threshold)):
-                        print(f"Adding {cls_name} to bill - visible for {self.items[cls_name]['continuous_time']:.2f} seconds")
-                        self.items[cls_name]["count"] += 1
-                        self.items[cls_name]["continuous_time"] = 0  # Reset timer after incrementing
-                        self.items[cls_name]["last_added_time"] = current_time  # Update last added time
+        Args:
+            snapshot (BillSnapshot): Published snapshot of the bill being paid
+        """
+        if self.sales_store is not None and snapshot.lines:
+            self.sales_store.record_bill(self.lane_id, snapshot.bill_id, [
+                (cls_name, self.catalogue.item(cls_name).display_name, count, price)
+                for cls_name, count, price in snapshot.lines
+            ])
+        self.finalized_bill_id = snapshot.bill_id
+    
+    def clear_bill(self):
+        """Start a new bill, so the next items are priced from the current catalogue"""
+        # Only bills abandoned without a receipt count as resets
+        if (self.sales_store is not None and self.tracker.billed()
+                and self.finalized_bill_id != self.bill_id):
+            self.sales_store.record_reset(self.lane_id, self.bill_id)
+        self.tracker.clear_items()
+        # Tracks confirmed on the old bill would otherwise keep its items from being counted again
+        if self.object_tracker is not None:
+            self.object_tracker.clear()
+            self._tracked_detections = None
+            self._track_ids = None
+        # Boxes from the old bill's frames must not be served for the new one
+        if self.detection_cache is not None:
+            self.detection_cache.clear()
+        self.captured_prices = {}
+        self.bill_id = uuid.uuid4().hex
+    
+    def bill_lines(self):
+        """
+        Get the current bill, pricing each product the first time it appears on it
+        
+        Returns:
+            list: (class name, count, unit price) for every billed product
+        """
+        lines = []
+        for cls_name, count in self.tracker.billed():
+            price = self.captured_prices.get(cls_name)
+            if price is None:
+                price = self.captured_prices[cls_name] = self.catalogue.item(cls_name).price
+            lines.append((cls_name, count, price))
+        return lines
+    
+    def reset_bill(self):
+        """Ask the thread running process_frame to clear the bill before its next frame"""
+        self.bill_state.submit(RESET_BILL)
+    
+    def apply_commands(self):
+        """Apply bill commands queued by other threads"""
+        for command in self.bill_state.take_commands():
+            if command == RESET_BILL:
+                print("Resetting current bill...")
+                self.clear_bill()
             else:
-                # Item is not visible in this frame
-                if self.items[cls_name]["last_seen"] > 0:
-                    # Item just disappeared
-                    elapsed = current_time - self.items[cls_name]["last_seen"]
-                    total_visible_time = self.items[cls_name]["continuous_time"] + elapsed
-                    
-                    # Check cooldown
-                    cooldown_elapsed = current_time - self.items[cls_name]["last_added_time"]
-                    
-                    # If visible for less than threshold but greater than 0 AND cooldown has elapsed, count as 1
-                    if (0 < total_visible_time < self.time_threshold and 
-                        self.items[cls_name]["continuous_time"] > 0 and
-                        (self.items[cls_name]["last_added_time"] == 0 or cooldown_elapsed >= self.time_threshold)):
-                        print(f"Adding {cls_name} to bill - disappeared after {total_visible_time:.2f} seconds")
-                        self.items[cls_name]["count"] += 1
-                        self.items[cls_name]["last_added_time"] = current_time  # Update last added time
-                    
-                    # Reset tracking for this item
-                    self.items[cls_name]["last_seen"] = 0
-                    self.items[cls_name]["continuous_time"] = 0
-        
-        # Add billing information to the display
-        y_offset = 30
-        cv2.putText(frame, "Current Bill:", (10, y_offset), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-        y_offset += 30
-        
-        total_amount = 0
-        for cls_name, item_info in self.items.items():
-            if item_info["count"] > 0:
-                amount = item_info["count"] * self.prices.get(cls_name, 0)
-                total_amount += amount
-                cv2.putText(frame, f"{cls_name}: {item_info['count']} x {self.prices.get(cls_name, 0):.2f} = {amount:.2f}", 
-                           (10, y_offset), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
-                y_offset += 25
+                print(f"Ignoring unknown bill command: {command}")
+    
+    def needs_inference(self, frame, current_time):
+        """
+        Check whether a frame should go through the model
+        
+        Args:
+            frame (numpy.ndarray): BGR frame
+            current_time (float): Timestamp of the frame
+            
+        Returns:
+            bool: False if the scheduler skips the frame or the scene has not changed
+        """
+        if not self.scheduler.should_run(current_time):
+            return False
+        
+        # Carry the previous detections forward so item timers keep running
+        if self.motion_gate is not None and self.motion_gate.is_static(self.roi.crop(frame)[0], current_time):
+            return False
+        
+        return True
+    
+    def set_detections(self, detections, latency, frame_shape, current_time):
+        """
+        Store detections produced for this system, e.g. by a batched model call
+        
+        Args:
+            detections (Detections): Detections for the latest inferred frame, in full-frame coordinates
+            latency (float): Time in seconds the inference took, or None if the detections came from the cache
+            frame_shape (tuple): Shape of the full frame
+            current_time (float): Timestamp of the frame the detections are for
+        
+        Detections of excluded classes are dropped here, once per inference.
+        """
+        detections = self.catalogue.filter(detections)
+        if latency is not None:
+            self.scheduler.record(latency, current_time)
+        self.roi.observe(detections, frame_shape)
+        self.last_detections = detections
+    
+    def detect(self, frame, current_time):
+        """
+        Run inference on a frame when the scheduler asks for it and the scene has changed
+        
+        Args:
+            frame (numpy.ndarray): BGR frame to run the model on
+            current_time (float): Timestamp of the frame
+            
+        Returns:
+            Detections: Fresh detections, or the last ones if this frame was skipped
+        """
+        if not self.needs_inference(frame, current_time):
+            return self.last_detections
+        
+        start = time.time()
+        region, (x_offset, y_offset) = self.roi.crop(frame)
+        cache_key = None
+        if self.detection_cache is not None:
+            cache_key, detections = self.detection_cache.lookup(region, current_time)
+            if detections is not None:
+                self.set_detections(detections.shifted(x_offset, y_offset), None, frame.shape, current_time)
+                return self.last_detections
+        
+        detections = run_detection(self.model, [region], self.confidence, self.preprocessor, self.metrics)[0]
+        if cache_key is not None:
+            self.detection_cache.store(cache_key, detections, current_time)
+        self.set_detections(detections.shifted(x_offset, y_offset), time.time() - start, frame.shape,
+                            current_time)
+        return self.last_detections
+    
+    def update_counts(self, detections, current_time):
+        """
+        Update item tracking and counts from one frame's detections, and publish the bill
+        
+        Args:
+            detections (Detections): Detections of the frame, excluded classes already removed
+            current_time (float): Capture timestamp of the frame
+            
+        Returns:
+            numpy.ndarray: Track ID per detection when tracking objects, otherwise None
+        """
+        track_ids = None
+        added = []
+        if self.object_tracker is None:
+            added = self.tracker.update(detections.cls, current_time)
+        else:
+            # Only fresh detections move tracks forward; reused ones would inflate hit counts
+            if detections is not self._tracked_detections:
+                self._tracked_detections = detections
+                self._track_ids, confirmed_cls = self.object_tracker.update(detections, current_time)
+                if len(confirmed_cls):
+                    self.tracker.add(confirmed_cls, current_time)
+                added = confirmed_cls
+            track_ids = self._track_ids
+        self.bill_state.publish(self.tracker.version, self.bill_lines, self.bill_id)
+        if self.sales_store is not None and len(added):
+            self.sales_store.record_items(self.lane_id, self.bill_id,
+                                          [self.class_names[cls_id] for cls_id in added.tolist()], current_time)
+        return track_ids
+    
+    def draw_overlay(self, frame, detections, track_ids=None):
+        """
+        Draw boxes, the model's region and the current bill onto a frame
+        
+        Args:
+            frame (numpy.ndarray): BGR frame, annotated in place
+            detections (Detections): Detections to box
+            track_ids (numpy.ndarray): Track ID per detection, or None
+        """
+        display_names = self.catalogue.entries.by_name
+        for i, (cls_id, conf, (x1, y1, x2, y2)) in enumerate(detections):
+            # Draw bounding box on frame
+            cv2.rectangle(frame, (x1, y1), (x2, y2), BOX_COLOR, 2)
+            
+            # Add label; only the name is pre-rendered, since the track id and
+            # confidence change every frame
+            prefix = f"#{track_ids[i]} " if track_ids is not None else ""
+            self.label_sprites.draw(frame, display_names[self.class_names[cls_id]].display_name, (x1, y1 - 10),
+                                    BOX_COLOR, prefix=prefix, suffix=f": {conf:.2f}")
+        
+        # Outline the region the model looks at
+        if not self.roi.is_full_frame:
+            x1, y1, x2, y2 = self.roi.pixel_box(frame.shape)
+            cv2.rectangle(frame, (x1, y1), (x2 - 1, y2 - 1), ROI_COLOR, 1)
+        
+        # The bill panel is only re-rendered when the bill or the catalogue changes
+        snapshot = self.bill_state.snapshot
+        self.bill_panel.draw(frame, (snapshot.version, self.catalogue.entries.signature), snapshot.lines,
+                             lambda cls_name: self.catalogue.item(cls_name).display_name)
+    
+    def overlay_metadata(self, frame_shape, detections, track_ids=None, captured_at=None):
+        """
+        Describe what draw_overlay would draw, for browsers that draw it themselves
         
-        cv2.putText(frame, f"Total: {total_amount:.2f}", (10, y_offset), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+        Args:
+            frame_shape (tuple): Shape of the frame the boxes belong to
+            detections (Detections): Detections to box
+            track_ids (numpy.ndarray): Track ID per detection, or None
+            captured_at (float): Capture timestamp of the frame
+            
+        Returns:
+            dict: Frame size, boxes with labels, the model's region and the bill version
+        """
+        display_names = self.catalogue.entries.by_name
+        boxes = []
+        for i, (cls_id, conf, (x1, y1, x2, y2)) in enumerate(detections):
+            boxes.append({
+                "box": [int(x1), int(y1), int(x2), int(y2)],
+                "label": display_names[self.class_names[cls_id]].display_name,
+                "confidence": round(float(conf), 2),
+                "track_id": int(track_ids[i]) if track_ids is not None else None
+            })
+        return {
+            "width": frame_shape[1],
+            "height": frame_shape[0],
+            "captured_at": captured_at,
+            "boxes": boxes,
+            "roi": None if self.roi.is_full_frame else [int(v) for v in self.roi.pixel_box(frame_shape)],
+            "bill_version": self.bill_state.version
+        }
+    
+    def process_frame(self, frame, detections=None, current_time=None):
+        """
+        Process a single frame for object detection and tracking
+        
+        Args:
+            frame (numpy.ndarray): BGR frame, annotated in place
+            detections (Detections): Detections computed elsewhere, or None to run the model here
+            current_time (float): Capture timestamp of the frame, defaults to the clock
+            
+        Returns:
+            numpy.ndarray: The annotated frame
+        """
+        if current_time is None:
+            current_time = self.clock()
+        
+        # The tracker is only ever changed from this thread
+        self.apply_commands()
+        
+        # Run YOLOv8 inference on the frame, or reuse the last detections
+        if detections is None:
+            detections = self.detect(frame, current_time)
+        elif detections is not self.last_detections:
+            detections = self.catalogue.filter(detections)
+        
+        # Update item tracking and counts
+        with self.metrics.timer("tracking"):
+            track_ids = self.update_counts(detections, current_time)
+        
+        # Draw the detections and the bill, or leave that to the browser
+        with self.metrics.timer("overlay"):
+            if self.client_overlay:
+                self.overlay = self.overlay_metadata(frame.shape, detections, track_ids, current_time)
+            else:
+                self.draw_overlay(frame, detections, track_ids)
         
         return frame
     
@@ -269,6 +398,9 @@ class ObjectBillingSystem:
         # Initialize camera
         cap = cv2.VideoCapture(0)  # Use 0 for primary webcam
         
+        # Pick up price changes without restarting
+        self.catalogue.start_watching()
+        
         try:
             while True:
                 ret, frame = cap.read()
@@ -292,7 +424,7 @@ class ObjectBillingSystem:
                 elif key == ord('r'):
                     # Reset bill
                     print("Resetting current bill...")
-                    self.items.clear()
+                    self.clear_bill()
         
         except Exception as e:
             print(f"Error occurred: {e}")
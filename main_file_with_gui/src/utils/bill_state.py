@@ -0,0 +1,101 @@
+import queue
+import threading
+from collections import namedtuple
+
+# Immutable view of a bill: the tracker version, a tuple of (class name, count, unit price)
+# and the ID of the bill
+BillSnapshot = namedtuple("BillSnapshot", ["version", "lines", "bill_id"])
+
+# Commands web handlers can send to the thread that owns the tracker
+RESET_BILL = "reset_bill"
+
+
+class BillState:
+    def __init__(self):
+        """
+        Bill snapshots shared between the camera thread and web handlers
+
+        Only the camera thread touches the ItemTracker. After each frame it
+        publishes an immutable snapshot by swapping a single reference, so
+        readers never lock and never see a bill that is half updated. Requests
+        that change the bill are queued and applied by the camera thread.
+        """
+        self.snapshot = BillSnapshot(0, (), None)
+        self._cond = threading.Condition()
+        self._commands = queue.SimpleQueue()
+        self._cache = None
+
+    @property
+    def version(self):
+        """Version of the latest published snapshot"""
+        return self.snapshot.version
+
+    def publish(self, version, billed, bill_id=None):
+        """
+        Swap in a new snapshot and wake waiting readers if the version changed
+
+        Args:
+            version (int): Current ItemTracker version
+            billed (callable): Returns (class name, count, unit price) lines, only called when the version changed
+            bill_id (str): ID of the current bill
+        """
+        if version == self.snapshot.version:
+            return
+        self.snapshot = BillSnapshot(version, tuple(billed()), bill_id)
+        with self._cond:
+            self._cond.notify_all()
+
+    def wait_for_change(self, known_version, timeout=None):
+        """
+        Block until the published version differs from known_version
+
+        Args:
+            known_version (int): Version the caller already has
+            timeout (float): Seconds to wait, or None to wait forever
+
+        Returns:
+            BillSnapshot: The latest snapshot, with known_version if the wait timed out
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self.snapshot.version != known_version, timeout)
+        return self.snapshot
+
+    def bill(self, build):
+        """
+        Get the bill for the latest snapshot, building it at most once per version
+
+        Args:
+            build (callable): Builds the bill from a snapshot's lines when the cached one is stale
+
+        Returns:
+            tuple: (version, bill)
+        """
+        snapshot = self.snapshot
+        cached = self._cache
+        if cached is None or cached[0] != snapshot.version:
+            cached = (snapshot.version, build(snapshot.lines))
+            self._cache = cached
+        return cached
+
+    def submit(self, command):
+        """
+        Queue a command for the camera thread
+
+        Args:
+            command (str): Command such as RESET_BILL
+        """
+        self._commands.put(command)
+
+    def take_commands(self):
+        """
+        Get every queued command, oldest first
+
+        Returns:
+            list: Commands queued since the last call
+        """
+        commands = []
+        while True:
+            try:
+                commands.append(self._commands.get_nowait())
+            except queue.Empty:
+                return commands
@@ -0,0 +1,287 @@
+import json
+import numbers
+import os
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+PRICE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'prices.json')
+
+# Used when prices.json is empty, missing or unreadable
+DEFAULT_PRICES = {
+    'apple': 20,
+    'Blue bottle': 100,
+    'nivea': 50,
+    'parachute hair oil': 60,
+    'Nivea Facewash': 30,
+    'Moong Dal': 40,
+    'Colgate Toothpaste': 70,
+    'Kissan mixed fruit jam': 80
+}
+
+# Classes the model knows but that are never billed, unless prices.json says otherwise
+DEFAULT_EXCLUDED = ('apple', 'kissan mixed fruit jam')
+
+# Price of classes that are not in the price list
+DEFAULT_PRICE = 2.00
+
+# One product as seen by the bill: its class id (None if the model does not know it),
+# unit price, whether it is excluded and the name shown to customers
+CatalogueItem = namedtuple("CatalogueItem", ["cls_id", "price", "excluded", "display_name"])
+
+# Everything compiled from one version of prices.json, swapped as a whole on reload.
+# signature is the (mtime, size) of the file it was read from
+CatalogueEntries = namedtuple("CatalogueEntries", ["prices", "excluded", "by_name", "signature"])
+
+ENTRY_KEYS = ("price", "excluded", "display_name")
+
+
+def validate_price_config(config):
+    """
+    Check a price config before it replaces the one in use
+
+    Args:
+        config (dict): Entries by class name
+
+    Raises:
+        ValueError: Describing every invalid entry
+    """
+    if not isinstance(config, dict):
+        raise ValueError("the price list must be a JSON object")
+
+    def valid_price(value):
+        return isinstance(value, numbers.Real) and not isinstance(value, bool) and value >= 0
+
+    problems = []
+    for name, value in config.items():
+        if isinstance(value, dict):
+            unknown = set(value) - set(ENTRY_KEYS)
+            if unknown:
+                problems.append(f"{name}: unknown keys {sorted(unknown)}")
+            if "price" in value and not valid_price(value["price"]):
+                problems.append(f"{name}: price must be a non-negative number")
+            if "excluded" in value and not isinstance(value["excluded"], bool):
+                problems.append(f"{name}: excluded must be true or false")
+            if "display_name" in value and not (isinstance(value["display_name"], str) and value["display_name"]):
+                problems.append(f"{name}: display_name must be a non-empty string")
+        elif not valid_price(value):
+            problems.append(f"{name}: price must be a non-negative number")
+
+    if problems:
+        raise ValueError("; ".join(problems))
+
+
+def read_price_config(price_file=PRICE_FILE, allow_empty=True):
+    """
+    Read and validate prices.json
+
+    Each key is a class name. The value is either a price, or an object with
+    any of "price", "excluded" and "display_name".
+
+    Args:
+        price_file (str): Path to the JSON price list
+        allow_empty (bool): Fall back to DEFAULT_PRICES if the file is empty or missing,
+            otherwise treat that as an error, e.g. while an editor is rewriting it
+
+    Returns:
+        dict: Entries by class name
+    """
+    if not os.path.exists(price_file) or os.path.getsize(price_file) == 0:
+        if not allow_empty:
+            raise ValueError(f"{price_file} is empty or missing")
+        return dict(DEFAULT_PRICES)
+
+    with open(price_file, 'r') as f:
+        config = json.load(f)
+    validate_price_config(config)
+    return config
+
+
+def compile_catalogue(class_names, config, signature=None, default_price=DEFAULT_PRICE):
+    """
+    Turn a price config into per-class-id lookup arrays
+
+    Names are matched exactly first and then ignoring case.
+
+    Args:
+        class_names (dict): Mapping of class id to class name, e.g. model.names
+        config (dict): Entries by class name as returned by read_price_config
+        signature (tuple): (mtime, size) of the config file, if it came from one
+        default_price (float): Price of classes the config does not mention
+
+    Returns:
+        CatalogueEntries: Compiled catalogue
+    """
+    lowered = {name.lower(): name for name in config}
+    size = max(class_names) + 1 if class_names else 0
+    prices = np.full(size, default_price, dtype=np.float64)
+    excluded = np.zeros(size, dtype=bool)
+    by_name = {}
+    matched = set()
+
+    def entry(cls_id, name, value):
+        if not isinstance(value, dict):
+            value = {"price": value}
+        return CatalogueItem(cls_id,
+                             float(value.get("price", default_price)),
+                             bool(value.get("excluded", name.lower() in DEFAULT_EXCLUDED)),
+                             str(value.get("display_name", name)))
+
+    for cls_id, name in class_names.items():
+        key = name if name in config else lowered.get(name.lower())
+        matched.add(key)
+        item = entry(cls_id, name, config.get(key, {}))
+        prices[cls_id] = item.price
+        excluded[cls_id] = item.excluded
+        by_name[name] = item
+
+    # Products priced in the config that this model cannot detect
+    for name, value in config.items():
+        if name not in matched and name not in by_name:
+            by_name[name] = entry(None, name, value)
+
+    return CatalogueEntries(prices, excluded, by_name, signature)
+
+
+class Catalogue:
+    def __init__(self, class_names, price_file=PRICE_FILE, check_interval=1.0):
+        """
+        Prices, exclusions and display names for every class the model detects
+
+        Built once from prices.json and the model's class names, then looked
+        up by class id. start_watching polls the file from a background
+        thread, so the camera thread never pays for it. A changed file is
+        read once it has stopped changing, validated, compiled and swapped in
+        as a single reference. An invalid file is reported and ignored.
+
+        Args:
+            class_names (dict): Mapping of class id to class name, e.g. model.names
+            price_file (str): Path to the JSON price list
+            check_interval (float): Seconds between checks of the file
+        """
+        self.class_names = dict(class_names)
+        self.price_file = price_file
+        self.check_interval = check_interval
+        self.reloads = 0
+        self.rejected = 0
+        self.last_error = None
+
+        self._pending = None
+        self._watcher = None
+        self.entries = self._compile_file()
+
+    def _signature(self):
+        try:
+            stat = os.stat(self.price_file)
+        except OSError:
+            return None
+        return (stat.st_mtime, stat.st_size)
+
+    def _compile_file(self):
+        signature = self._signature()
+        try:
+            return compile_catalogue(self.class_names, read_price_config(self.price_file), signature)
+        except Exception as e:
+            print(f"Error loading prices from {self.price_file}: {e}")
+            self.last_error = str(e)
+            return compile_catalogue(self.class_names, DEFAULT_PRICES, signature)
+
+    def check_for_changes(self):
+        """
+        Swap in a new catalogue if prices.json changed and has since stopped changing
+
+        A file is only read once two checks in a row see the same modification
+        time and size, so a half-written file is never loaded.
+
+        Returns:
+            bool: True if a new catalogue was swapped in
+        """
+        signature = self._signature()
+        if signature == self.entries.signature:
+            self._pending = None
+            return False
+        if signature != self._pending:
+            self._pending = signature
+            return False
+        self._pending = None
+
+        try:
+            entries = compile_catalogue(self.class_names,
+                                        read_price_config(self.price_file, allow_empty=False),
+                                        signature)
+        except Exception as e:
+            # Keep billing with the last good catalogue until the file is fixed
+            print(f"Ignoring invalid price list {self.price_file}: {e}")
+            self.rejected += 1
+            self.last_error = str(e)
+            self.entries = self.entries._replace(signature=signature)
+            return False
+
+        self.entries = entries
+        self.reloads += 1
+        self.last_error = None
+        print(f"Reloaded price list from {self.price_file}")
+        return True
+
+    def start_watching(self):
+        """Poll prices.json for changes from a daemon thread, once"""
+        if self._watcher is not None:
+            return
+        self._watcher = threading.Thread(target=self._watch, name="catalogue-watcher", daemon=True)
+        self._watcher.start()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.check_interval)
+            try:
+                self.check_for_changes()
+            except Exception as e:
+                print(f"Error checking {self.price_file}: {e}")
+
+    def filter(self, detections):
+        """
+        Drop detections of excluded classes
+
+        Args:
+            detections (Detections): Detections in model class ids
+
+        Returns:
+            Detections: The same object if nothing was excluded, otherwise a subset
+        """
+        excluded = self.entries.excluded[detections.cls]
+        if not excluded.any():
+            return detections
+        return detections.subset(~excluded)
+
+    def item(self, cls_name):
+        """
+        Look up a product by class name
+
+        Args:
+            cls_name (str): Class name as reported by the model
+
+        Returns:
+            CatalogueItem: The product, priced at DEFAULT_PRICE if the config does not mention it
+        """
+        item = self.entries.by_name.get(cls_name)
+        if item is None:
+            return CatalogueItem(None, DEFAULT_PRICE, False, cls_name)
+        return item
+
+    @property
+    def excluded_names(self):
+        """Class names that are never billed"""
+        return [name for name, item in self.entries.by_name.items() if item.excluded]
+
+    def stats(self):
+        """Get reload counters"""
+        return {
+            "classes": len(self.class_names),
+            "excluded": self.excluded_names,
+            "reloads": self.reloads,
+            "rejected": self.rejected,
+            "last_error": self.last_error,
+            "watching": self._watcher is not None
+        }
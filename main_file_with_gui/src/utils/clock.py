@@ -0,0 +1,71 @@
+import time
+
+import cv2
+
+
+class ManualClock:
+    def __init__(self, start=0.0):
+        """
+        Clock that only moves when told to, for replaying footage and tests
+
+        Args:
+            start (float): Initial time in seconds
+        """
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+    def set(self, now):
+        """Jump to a timestamp"""
+        self.now = now
+
+    def advance(self, seconds):
+        """Move forward by a number of seconds"""
+        self.now += seconds
+
+
+class CaptureClock:
+    def __init__(self, cap, use_position=False, clock=time.time):
+        """
+        Timestamp frames as they are captured, so counting follows the footage
+        rather than how quickly frames are processed
+
+        Live cameras are stamped with the clock when the frame is read.
+        Recorded files are stamped with their stream position
+        (CAP_PROP_POS_MSEC) from the time the first frame was read, so they
+        can be processed faster or slower than real time with the same bill.
+
+        Args:
+            cap (cv2.VideoCapture): Opened capture to read positions from
+            use_position (bool): Use the stream position, for recorded files
+            clock (callable): Returns the current time in seconds
+        """
+        self.cap = cap
+        self.use_position = use_position
+        self.clock = clock
+        self._start = None
+        self._last = None
+
+    def stamp(self):
+        """
+        Timestamp of the frame that was just read
+
+        Returns:
+            float: Seconds on the clock's time scale
+        """
+        now = self.clock()
+        if not self.use_position:
+            return now
+
+        position = self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+        if self._start is None:
+            self._start = now - position
+        timestamp = self._start + position
+
+        # Some containers report no position; keep time moving forward regardless
+        if self._last is not None and timestamp <= self._last:
+            fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+            timestamp = self._last + 1.0 / fps
+        self._last = timestamp
+        return timestamp
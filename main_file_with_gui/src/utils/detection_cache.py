@@ -0,0 +1,162 @@
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+
+def _hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class DetectionCache:
+    def __init__(self, max_entries=64, ttl=1.0, max_distance=4, hash_size=16, min_contrast=2.0):
+        """
+        Reuse model output for frames that look the same as one already inferred
+
+        Frames are keyed by a difference hash of the downscaled grayscale image:
+        one bit per pixel pair, set where the left pixel is brighter than its
+        right neighbour by more than min_contrast. The margin keeps flat areas
+        such as an empty tray from flipping bits with sensor noise. Two frames
+        whose hashes differ in at most max_distance bits share detections.
+
+        Unlike the motion gate, which only compares with the last inferred
+        frame, this also matches any other recent frame, so the scene is
+        recognised again when a hand passes over the tray and leaves.
+
+        Entries expire ttl seconds after they were inferred, counted in frame
+        timestamps, so an item that barely changes the hash is picked up by
+        the next fresh pass at the latest.
+
+        Args:
+            max_entries (int): Frames kept before the least recently used one is evicted
+            ttl (float): Seconds an entry is reused before the frame is inferred again
+            max_distance (int): Most differing hash bits for two frames to count as the same
+            hash_size (int): Hash grid side, giving hash_size * hash_size bits
+            min_contrast (float): Grayscale levels (0-255) by which a cell must be brighter
+                than its neighbour to set a bit
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_distance = max_distance
+        self.hash_size = hash_size
+        self.min_contrast = min_contrast
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+        self.last_distance = None
+        # (height, width, hash) -> (detections, inferred at), least recently used first
+        self._entries = OrderedDict()
+
+    def key(self, frame):
+        """
+        Perceptual hash of a frame
+
+        Args:
+            frame (numpy.ndarray): BGR frame or region
+
+        Returns:
+            tuple: (height, width, hash), since boxes only carry over between regions of one size
+        """
+        # Sample a 4x4 grid per cell cheaply, then average it; area-resizing
+        # the whole frame straight to the hash grid costs about 30 times more
+        grid = (self.hash_size + 1, self.hash_size)
+        sampled = cv2.resize(frame, (grid[0] * 4, grid[1] * 4), interpolation=cv2.INTER_LINEAR)
+        gray = cv2.cvtColor(sampled, cv2.COLOR_BGR2GRAY).astype(np.float32)
+        gray = cv2.resize(gray, grid, interpolation=cv2.INTER_AREA)
+        bits = np.packbits(gray[:, 1:] > gray[:, :-1] + self.min_contrast)
+        return frame.shape[0], frame.shape[1], int.from_bytes(bits.tobytes(), "big")
+
+    def lookup(self, frame, now):
+        """
+        Find detections of an earlier frame that matches this one
+
+        Args:
+            frame (numpy.ndarray): BGR frame or region about to be inferred
+            now (float): Timestamp of the frame
+
+        Returns:
+            tuple: (key, detections), with detections None on a miss; pass the key to store
+        """
+        key = self.key(frame)
+        height, width, frame_hash = key
+
+        best = None
+        best_distance = self.max_distance + 1
+        for entry_key, (_, inferred_at) in list(self._entries.items()):
+            if now - inferred_at > self.ttl or now < inferred_at:
+                del self._entries[entry_key]
+                self.expired += 1
+                continue
+            if entry_key[0] != height or entry_key[1] != width:
+                continue
+            distance = _hamming(entry_key[2], frame_hash)
+            if distance < best_distance:
+                best, best_distance = entry_key, distance
+
+        if best is None:
+            self.misses += 1
+            self.last_distance = None
+            return key, None
+
+        self._entries.move_to_end(best)
+        self.hits += 1
+        self.last_distance = best_distance
+        return key, self._entries[best][0]
+
+    def store(self, key, detections, now):
+        """
+        Remember the detections of an inferred frame
+
+        Args:
+            key (tuple): Key returned by lookup for the frame
+            detections (Detections): Model output for the frame, in the frame's coordinates
+            now (float): Timestamp of the frame
+        """
+        self._entries[key] = (detections, now)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evicted += 1
+
+    def clear(self):
+        """Forget every cached frame, e.g. when a new bill starts"""
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Get the hit and miss counters"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "max_distance": self.max_distance,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "miss_rate": round(self.misses / lookups, 3) if lookups else 0.0,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "last_distance": self.last_distance
+        }
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Build a cache from the "detection_cache" settings section
+
+        Args:
+            config (dict): {"enabled", "size", "ttl", "max_distance", "hash_size", "min_contrast"}, or None
+
+        Returns:
+            DetectionCache: The cache, or None if it is disabled
+        """
+        if not config or not config.get("enabled"):
+            return None
+        return cls(max_entries=config.get("size", 64), ttl=config.get("ttl", 1.0),
+                   max_distance=config.get("max_distance", 4), hash_size=config.get("hash_size", 16),
+                   min_contrast=config.get("min_contrast", 2.0))
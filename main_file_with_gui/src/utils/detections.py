@@ -0,0 +1,64 @@
+import numpy as np
+
+
+class Detections:
+    def __init__(self, xyxy=None, conf=None, cls=None):
+        """
+        Boxes, confidences and class ids from a single inference pass
+
+        Args:
+            xyxy (array): (N, 4) box corners in frame pixel coordinates
+            conf (array): (N,) detection confidences
+            cls (array): (N,) integer class ids
+        """
+        self.xyxy = np.zeros((0, 4), dtype=np.float32) if xyxy is None else np.asarray(xyxy, dtype=np.float32).reshape(-1, 4)
+        self.conf = np.zeros(0, dtype=np.float32) if conf is None else np.asarray(conf, dtype=np.float32).reshape(-1)
+        self.cls = np.zeros(0, dtype=np.int32) if cls is None else np.asarray(cls).reshape(-1).astype(np.int32)
+
+    @classmethod
+    def from_result(cls, result):
+        """Build detections from an ultralytics result object"""
+        boxes = result.boxes
+        return cls(boxes.xyxy.cpu().numpy(), boxes.conf.cpu().numpy(), boxes.cls.cpu().numpy())
+
+    def subset(self, indices):
+        """Return a copy with only the boxes at the given indices or mask"""
+        return Detections(self.xyxy[indices], self.conf[indices], self.cls[indices])
+
+    def shifted(self, dx, dy):
+        """Return a copy with every box moved by (dx, dy) pixels"""
+        if dx == 0 and dy == 0:
+            return self
+        offset = np.array([dx, dy, dx, dy], dtype=np.float32)
+        return Detections(self.xyxy + offset, self.conf, self.cls)
+
+    def __len__(self):
+        return len(self.cls)
+
+    def __iter__(self):
+        """Yield (class id, confidence, (x1, y1, x2, y2)) for every box"""
+        for cls_id, conf, box in zip(self.cls.tolist(), self.conf.tolist(), self.xyxy.astype(int).tolist()):
+            yield cls_id, conf, tuple(box)
+
+
+def box_iou(boxes_a, boxes_b):
+    """
+    Pairwise intersection over union between two sets of boxes
+
+    Args:
+        boxes_a (array): (N, 4) boxes as x1, y1, x2, y2
+        boxes_b (array): (M, 4) boxes as x1, y1, x2, y2
+
+    Returns:
+        numpy.ndarray: (N, M) IoU matrix
+    """
+    a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 1, 4)
+    b = np.asarray(boxes_b, dtype=np.float32).reshape(1, -1, 4)
+
+    inter_w = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    inter_h = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = inter_w * inter_h
+
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    return inter / np.maximum(area_a + area_b - inter, 1e-9)
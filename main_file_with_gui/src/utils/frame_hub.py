@@ -0,0 +1,150 @@
+import threading
+import time
+
+import cv2
+
+
+class FrameHub:
+    def __init__(self, max_clients=8, jpeg_quality=80):
+        """
+        Broadcast encoded frames to any number of MJPEG clients
+
+        The encoder publishes each frame once with a sequence number. Clients
+        wait on a condition for a newer sequence, so they never re-send a frame
+        they already have and a slow client simply skips to the newest one.
+
+        Args:
+            max_clients (int): Concurrent stream clients allowed
+            jpeg_quality (int): Quality of the published full-size JPEGs
+        """
+        self.max_clients = max_clients
+        self.jpeg_quality = jpeg_quality
+
+        self.sequence = 0
+        self.jpeg = None
+        self.frame = None
+        self.overlay = None
+        self.last_publish_time = 0
+
+        self.clients = 0
+        self.rejected = 0
+
+        self._cond = threading.Condition()
+        self._clients_lock = threading.Lock()
+        self._variants_lock = threading.Lock()
+        self._variants = {}
+
+    def publish(self, jpeg_bytes, frame=None, overlay=None):
+        """
+        Make a new frame available to every client
+
+        Args:
+            jpeg_bytes (bytes): Full-size encoded frame
+            frame (numpy.ndarray): The frame it was encoded from, needed for preview streams
+            overlay (dict): Boxes for browsers to draw over an undrawn frame, or None
+        """
+        with self._cond:
+            self.jpeg = jpeg_bytes
+            self.frame = frame
+            self.overlay = overlay
+            self.sequence += 1
+            self.last_publish_time = time.time()
+            self._cond.notify_all()
+        # Variants of older frames are never served again; dropping them keeps
+        # the cache to the widths and qualities asked for since the last frame
+        with self._variants_lock:
+            self._variants.clear()
+
+    def wait_for_frame(self, known_sequence, timeout=None):
+        """
+        Block until a frame newer than known_sequence is published
+
+        Args:
+            known_sequence (int): Sequence number the client already sent
+            timeout (float): Seconds to wait, or None to wait forever
+
+        Returns:
+            int: Newest sequence number, equal to known_sequence if the wait timed out
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self.sequence != known_sequence, timeout)
+            return self.sequence
+
+    def get_overlay(self):
+        """
+        Get the overlay published with the newest frame
+
+        Returns:
+            tuple: (sequence, overlay dict or None)
+        """
+        with self._cond:
+            return self.sequence, self.overlay
+
+    def get_jpeg(self, width=None, quality=None):
+        """
+        Get the newest frame, downscaled and re-encoded if asked to
+
+        Variants are encoded once per frame and shared by every client that
+        asks for the same width and quality, then dropped when the next frame
+        is published.
+
+        Args:
+            width (int): Preview width in pixels, or None for full size
+            quality (int): JPEG quality of the variant, or None for the published quality
+
+        Returns:
+            bytes: Encoded frame, or None if nothing has been published yet
+        """
+        with self._cond:
+            sequence, jpeg, frame = self.sequence, self.jpeg, self.frame
+
+        if frame is None or (width is None and quality is None):
+            return jpeg
+        if width is not None and width >= frame.shape[1] and quality in (None, self.jpeg_quality):
+            return jpeg
+
+        key = (width, quality)
+        with self._variants_lock:
+            cached = self._variants.get(key)
+            if cached is not None and cached[0] == sequence:
+                return cached[1]
+
+            if width is not None and width < frame.shape[1]:
+                height = max(1, int(frame.shape[0] * width / frame.shape[1]))
+                frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+            params = [int(cv2.IMWRITE_JPEG_QUALITY), quality if quality is not None else self.jpeg_quality]
+            ok, buffer = cv2.imencode('.jpg', frame, params)
+            if not ok:
+                return jpeg
+            encoded = buffer.tobytes()
+            self._variants[key] = (sequence, encoded)
+            return encoded
+
+    def acquire_client(self):
+        """
+        Reserve a stream slot
+
+        Returns:
+            bool: False if max_clients streams are already open
+        """
+        with self._clients_lock:
+            if self.clients >= self.max_clients:
+                self.rejected += 1
+                return False
+            self.clients += 1
+            return True
+
+    def release_client(self):
+        """Free a slot reserved by acquire_client"""
+        with self._clients_lock:
+            self.clients = max(0, self.clients - 1)
+
+    def stats(self):
+        """Get frame and client counters"""
+        return {
+            "sequence": self.sequence,
+            "clients": self.clients,
+            "max_clients": self.max_clients,
+            "rejected": self.rejected,
+            "preview_variants": len(self._variants)
+        }
@@ -0,0 +1,409 @@
+import glob
+import json
+import os
+import shutil
+
+import cv2
+import numpy as np
+
+from src.utils.detections import Detections, box_iou
+from src.utils.metrics import DISABLED
+
+BACKENDS = ("pytorch", "torchscript", "onnx", "openvino")
+
+# Extension of the cached export for each backend, empty for directory exports
+EXPORT_SUFFIXES = {
+    "torchscript": ".torchscript",
+    "onnx": ".onnx",
+    "openvino": ""
+}
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+def find_calibration_images(directory, limit=64):
+    """
+    Collect images used to calibrate int8 exports and check parity
+
+    Args:
+        directory (str): Folder searched recursively for images
+        limit (int): Maximum number of images to return
+
+    Returns:
+        list: Image paths in sorted order
+    """
+    paths = [path for path in glob.glob(os.path.join(directory, "**", "*"), recursive=True)
+             if path.lower().endswith(IMAGE_EXTENSIONS)]
+    return sorted(paths)[:limit]
+
+
+def letterbox_tensor(image, imgsz):
+    """Letterbox a BGR image into a normalised 1x3xHxW float32 RGB tensor"""
+    h, w = image.shape[:2]
+    scale = min(imgsz / h, imgsz / w)
+    new_w, new_h = int(round(w * scale)), int(round(h * scale))
+
+    canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+    top, left = (imgsz - new_h) // 2, (imgsz - new_w) // 2
+    canvas[top:top + new_h, left:left + new_w] = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+
+    tensor = canvas[:, :, ::-1].transpose(2, 0, 1).astype(np.float32) / 255.0
+    return np.ascontiguousarray(tensor[None])
+
+
+def cached_export_path(model_path, backend, int8=False, imgsz=640, export_dir="models/exported"):
+    """Path the export of model_path for backend is cached under"""
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+    name = f"{stem}_{imgsz}{'_int8' if int8 else ''}"
+    if backend == "openvino":
+        return os.path.join(export_dir, f"{name}_openvino_model")
+    return os.path.join(export_dir, name + EXPORT_SUFFIXES[backend])
+
+
+def _is_fresh(export_path, model_path):
+    """True if an export exists and is newer than the weights it came from"""
+    return os.path.exists(export_path) and os.path.getmtime(export_path) >= os.path.getmtime(model_path)
+
+
+def _parity_key(model_path, export_path, images, confidence):
+    """What a cached parity report depends on: both models and the images it was measured on"""
+    return {
+        "model_mtime": os.path.getmtime(model_path),
+        "export_mtime": os.path.getmtime(export_path),
+        "images": [[os.path.abspath(path), os.path.getmtime(path)] for path in images],
+        "confidence": confidence
+    }
+
+
+def cached_parity(model_path, export_path, images, confidence=0.5):
+    """
+    Parity report saved by an earlier start, if nothing it depends on has changed
+
+    Args:
+        model_path (str): Path to the PyTorch weights
+        export_path (str): Path to the exported model
+        images (list): Paths of the images the check would run on
+        confidence (float): Confidence threshold of the check
+
+    Returns:
+        dict: The report from check_parity, or None if there is no valid cached one
+    """
+    report_file = export_path + ".parity.json"
+    if not os.path.exists(report_file):
+        return None
+    try:
+        with open(report_file, 'r') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cached.get("key") != _parity_key(model_path, export_path, images, confidence):
+        return None
+    return cached["report"]
+
+
+def save_parity(model_path, export_path, images, confidence, report):
+    """Store a parity report next to the export, so later starts can skip the check"""
+    try:
+        with open(export_path + ".parity.json", 'w') as f:
+            json.dump({"key": _parity_key(model_path, export_path, images, confidence), "report": report}, f)
+    except OSError as e:
+        print(f"Could not cache the parity report: {e}")
+
+
+def _quantize_onnx(fp32_path, int8_path, images, imgsz):
+    """Statically quantise an ONNX export to int8 using calibration images"""
+    import onnx
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+
+    fp32_model = onnx.load(fp32_path)
+    input_name = fp32_model.graph.input[0].name
+
+    class ImageReader(CalibrationDataReader):
+        def __init__(self):
+            self._paths = iter(images)
+
+        def get_next(self):
+            for path in self._paths:
+                image = cv2.imread(path)
+                if image is not None:
+                    return {input_name: letterbox_tensor(image, imgsz)}
+            return None
+
+    quantize_static(fp32_path, int8_path, ImageReader(),
+                    quant_format=QuantFormat.QDQ,
+                    activation_type=QuantType.QUInt8,
+                    weight_type=QuantType.QInt8)
+
+    # ultralytics reads class names and stride from the model metadata
+    int8_model = onnx.load(int8_path)
+    del int8_model.metadata_props[:]
+    int8_model.metadata_props.extend(fp32_model.metadata_props)
+    onnx.save(int8_model, int8_path)
+
+
+def export_model(model_path, backend, int8=False, imgsz=640, export_dir="models/exported",
+                 calibration_dir="data", calibration_images=64):
+    """
+    Export the PyTorch weights for an optimised backend, reusing a cached export when possible
+
+    Args:
+        model_path (str): Path to the trained YOLOv8 .pt weights
+        backend (str): One of "torchscript", "onnx" or "openvino"
+        int8 (bool): Quantise the export to int8 using calibration images
+        imgsz (int): Input size the export is built for
+        export_dir (str): Folder exports are cached in
+        calibration_dir (str): Folder of images used for int8 calibration
+        calibration_images (int): Maximum number of calibration images
+
+    Returns:
+        str: Path to the exported model
+    """
+    from ultralytics import YOLO
+
+    if backend not in EXPORT_SUFFIXES:
+        raise ValueError(f"Unknown export backend '{backend}', expected one of {list(EXPORT_SUFFIXES)}")
+
+    target = cached_export_path(model_path, backend, int8, imgsz, export_dir)
+    if _is_fresh(target, model_path):
+        return target
+
+    os.makedirs(export_dir, exist_ok=True)
+    images = find_calibration_images(calibration_dir, calibration_images) if int8 else []
+    if int8 and not images:
+        raise ValueError(f"int8 export needs calibration images in {calibration_dir}")
+
+    if int8 and backend == "onnx":
+        # ultralytics has no int8 ONNX export, so quantise the fp32 export ourselves
+        fp32_path = export_model(model_path, "onnx", False, imgsz, export_dir)
+        print(f"Quantizing {fp32_path} to int8 with {len(images)} calibration images...")
+        _quantize_onnx(fp32_path, target, images, imgsz)
+        return target
+
+    print(f"Exporting {model_path} to {backend}{' (int8)' if int8 else ''}...")
+    model = YOLO(model_path)
+    kwargs = {"format": backend, "imgsz": imgsz}
+    if int8:
+        kwargs["int8"] = True
+        kwargs["data"] = _write_calibration_yaml(images, model.names, export_dir)
+    exported = model.export(**kwargs)
+
+    if os.path.exists(target):
+        shutil.rmtree(target) if os.path.isdir(target) else os.remove(target)
+    shutil.move(str(exported), target)
+    return target
+
+
+def _write_calibration_yaml(images, names, export_dir):
+    """Write an ultralytics dataset file listing the calibration images"""
+    list_file = os.path.abspath(os.path.join(export_dir, "calibration.txt"))
+    with open(list_file, 'w') as f:
+        f.write("\n".join(os.path.abspath(path) for path in images))
+
+    yaml_file = os.path.join(export_dir, "calibration.yaml")
+    with open(yaml_file, 'w') as f:
+        f.write(f"train: {list_file}\nval: {list_file}\nnames:\n")
+        for class_id, class_name in sorted(names.items()):
+            f.write(f"  {class_id}: \"{class_name}\"\n")
+    return yaml_file
+
+
+def load_model(model_path, backend="pytorch", int8=False, imgsz=640, export_dir="models/exported",
+               calibration_dir="data", calibration_images=64):
+    """
+    Load the detection model for the configured backend
+
+    Args:
+        model_path (str): Path to the trained YOLOv8 .pt weights
+        backend (str): One of BACKENDS
+        int8 (bool): Use an int8-quantised export
+        imgsz (int): Input size the export is built for
+        export_dir (str): Folder exports are cached in
+        calibration_dir (str): Folder of images used for int8 calibration
+        calibration_images (int): Maximum number of calibration images
+
+    Returns:
+        YOLO: Model that can be called like the PyTorch one
+    """
+    from ultralytics import YOLO
+
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}', expected one of {list(BACKENDS)}")
+
+    if backend == "pytorch":
+        return YOLO(model_path)
+
+    exported = export_model(model_path, backend, int8, imgsz, export_dir, calibration_dir, calibration_images)
+    print(f"Loading {backend} model from {exported}")
+    return YOLO(exported, task="detect")
+
+
+def run_detection(model, frames, confidence, preprocessor=None, metrics=DISABLED):
+    """
+    Run the model on a batch of frames
+
+    Args:
+        model (YOLO): Loaded model
+        frames (list): BGR frames
+        confidence (float): Confidence threshold for detections
+        preprocessor (LetterboxPreprocessor): Reusable letterbox buffers, or None to let ultralytics preprocess
+        metrics (Metrics): Records the preprocess and inference stage times
+
+    Returns:
+        list: One Detections per frame, in frame pixel coordinates
+    """
+    if preprocessor is None:
+        with metrics.timer("inference"):
+            results = model(frames, conf=confidence)
+        return [Detections.from_result(result) for result in results]
+
+    with metrics.timer("preprocess"):
+        tensor, letterboxes = preprocessor(frames)
+    with metrics.timer("inference"):
+        results = model(tensor, conf=confidence)
+
+    detections = []
+    for frame, result, letterbox in zip(frames, results, letterboxes):
+        raw = Detections.from_result(result)
+        h, w = frame.shape[:2]
+        xyxy = letterbox.to_frame(raw.xyxy)
+        xyxy[:, [0, 2]] = xyxy[:, [0, 2]].clip(0, w)
+        xyxy[:, [1, 3]] = xyxy[:, [1, 3]].clip(0, h)
+        detections.append(Detections(xyxy, raw.conf, raw.cls))
+    return detections
+
+
+def compare_detections(reference, candidate, iou_threshold=0.5):
+    """
+    Greedily match candidate boxes to reference boxes of the same class
+
+    Args:
+        reference (Detections): Detections from the reference model
+        candidate (Detections): Detections from the model under test
+        iou_threshold (float): Minimum IoU for two boxes to match
+
+    Returns:
+        list: (reference index, candidate index, IoU) for every match
+    """
+    if len(reference) == 0 or len(candidate) == 0:
+        return []
+
+    iou = box_iou(reference.xyxy, candidate.xyxy)
+    iou[reference.cls[:, None] != candidate.cls[None, :]] = 0
+
+    matches = []
+    while True:
+        ref_idx, cand_idx = np.unravel_index(np.argmax(iou), iou.shape)
+        best = iou[ref_idx, cand_idx]
+        if best < iou_threshold:
+            break
+        matches.append((int(ref_idx), int(cand_idx), float(best)))
+        iou[ref_idx, :] = 0
+        iou[:, cand_idx] = 0
+    return matches
+
+
+def check_parity(reference_model, candidate_model, images, confidence=0.5, iou_threshold=0.5):
+    """
+    Compare the detections of an optimised model with the PyTorch model
+
+    Args:
+        reference_model (YOLO): PyTorch model
+        candidate_model (YOLO): Exported model
+        images (list): Paths of images to compare on
+        confidence (float): Confidence threshold for both models
+        iou_threshold (float): Minimum IoU for two boxes to match
+
+    Returns:
+        dict: Box counts, match rates and confidence drift; recall is None if the
+            PyTorch model found no boxes, since then nothing was compared
+    """
+    reference_boxes = candidate_boxes = matched = 0
+    ious = []
+    conf_diffs = []
+
+    for path in images:
+        image = cv2.imread(path)
+        if image is None:
+            continue
+        reference = Detections.from_result(reference_model(image, conf=confidence, verbose=False)[0])
+        candidate = Detections.from_result(candidate_model(image, conf=confidence, verbose=False)[0])
+
+        matches = compare_detections(reference, candidate, iou_threshold)
+        reference_boxes += len(reference)
+        candidate_boxes += len(candidate)
+        matched += len(matches)
+        for ref_idx, cand_idx, iou in matches:
+            ious.append(iou)
+            conf_diffs.append(abs(float(reference.conf[ref_idx]) - float(candidate.conf[cand_idx])))
+
+    return {
+        "images": len(images),
+        "reference_boxes": reference_boxes,
+        "candidate_boxes": candidate_boxes,
+        "matched": matched,
+        "recall": matched / reference_boxes if reference_boxes else None,
+        "precision": matched / candidate_boxes if candidate_boxes else 1.0,
+        "mean_iou": float(np.mean(ious)) if ious else 0.0,
+        "max_conf_diff": float(np.max(conf_diffs)) if conf_diffs else 0.0
+    }
+
+
+def load_configured_model(model_path, inference_settings, confidence=0.5):
+    """
+    Load the model for the configured backend, falling back to PyTorch if it
+    cannot be exported or its detections drift too far from the original
+
+    Args:
+        model_path (str): Path to the trained YOLOv8 .pt weights
+        inference_settings (dict): The "inference" section of settings.json
+        confidence (float): Confidence threshold used for the parity check
+
+    Returns:
+        YOLO: Loaded model
+    """
+    from ultralytics import YOLO
+
+    backend = inference_settings.get("backend", "pytorch")
+    if backend == "pytorch":
+        return YOLO(model_path)
+
+    try:
+        model = load_model(model_path, backend,
+                           int8=inference_settings.get("int8", False),
+                           imgsz=inference_settings.get("imgsz", 640),
+                           export_dir=inference_settings.get("export_dir", "models/exported"),
+                           calibration_dir=inference_settings.get("calibration_dir", "data"),
+                           calibration_images=inference_settings.get("calibration_images", 64))
+    except Exception as e:
+        print(f"Failed to load {backend} backend, falling back to PyTorch: {e}")
+        return YOLO(model_path)
+
+    if inference_settings.get("parity_check"):
+        calibration_dir = inference_settings.get("calibration_dir", "data")
+        images = find_calibration_images(calibration_dir, inference_settings.get("calibration_images", 64))
+        if images:
+            # The check loads a second model and runs every image through both,
+            # so its result is kept until the weights, export or images change
+            export_path = cached_export_path(model_path, backend, inference_settings.get("int8", False),
+                                             inference_settings.get("imgsz", 640),
+                                             inference_settings.get("export_dir", "models/exported"))
+            report = cached_parity(model_path, export_path, images, confidence)
+            if report is None:
+                report = check_parity(YOLO(model_path), model, images, confidence)
+                save_parity(model_path, export_path, images, confidence, report)
+                print(f"Parity of {backend} backend against PyTorch: {report}")
+            else:
+                print(f"Parity of {backend} backend against PyTorch (cached): {report}")
+            if report["reference_boxes"] == 0:
+                print(f"PyTorch found no items in the images in {calibration_dir}, so the {backend} backend "
+                      f"could not be checked; point calibration_dir at pictures of the tray. "
+                      f"Falling back to PyTorch")
+                return YOLO(model_path)
+            parity = min(report["recall"], report["precision"])
+            if parity < inference_settings.get("min_parity", 0.9):
+                print(f"{backend} backend parity {parity:.2f} is below the minimum, falling back to PyTorch")
+                return YOLO(model_path)
+        else:
+            print("No calibration images found, skipping parity check")
+
+    return model
@@ -0,0 +1,86 @@
+class InferenceScheduler:
+    def __init__(self, interval=1, time_budget=None, target_latency=None, max_interval=10, smoothing=0.2):
+        """
+        Decide which frames get a full model pass and which reuse the last detections
+
+        Args:
+            interval (int): Run inference on every Nth frame
+            time_budget (float): Minimum seconds between inferences, or None to only use the frame interval
+            target_latency (float): Inference latency in seconds above which the interval is raised, or None to keep it fixed
+            max_interval (int): Upper limit for the adaptive interval
+            smoothing (float): Weight of the newest sample in the latency moving average
+        """
+        self.base_interval = max(1, int(interval))
+        self.interval = self.base_interval
+        self.time_budget = time_budget
+        self.target_latency = target_latency
+        self.max_interval = max(self.base_interval, int(max_interval))
+        self.smoothing = smoothing
+
+        self.avg_latency = 0.0
+        self.scheduled = 0
+        self.skipped = 0
+        self._samples = 0
+        self._frames_since_inference = 0
+        self._last_inference_time = None
+
+    def should_run(self, now):
+        """
+        Check whether the current frame is due for the model
+
+        The interval only restarts once record reports that the model ran, so
+        a due frame that the motion gate or detection cache serves instead
+        does not push the next inference back.
+
+        Args:
+            now (float): Timestamp of the current frame
+
+        Returns:
+            bool: True if inference should run on this frame
+        """
+        self._frames_since_inference += 1
+
+        due = self._last_inference_time is None or self._frames_since_inference >= self.interval
+        if not due and self.time_budget is not None:
+            due = now - self._last_inference_time >= self.time_budget
+
+        if not due:
+            self.skipped += 1
+        return due
+
+    def record(self, latency, now):
+        """
+        Record a model pass, restarting the interval and adapting it to the latency
+
+        Args:
+            latency (float): Inference time in seconds
+            now (float): Timestamp of the frame the model ran on
+        """
+        self._frames_since_inference = 0
+        self._last_inference_time = now
+        self.scheduled += 1
+
+        self._samples += 1
+        if self._samples == 1:
+            self.avg_latency = latency
+        else:
+            self.avg_latency += self.smoothing * (latency - self.avg_latency)
+
+        if self.target_latency is None:
+            return
+
+        # Back off while the model is slower than the target, and only step
+        # back down once it is comfortably faster to avoid oscillating
+        if self.avg_latency > self.target_latency and self.interval < self.max_interval:
+            self.interval += 1
+        elif self.avg_latency < self.target_latency * 0.5 and self.interval > self.base_interval:
+            self.interval -= 1
+
+    def stats(self):
+        """Get the current cadence and frame counters"""
+        return {
+            "interval": self.interval,
+            "avg_latency_ms": round(self.avg_latency * 1000, 2),
+            "scheduled": self.scheduled,
+            "skipped": self.skipped
+        }
@@ -1,96 +1,248 @@
 import time
-from collections import defaultdict
+from collections.abc import MutableMapping
+
+import numpy as np
+
+FIELDS = ("count", "last_seen", "continuous_time", "last_added_time")
+
+
+class ItemsView(MutableMapping):
+    def __init__(self, tracker):
+        """
+        Dictionary-style view of an ItemTracker, keyed by class name
+
+        Each value is a fresh {"count", "last_seen", "continuous_time",
+        "last_added_time"} dict, so existing code that reads or replaces
+        whole entries keeps working.
+
+        Args:
+            tracker (ItemTracker): Tracker whose arrays back this view
+        """
+        self._tracker = tracker
+
+    def __getitem__(self, cls_name):
+        cls_id = self._tracker.class_ids.get(cls_name)
+        if cls_id is None or not self._tracker.seen[cls_id]:
+            raise KeyError(cls_name)
+        return self._tracker.entry(cls_id)
+
+    def __setitem__(self, cls_name, info):
+        cls_id = self._tracker.class_id_for(cls_name)
+        self._tracker.set_entry(cls_id, info)
+
+    def __delitem__(self, cls_name):
+        cls_id = self._tracker.class_ids.get(cls_name)
+        if cls_id is None or not self._tracker.seen[cls_id]:
+            raise KeyError(cls_name)
+        self._tracker.reset_class(cls_id)
+
+    def __iter__(self):
+        names = self._tracker.class_names
+        for cls_id in np.flatnonzero(self._tracker.seen).tolist():
+            yield names[cls_id]
+
+    def __len__(self):
+        return int(self._tracker.seen.sum())
+
+    def clear(self):
+        self._tracker.clear_items()
+
+    def copy(self):
+        """Snapshot of all entries as a plain dictionary"""
+        return {cls_name: self[cls_name] for cls_name in self}
+
 
 class ItemTracker:
-    def __init__(self, time_threshold=5.0):
+    def __init__(self, class_names=None, time_threshold=5.0, clock=time.time):
         """
         Track items detected by the system
-        
+
+        Per-class state lives in NumPy arrays indexed by class id, so each
+        update only touches the classes that are visible or were visible in
+        the previous frame.
+
         Args:
+            class_names (dict): Mapping of class id to class name, e.g. model.names
             time_threshold (float): Time in seconds to increment quantity counter
+            clock (callable): Returns the current time for updates that are not given a frame timestamp
         """
-        # Dictionary to store item counts and their last seen timestamps
-        self.items = defaultdict(lambda: {
-            "count": 0, 
-            "last_seen": 0, 
-            "continuous_time": 0,
-            "last_added_time": 0
-        })
+        self.class_names = dict(class_names or {})
+        self.clock = clock
+        self.class_ids = {name: cls_id for cls_id, name in self.class_names.items()}
         self.time_threshold = time_threshold
-    
-    def update_items(self, detected_items):
+
+        size = max(self.class_names) + 1 if self.class_names else 0
+        self.count = np.zeros(size, dtype=np.int64)
+        self.last_seen = np.zeros(size, dtype=np.float64)
+        self.continuous_time = np.zeros(size, dtype=np.float64)
+        self.last_added_time = np.zeros(size, dtype=np.float64)
+        self.seen = np.zeros(size, dtype=bool)
+
+        # Class ids that were visible in the last update
+        self._active = np.zeros(0, dtype=np.int64)
+
+        # Bumped whenever any count changes, so readers can skip unchanged bills
+        self.version = 0
+
+        self.items = ItemsView(self)
+
+    def class_id_for(self, cls_name):
+        """Get the id of a class name, registering it if the model does not know it"""
+        cls_id = self.class_ids.get(cls_name)
+        if cls_id is None:
+            cls_id = len(self.count)
+            self.class_names[cls_id] = cls_name
+            self.class_ids[cls_name] = cls_id
+            for field in FIELDS + ("seen",):
+                array = getattr(self, field)
+                setattr(self, field, np.append(array, np.zeros(1, dtype=array.dtype)))
+        return cls_id
+
+    def entry(self, cls_id):
+        """Get the state of one class as a plain dictionary"""
+        return {
+            "count": int(self.count[cls_id]),
+            "last_seen": float(self.last_seen[cls_id]),
+            "continuous_time": float(self.continuous_time[cls_id]),
+            "last_added_time": float(self.last_added_time[cls_id])
+        }
+
+    def set_entry(self, cls_id, info):
+        """Overwrite the state of one class from a dictionary"""
+        for field in FIELDS:
+            getattr(self, field)[cls_id] = info.get(field, 0)
+        self.seen[cls_id] = True
+        self._refresh_active()
+        self.version += 1
+
+    def reset_class(self, cls_id):
+        """Forget everything about one class"""
+        for field in FIELDS:
+            getattr(self, field)[cls_id] = 0
+        self.seen[cls_id] = False
+        self._refresh_active()
+        self.version += 1
+
+    def _refresh_active(self):
+        self._active = np.flatnonzero(self.last_seen > 0)
+
+    def update(self, class_ids, current_time=None):
+        """
+        Update timers and counts from the class ids detected in one frame
+
+        Args:
+            class_ids (array): Class ids detected in the current frame, duplicates allowed
+            current_time (float): Timestamp of the frame, defaults to the clock
+
+        Returns:
+            numpy.ndarray: Ids of the classes whose count was incremented
+        """
+        if current_time is None:
+            current_time = self.clock()
+
+        visible = np.unique(np.asarray(class_ids, dtype=np.int64))
+        self.seen[visible] = True
+        threshold = self.time_threshold
+
+        # Items that are currently visible
+        new = visible[self.last_seen[visible] == 0]
+        ongoing = visible[self.last_seen[visible] != 0]
+
+        self.last_seen[new] = current_time
+        self.continuous_time[new] = 0
+
+        self.continuous_time[ongoing] += current_time - self.last_seen[ongoing]
+        self.last_seen[ongoing] = current_time
+        cooldown_ok = ((self.last_added_time[ongoing] == 0) |
+                       (current_time - self.last_added_time[ongoing] >= threshold))
+        visible_added = ongoing[(self.continuous_time[ongoing] >= threshold) & cooldown_ok]
+        for cls_id in visible_added.tolist():
+            print(f"Adding {self.class_names[cls_id]} to bill - visible for {self.continuous_time[cls_id]:.2f} seconds")
+        self.count[visible_added] += 1
+        self.continuous_time[visible_added] = 0
+        self.last_added_time[visible_added] = current_time
+
+        # Items that were visible in the last update but have just disappeared
+        gone = np.setdiff1d(self._active, visible, assume_unique=True)
+        gone = gone[self.last_seen[gone] > 0]
+        total_visible_time = self.continuous_time[gone] + (current_time - self.last_seen[gone])
+        cooldown_ok = ((self.last_added_time[gone] == 0) |
+                       (current_time - self.last_added_time[gone] >= threshold))
+        added_mask = ((total_visible_time > 0) & (total_visible_time < threshold) &
+                      (self.continuous_time[gone] > 0) & cooldown_ok)
+        gone_added = gone[added_mask]
+        for cls_id, visible_time in zip(gone_added.tolist(), total_visible_time[added_mask].tolist()):
+            print(f"Adding {self.class_names[cls_id]} to bill - disappeared after {visible_time:.2f} seconds")
+        self.count[gone_added] += 1
+        self.last_added_time[gone_added] = current_time
+
+        self.last_seen[gone] = 0
+        self.continuous_time[gone] = 0
+
+        self._active = visible
+        added = np.concatenate([visible_added, gone_added])
+        if len(added):
+            self.version += 1
+        return added
+
+    def add(self, class_ids, current_time=None):
+        """
+        Increment counts directly, e.g. once per confirmed object track
+
+        Args:
+            class_ids (array): Class id of every item to add, duplicates add several
+            current_time (float): Timestamp of the frame, defaults to the clock
+        """
+        if current_time is None:
+            current_time = self.clock()
+
+        class_ids = np.asarray(class_ids, dtype=np.int64)
+        for cls_id in class_ids.tolist():
+            print(f"Adding {self.class_names[cls_id]} to bill - new tracked item")
+        np.add.at(self.count, class_ids, 1)
+        self.last_added_time[class_ids] = current_time
+        self.seen[class_ids] = True
+        if len(class_ids):
+            self.version += 1
+
+    def update_items(self, detected_items, current_time=None):
         """
         Update item tracking and counts based on currently detected items
-        
+
         Args:
             detected_items (set): Set of class names detected in current frame
-            
+            current_time (float): Timestamp of the frame, defaults to the clock
+
         Returns:
-            dict: Updated items dictionary
+            ItemsView: Updated items
         """
-        current_time = time.time()
-        
-        # Update item tracking and counts
-        for cls_name in list(self.items.keys()) + list(detected_items):
-            # Initialize if not exists
-            if cls_name not in self.items:
-                self.items[cls_name] = {
-                    "count": 0, 
-                    "last_seen": 0, 
-                    "continuous_time": 0,
-                    "last_added_time": 0
-                }
-                
-            if cls_name in detected_items:
-                # Item is currently visible
-                if self.items[cls_name]["last_seen"] == 0:
-                    # First time seeing this item in this sequence
-                    self.items[cls_name]["last_seen"] = current_time
-                    self.items[cls_name]["continuous_time"] = 0
-                else:
-                    # Calculate continuous visibility time
-                    elapsed = current_time - self.items[cls_name]["last_seen"]
-                    self.items[cls_name]["continuous_time"] += elapsed
-                    self.items[cls_name]["last_seen"] = current_time
-                    
-                    # Check if the cooldown period has elapsed since last adding this item
-                    cooldown_elapsed = current_time - self.items[cls_name]["last_added_time"]
-                    
-                    # If continuously visible for more than threshold AND cooldown has elapsed, increment count
-                    if (self.items[cls_name]["continuous_time"] >= self.time_threshold and 
-                        (self.items[cls_name]["last_added_time"] == 0 or cooldown_elapsed >= self.time_threshold)):
-                        print(f"Adding {cls_name} to bill - visible for {self.items[cls_name]['continuous_time']:.2f} seconds")
-                        self.items[cls_name]["count"] += 1
-                        self.items[cls_name]["continuous_time"] = 0  # Reset timer after incrementing
-                        self.items[cls_name]["last_added_time"] = current_time  # Update last added time
-            else:
-                # Item is not visible in this frame
-                if self.items[cls_name]["last_seen"] > 0:
-                    # Item just disappeared
-                    elapsed = current_time - self.items[cls_name]["last_seen"]
-                    total_visible_time = self.items[cls_name]["continuous_time"] + elapsed
-                    
-                    # Check cooldown
-                    cooldown_elapsed = current_time - self.items[cls_name]["last_added_time"]
-                    
-                    # If visible for less than threshold but greater than 0 AND cooldown has elapsed, count as 1
-                    if (0 < total_visible_time < self.time_threshold and 
-                        self.items[cls_name]["continuous_time"] > 0 and
-                        (self.items[cls_name]["last_added_time"] == 0 or cooldown_elapsed >= self.time_threshold)):
-                        print(f"Adding {cls_name} to bill - disappeared after {total_visible_time:.2f} seconds")
-                        self.items[cls_name]["count"] += 1
-                        self.items[cls_name]["last_added_time"] = current_time  # Update last added time
-                    
-                    # Reset tracking for this item
-                    self.items[cls_name]["last_seen"] = 0
-                    self.items[cls_name]["continuous_time"] = 0
-                    
+        self.update([self.class_id_for(cls_name) for cls_name in detected_items], current_time)
         return self.items
-    
+
+    def load(self, items):
+        """Replace all tracked state with the entries of a {name: info} dictionary"""
+        self.clear_items()
+        for cls_name, info in dict(items).items():
+            self.set_entry(self.class_id_for(cls_name), info)
+
+    def billed(self):
+        """
+        Get the classes currently on the bill
+
+        Returns:
+            list: (class name, count) for every class with a count above zero
+        """
+        ids = np.flatnonzero(self.count > 0)
+        return [(self.class_names[cls_id], int(self.count[cls_id])) for cls_id in ids.tolist()]
+
     def clear_items(self):
         """Reset all tracked items"""
-        self.items.clear()
-        
+        for field in FIELDS:
+            getattr(self, field)[:] = 0
+        self.seen[:] = False
+        self._active = np.zeros(0, dtype=np.int64)
+        self.version += 1
+
     def get_items(self):
-        """Get the current items dictionary"""
-        return self.items
\ No newline at end of file
+        """Get the current items view"""
+        return self.items
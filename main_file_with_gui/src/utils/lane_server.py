@@ -0,0 +1,205 @@
+import json
+import os
+import threading
+import time
+
+import cv2
+
+from src.utils.inference_backend import run_detection
+from src.utils.metrics import DISABLED
+from src.utils.pipeline import StageStats
+from src.utils.preprocess import LetterboxPreprocessor
+from src.utils.video_source import VideoSource
+
+
+def load_lane_config(config_file):
+    """
+    Load the list of checkout lanes served by this process
+
+    Args:
+        config_file (str): Path to a JSON list of {"id": ..., "source": ...} entries
+
+    Returns:
+        list: Lane entries, empty if the file is missing or invalid
+    """
+    if not os.path.exists(config_file):
+        return []
+
+    try:
+        with open(config_file, 'r') as f:
+            lanes = json.load(f)
+    except Exception as e:
+        print(f"Error loading lanes from {config_file}: {e}")
+        return []
+
+    if not isinstance(lanes, list):
+        print(f"Error loading lanes from {config_file}: expected a list of lanes")
+        return []
+
+    return [lane for lane in lanes if "id" in lane and "source" in lane]
+
+
+class Lane:
+    def __init__(self, lane_id, source, billing_system, frame_hub, video_config=None, on_status=None):
+        """
+        One checkout lane: a video source with its own item tracking and bill
+
+        Recorded files and image folders are not dropped from: the next frame
+        is only read once the last one was taken, so every frame is counted at
+        the speed the model allows, timestamped by its position in the file.
+
+        Args:
+            lane_id (str): Identifier used in the /lane/<id>/ routes
+            source (int or str): Camera index, video file, stream URL or image folder
+            billing_system (ObjectBillingSystem): Per-lane tracking and billing state
+            frame_hub (FrameHub): Broadcasts this lane's encoded frames to its video feed clients
+            video_config (dict): Resolution, frame rate and reconnect settings, as in the "video" settings section
+            on_status (callable): Called with the source state whenever it changes
+        """
+        self.lane_id = str(lane_id)
+        self.source = source
+        self.billing_system = billing_system
+
+        self.frame_hub = frame_hub
+        self.video_source = VideoSource.from_config(source, video_config, clock=billing_system.clock,
+                                                    name=f"Lane {self.lane_id}", on_status=on_status)
+
+    @property
+    def capture_stats(self):
+        return self.video_source.capture_stats
+
+    def take_frame(self):
+        """Return the newest unprocessed (frame, timestamp) pair, or None"""
+        return self.video_source.read(timeout=0)
+
+    def publish(self, jpeg_bytes, frame):
+        """Make a freshly encoded frame available to this lane's video feed"""
+        self.frame_hub.publish(jpeg_bytes, frame, self.billing_system.overlay)
+
+
+class LaneServer:
+    def __init__(self, model, lanes, confidence=0.5, jpeg_quality=80, input_size=None, metrics=DISABLED):
+        """
+        Serve several checkout lanes from one process and one copy of the model
+
+        Args:
+            model (YOLO): Model shared by all lanes
+            lanes (list): Lane objects to serve
+            confidence (float): Confidence threshold for detections
+            jpeg_quality (int): JPEG quality of the per-lane video feeds
+            input_size (int): Letterbox batches into reusable buffers of this size, or None to let ultralytics preprocess
+            metrics (Metrics): Records batched preprocess and inference times
+        """
+        self.model = model
+        self.lanes = {lane.lane_id: lane for lane in lanes}
+        self.confidence = confidence
+        self.encode_params = [int(cv2.IMWRITE_JPEG_QUALITY), jpeg_quality]
+        self.preprocessor = LetterboxPreprocessor(input_size) if input_size else None
+        self.metrics = metrics
+
+        self.inference_stats = StageStats("inference")
+        self.batches = 0
+        self.batched_frames = 0
+
+        self._running = threading.Event()
+        self._threads = []
+
+    def start(self):
+        """Start one grab thread per lane and the shared inference thread"""
+        self._running.set()
+        for lane in self.lanes.values():
+            lane.video_source.start()
+        thread = threading.Thread(target=self._inference_loop, name="lane-inference")
+        thread.daemon = True
+        thread.start()
+        self._threads.append(thread)
+
+    def stop(self):
+        """Ask all lane threads to finish and wait for them"""
+        self._running.clear()
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+        self._threads = []
+        for lane in self.lanes.values():
+            lane.video_source.stop()
+
+    def _inference_loop(self):
+        while self._running.is_set():
+            pending = []
+            for lane in self.lanes.values():
+                item = lane.take_frame()
+                if item is not None:
+                    pending.append((lane, item[0], item[1]))
+
+            if not pending:
+                time.sleep(0.005)
+                continue
+
+            # Only lanes whose scheduler, motion gate and detection cache ask for
+            # a fresh pass go into the batch; the others reuse earlier detections
+            batch = []
+            for lane, frame, captured_at in pending:
+                system = lane.billing_system
+                if not system.needs_inference(frame, captured_at):
+                    continue
+                region, offset = system.roi.crop(frame)
+                cache_key = None
+                if system.detection_cache is not None:
+                    # Lanes showing a frame they have already seen skip the batch too
+                    cache_key, cached = system.detection_cache.lookup(region, captured_at)
+                    if cached is not None:
+                        system.set_detections(cached.shifted(*offset), None, frame.shape, captured_at)
+                        continue
+                batch.append((lane, frame, captured_at, region, offset, cache_key))
+
+            if batch:
+                start = time.time()
+                try:
+                    detections = run_detection(self.model, [region for _, _, _, region, _, _ in batch],
+                                               self.confidence, self.preprocessor, self.metrics)
+                except Exception as e:
+                    self.inference_stats.errors += 1
+                    print(f"Batched inference error: {e}")
+                    continue
+                latency = time.time() - start
+                for (lane, frame, captured_at, _, offset, cache_key), lane_detections in zip(batch, detections):
+                    if cache_key is not None:
+                        lane.billing_system.detection_cache.store(cache_key, lane_detections, captured_at)
+                    lane.billing_system.set_detections(lane_detections.shifted(*offset), latency, frame.shape,
+                                                       captured_at)
+                self.batches += 1
+                self.batched_frames += len(batch)
+                self.inference_stats.record(latency)
+
+            for lane, frame, captured_at in pending:
+                processed_frame = lane.billing_system.process_frame(
+                    frame, detections=lane.billing_system.last_detections, current_time=captured_at)
+                ok, buffer = cv2.imencode('.jpg', processed_frame, self.encode_params)
+                if ok:
+                    lane.publish(buffer.tobytes(), processed_frame)
+
+    def stats(self):
+        """
+        Get batching and per-lane capture counters
+
+        Returns:
+            dict: Aggregate and per-lane statistics
+        """
+        return {
+            "batches": self.batches,
+            "avg_batch_size": round(self.batched_frames / self.batches, 2) if self.batches else 0.0,
+            "inference": self.inference_stats.as_dict(),
+            "lanes": {
+                lane_id: {
+                    "source": str(lane.source),
+                    "capture": lane.capture_stats.as_dict(),
+                    "video": lane.video_source.stats(),
+                    "inference_scheduler": lane.billing_system.scheduler.stats(),
+                    "roi": lane.billing_system.roi.stats(),
+                    "detection_cache": (lane.billing_system.detection_cache.stats()
+                                        if lane.billing_system.detection_cache is not None else None),
+                    "stream": lane.frame_hub.stats()
+                }
+                for lane_id, lane in self.lanes.items()
+            }
+        }
@@ -0,0 +1,209 @@
+import bisect
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# Upper bounds in seconds of the stage latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+PREFIX = "billing"
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS, window=1024):
+        """
+        Cumulative bucket counts for Prometheus, plus the most recent samples
+        for percentiles
+
+        Args:
+            buckets (tuple): Sorted bucket upper bounds
+            window (int): Recent samples kept for percentiles
+        """
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.total += value
+            self.count += 1
+            self.recent.append(value)
+
+    def summary(self):
+        """Count, mean and rolling p50/p95/p99 in milliseconds"""
+        with self._lock:
+            recent = np.array(self.recent)
+            count, total = self.count, self.total
+        if not len(recent):
+            return {"count": count, "mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0}
+        p50, p95, p99 = np.percentile(recent * 1000, [50, 95, 99])
+        return {"count": count, "mean_ms": round(total / count * 1000, 3),
+                "p50_ms": round(float(p50), 3), "p95_ms": round(float(p95), 3), "p99_ms": round(float(p99), 3)}
+
+
+class _NullTimer:
+    """Timer handed out while metrics are disabled; does nothing"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_TIMER = _NullTimer()
+
+
+class _StageTimer:
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class Metrics:
+    def __init__(self, enabled=True, window=1024):
+        """
+        Stage timers, counters and gauges for /metrics and /api/stats
+
+        Hot paths call timer() and observe(). While disabled those
+        return straight away without reading the clock. Queue depths and other
+        values that already exist elsewhere are read by collectors only when
+        the metrics are scraped.
+
+        Args:
+            enabled (bool): Record anything at all
+            window (int): Recent samples per stage kept for percentiles
+        """
+        self.enabled = enabled
+        self.window = window
+        self.started = time.time()
+
+        self.stages = {}
+        self.gauges = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _histogram(self, stage):
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self.stages.setdefault(stage, Histogram(window=self.window))
+        return histogram
+
+    def timer(self, stage):
+        """
+        Time a block of code as one sample of a stage
+
+        Args:
+            stage (str): Stage name, e.g. "inference"
+
+        Returns:
+            Context manager that records the elapsed time on exit
+        """
+        if not self.enabled:
+            return NULL_TIMER
+        return _StageTimer(self._histogram(stage))
+
+    def observe(self, stage, seconds):
+        """Record an already measured stage latency"""
+        if self.enabled:
+            self._histogram(stage).observe(seconds)
+
+    def set_gauge(self, gauge, value):
+        """Set a value that is reported as is, e.g. model load time"""
+        self.gauges[gauge] = value
+
+    def register_collector(self, collect):
+        """
+        Add a callable that is asked for values at scrape time
+
+        Args:
+            collect (callable): Returns (name, kind, labels, value) tuples, kind being "gauge" or "counter"
+        """
+        self._collectors.append(collect)
+
+    def _collected(self):
+        samples = []
+        for collect in self._collectors:
+            try:
+                samples.extend(collect())
+            except Exception as e:
+                print(f"Error collecting metrics: {e}")
+        return samples
+
+    def snapshot(self):
+        """
+        All metrics as a JSON-ready dictionary
+
+        Returns:
+            dict: Stage latency summaries, gauges and collected values
+        """
+        collected = {}
+        for name, kind, labels, value in self._collected():
+            key = name + "".join(f"[{labels[label]}]" for label in sorted(labels))
+            collected[key] = value
+        return {
+            "enabled": self.enabled,
+            "uptime_seconds": round(time.time() - self.started, 1),
+            "stages": {stage: histogram.summary() for stage, histogram in sorted(self.stages.items())},
+            "gauges": dict(self.gauges),
+            "collected": collected
+        }
+
+    def prometheus(self):
+        """
+        All metrics in the Prometheus text exposition format
+
+        Returns:
+            str: Text for a /metrics endpoint
+        """
+        lines = []
+
+        name = f"{PREFIX}_stage_seconds"
+        lines.append(f"# HELP {name} Time spent per frame in each pipeline stage")
+        lines.append(f"# TYPE {name} histogram")
+        for stage, histogram in sorted(self.stages.items()):
+            with histogram._lock:
+                counts = list(histogram.counts)
+                total, count = histogram.total, histogram.count
+            cumulative = 0
+            for bound, bucket_count in zip(histogram.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {count}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {total}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {count}')
+
+        # Collectors report per lane or per source, so samples of one metric
+        # arrive interleaved with others; each family has to be written as one block
+        families = {}
+        for gauge, value in sorted(self.gauges.items()):
+            families.setdefault(f"{PREFIX}_{gauge}", ("gauge", []))[1].append(({}, value))
+        for metric, kind, labels, value in self._collected():
+            full_name = f"{PREFIX}_{metric}_total" if kind == "counter" else f"{PREFIX}_{metric}"
+            families.setdefault(full_name, (kind, []))[1].append((labels, value))
+
+        for full_name, (kind, samples) in families.items():
+            lines.append(f"# TYPE {full_name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{label}="{labels[label]}"' for label in sorted(labels))
+                lines.append(f"{full_name}{{{label_text}}} {value}" if label_text else f"{full_name} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+# Shared by anything that is not given a Metrics instance
+DISABLED = Metrics(enabled=False)
@@ -0,0 +1,152 @@
+import threading
+import time
+
+import numpy as np
+
+from src.utils.inference_backend import run_detection
+from src.utils.metrics import DISABLED
+from src.utils.preprocess import LetterboxPreprocessor
+
+LOADING = "loading"
+WARMING_UP = "warming_up"
+STARTING = "starting"
+READY = "ready"
+FAILED = "failed"
+
+
+def warm_up(model, runs=2, frame_size=(640, 480), input_size=None, confidence=0.5, batch_size=1):
+    """
+    Run the model on blank frames so the first real frame is not the slow one
+
+    The first passes fuse layers, pick kernels and allocate buffers, which
+    takes many times longer than a normal inference.
+
+    Args:
+        model (YOLO): Loaded model
+        runs (int): Number of inference passes
+        frame_size (tuple): (width, height) of the blank frames, ideally the camera resolution
+        input_size (int): Letterbox size used for real frames, or None if ultralytics preprocesses
+        confidence (float): Confidence threshold used for real frames
+        batch_size (int): Frames per pass, e.g. the number of lanes sharing the model
+
+    Returns:
+        list: Seconds each pass took
+    """
+    width, height = frame_size
+    frames = [np.full((height, width, 3), 114, dtype=np.uint8)] * batch_size
+    preprocessor = LetterboxPreprocessor(input_size) if input_size else None
+
+    timings = []
+    for _ in range(runs):
+        start = time.time()
+        run_detection(model, frames, confidence, preprocessor)
+        timings.append(time.time() - start)
+    return timings
+
+
+class ModelLoader:
+    def __init__(self, load, warmup_runs=2, warmup_size=(640, 480), input_size=None, confidence=0.5,
+                 metrics=DISABLED):
+        """
+        Load and warm up the detection model on a background thread, so the web
+        server can answer requests while the weights are still loading
+
+        Args:
+            load (callable): Loads and returns the model
+            warmup_runs (int): Inference passes on blank frames once the model is loaded
+            warmup_size (tuple): (width, height) of the warm-up frames
+            input_size (int): Letterbox size used for real frames, or None if ultralytics preprocesses
+            confidence (float): Confidence threshold used for real frames
+            metrics (Metrics): Receives the load and warm-up times as gauges
+        """
+        self.load = load
+        self.warmup_runs = warmup_runs
+        self.warmup_size = tuple(warmup_size)
+        self.input_size = input_size
+        self.confidence = confidence
+        self.metrics = metrics
+
+        self.state = LOADING
+        self.error = None
+        self.model = None
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self.first_inference_seconds = None
+        self._started_at = None
+        self._ready_at = None
+        self._done = threading.Event()
+        self._thread = None
+
+    def start(self, on_ready=None):
+        """
+        Start loading in the background
+
+        Args:
+            on_ready (callable): Called with the warmed-up model on the loader thread
+                before the loader reports ready, e.g. to start the camera
+        """
+        self._started_at = time.time()
+        self._thread = threading.Thread(target=self._run, args=(on_ready,), name="model-loader", daemon=True)
+        self._thread.start()
+
+    def _run(self, on_ready):
+        try:
+            start = time.time()
+            model = self.load()
+            self.load_seconds = time.time() - start
+            self.metrics.set_gauge("model_load_seconds", round(self.load_seconds, 3))
+            print(f"Model loaded in {self.load_seconds:.2f}s")
+
+            if self.warmup_runs > 0:
+                self.state = WARMING_UP
+                timings = warm_up(model, self.warmup_runs, self.warmup_size, self.input_size, self.confidence)
+                self.warmup_seconds = sum(timings)
+                self.first_inference_seconds = timings[0]
+                self.metrics.set_gauge("model_warmup_seconds", round(self.warmup_seconds, 3))
+                print(f"Model warmed up in {self.warmup_seconds:.2f}s "
+                      f"(first pass {timings[0] * 1000:.0f} ms, last {timings[-1] * 1000:.0f} ms)")
+
+            self.model = model
+            if on_ready is not None:
+                self.state = STARTING
+                on_ready(model)
+            self.state = READY
+            self._ready_at = time.time()
+        except Exception as e:
+            print(f"Error loading the model: {e}")
+            self.error = str(e)
+            self.state = FAILED
+        finally:
+            self._done.set()
+
+    @property
+    def ready(self):
+        """True once the model is loaded, warmed up and handed to on_ready"""
+        return self.state == READY
+
+    def wait(self, timeout=None):
+        """
+        Wait for loading to finish
+
+        Args:
+            timeout (float): Seconds to wait, or None to wait until it is done
+
+        Returns:
+            YOLO: The model, or None if it failed or is not loaded yet
+        """
+        self._done.wait(timeout)
+        return self.model if self.ready else None
+
+    def status(self):
+        """Get the loading state and timings for the health endpoint"""
+        now = time.time()
+        return {
+            "status": self.state,
+            "error": self.error,
+            "load_seconds": round(self.load_seconds, 3) if self.load_seconds is not None else None,
+            "warmup_seconds": round(self.warmup_seconds, 3) if self.warmup_seconds is not None else None,
+            "first_inference_seconds": (round(self.first_inference_seconds, 3)
+                                        if self.first_inference_seconds is not None else None),
+            "seconds_since_start": round(now - self._started_at, 3) if self._started_at else None,
+            "startup_seconds": round(self._ready_at - self._started_at, 3) if self._ready_at else None
+        }
@@ -0,0 +1,60 @@
+import cv2
+
+
+class MotionGate:
+    def __init__(self, threshold=4.0, size=(64, 48), max_static_time=2.0):
+        """
+        Skip inference while the scene in front of the camera is not changing
+
+        Args:
+            threshold (float): Mean absolute grayscale difference (0-255) below which the scene counts as static
+            size (tuple): (width, height) the frame is downscaled to before comparing
+            max_static_time (float): Seconds after which inference is forced even if nothing moved
+        """
+        self.threshold = threshold
+        self.size = size
+        self.max_static_time = max_static_time
+
+        self.gated = 0
+        self.inferred = 0
+        self.last_score = 0.0
+        self._reference = None
+        self._reference_time = 0
+
+    def is_static(self, frame, now):
+        """
+        Compare a frame with the last frame that went through the model
+
+        Args:
+            frame (numpy.ndarray): BGR frame
+            now (float): Timestamp of the frame
+
+        Returns:
+            bool: True if the model can be skipped for this frame
+        """
+        small = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+        if self._reference is not None and now - self._reference_time < self.max_static_time:
+            self.last_score = float(cv2.absdiff(gray, self._reference).mean())
+            if self.last_score < self.threshold:
+                self.gated += 1
+                return True
+
+        # Keep comparing against the last inferred frame rather than the
+        # previous one so that slow movement still adds up to a change
+        self._reference = gray
+        self._reference_time = now
+        self.inferred += 1
+        return False
+
+    def stats(self):
+        """Get the gated and inferred frame counters"""
+        total = self.gated + self.inferred
+        return {
+            "threshold": self.threshold,
+            "last_score": round(self.last_score, 2),
+            "gated": self.gated,
+            "inferred": self.inferred,
+            "gated_ratio": round(self.gated / total, 3) if total else 0.0
+        }
@@ -0,0 +1,124 @@
+import numpy as np
+
+from src.utils.detections import box_iou
+
+
+class ObjectTracker:
+    def __init__(self, iou_threshold=0.3, min_hits=3, max_age=1.5):
+        """
+        Give every physical item its own track ID by associating boxes of the
+        same class across frames, so identical products are counted separately
+
+        Args:
+            iou_threshold (float): Minimum IoU between a track and a detection to associate them
+            min_hits (int): Matched detections needed before a track is confirmed and counted
+            max_age (float): Seconds a track survives without a match, bridging short occlusions
+        """
+        self.iou_threshold = iou_threshold
+        self.min_hits = min_hits
+        self.max_age = max_age
+
+        # Track state as parallel arrays, one row per live track
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.boxes = np.zeros((0, 4), dtype=np.float32)
+        self.cls = np.zeros(0, dtype=np.int32)
+        self.hits = np.zeros(0, dtype=np.int32)
+        self.last_seen = np.zeros(0, dtype=np.float64)
+        self.confirmed = np.zeros(0, dtype=bool)
+
+        self.next_id = 1
+        self.confirmed_total = 0
+
+    def _associate(self, detections):
+        """Greedily pair tracks and detections of the same class by descending IoU"""
+        if len(self.ids) == 0 or len(detections) == 0:
+            return []
+
+        iou = box_iou(self.boxes, detections.xyxy)
+        iou[self.cls[:, None] != detections.cls[None, :]] = 0
+
+        track_idx, det_idx = np.nonzero(iou >= self.iou_threshold)
+        order = np.argsort(-iou[track_idx, det_idx])
+
+        pairs = []
+        used_tracks = set()
+        used_detections = set()
+        for t, d in zip(track_idx[order].tolist(), det_idx[order].tolist()):
+            if t in used_tracks or d in used_detections:
+                continue
+            used_tracks.add(t)
+            used_detections.add(d)
+            pairs.append((t, d))
+        return pairs
+
+    def update(self, detections, current_time):
+        """
+        Associate a frame's detections with existing tracks
+
+        Args:
+            detections (Detections): Detections of one frame
+            current_time (float): Timestamp of the frame
+
+        Returns:
+            tuple: (track ID per detection, class ids of tracks confirmed in this update)
+        """
+        track_ids = np.zeros(len(detections), dtype=np.int64)
+        pairs = self._associate(detections)
+
+        matched = np.zeros(len(detections), dtype=bool)
+        for t, d in pairs:
+            self.boxes[t] = detections.xyxy[d]
+            self.hits[t] += 1
+            self.last_seen[t] = current_time
+            track_ids[d] = self.ids[t]
+            matched[d] = True
+
+        # Unmatched detections start new tentative tracks
+        new = np.flatnonzero(~matched)
+        if len(new):
+            new_ids = np.arange(self.next_id, self.next_id + len(new))
+            self.next_id += len(new)
+            track_ids[new] = new_ids
+            self.ids = np.concatenate([self.ids, new_ids])
+            self.boxes = np.concatenate([self.boxes, detections.xyxy[new]])
+            self.cls = np.concatenate([self.cls, detections.cls[new]])
+            self.hits = np.concatenate([self.hits, np.ones(len(new), dtype=np.int32)])
+            self.last_seen = np.concatenate([self.last_seen, np.full(len(new), current_time)])
+            self.confirmed = np.concatenate([self.confirmed, np.zeros(len(new), dtype=bool)])
+
+        # Each track is counted exactly once, when it is first confirmed
+        newly_confirmed = ~self.confirmed & (self.hits >= self.min_hits)
+        confirmed_cls = self.cls[newly_confirmed]
+        self.confirmed |= newly_confirmed
+        self.confirmed_total += int(newly_confirmed.sum())
+
+        # Drop tracks that have been unmatched for longer than max_age
+        alive = current_time - self.last_seen <= self.max_age
+        if not alive.all():
+            self.ids = self.ids[alive]
+            self.boxes = self.boxes[alive]
+            self.cls = self.cls[alive]
+            self.hits = self.hits[alive]
+            self.last_seen = self.last_seen[alive]
+            self.confirmed = self.confirmed[alive]
+
+        return track_ids, confirmed_cls
+
+    def clear(self):
+        """Forget all tracks"""
+        keep = np.zeros(len(self.ids), dtype=bool)
+        self.ids = self.ids[keep]
+        self.boxes = self.boxes[keep]
+        self.cls = self.cls[keep]
+        self.hits = self.hits[keep]
+        self.last_seen = self.last_seen[keep]
+        self.confirmed = self.confirmed[keep]
+
+    def stats(self):
+        """Get live and confirmed track counters"""
+        return {
+            "live_tracks": int(len(self.ids)),
+            "confirmed_live": int(self.confirmed.sum()),
+            "confirmed_total": self.confirmed_total,
+            "next_id": self.next_id
+        }
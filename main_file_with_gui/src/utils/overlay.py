@@ -0,0 +1,197 @@
+import cv2
+import numpy as np
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+BOX_COLOR = (0, 255, 0)
+ROI_COLOR = (255, 255, 0)
+BILL_COLOR = (0, 0, 255)
+
+# Class names cached before the label cache is emptied, e.g. after many catalogue renames
+MAX_LABEL_SPRITES = 512
+
+
+class Sprite:
+    def __init__(self, mask, origin):
+        """
+        Text rendered once, alpha-blended onto frames in one step
+
+        putText anti-aliases the edges of its strokes, so the rendering is
+        kept as coverage and blended over the text's bounding box with two
+        vectorised OpenCV calls, matching putText to within one intensity level.
+
+        Args:
+            mask (numpy.ndarray): Grayscale rendering of the text in 255 on black
+            origin (tuple): (x, y) the text was drawn at in the mask
+        """
+        ys, xs = np.nonzero(mask)
+        if not len(ys):
+            ys, xs = np.array([origin[1]]), np.array([origin[0]])
+        top, left = int(ys.min()), int(xs.min())
+        self.alpha = mask[top:int(ys.max()) + 1, left:int(xs.max()) + 1]
+        self.inverse = cv2.merge([255 - self.alpha] * 3)
+        # Offset of the bounding box from the putText origin
+        self.offset = (left - origin[0], top - origin[1])
+        self._colors = {}
+
+    @classmethod
+    def from_rows(cls, rows, thickness=2):
+        """
+        Render lines of text the way consecutive putText calls would
+
+        Args:
+            rows (list): (text, scale, (x, y)) entries
+            thickness (int): Stroke thickness
+
+        Returns:
+            Sprite: All rows as one sprite, positioned relative to (0, 0)
+        """
+        width = 1
+        height = 1
+        ascent = 0
+        for text, scale, (x, y) in rows:
+            (text_width, text_height), baseline = cv2.getTextSize(text, FONT, scale, thickness)
+            width = max(width, x + text_width + 2 * thickness)
+            height = max(height, y + baseline + 2 * thickness)
+            ascent = max(ascent, text_height - y)
+        # Strokes can reach a little left of the origin and above the text height
+        left = 2 * thickness
+        top = ascent + 2 * thickness
+        mask = np.zeros((height + top, width + left), dtype=np.uint8)
+        for text, scale, (x, y) in rows:
+            cv2.putText(mask, text, (x + left, y + top), FONT, scale, 255, thickness)
+        return cls(mask, (left, top))
+
+    def _premultiplied(self, color):
+        premultiplied = self._colors.get(color)
+        if premultiplied is None:
+            premultiplied = cv2.merge([cv2.multiply(self.alpha, channel / 255.0, dtype=cv2.CV_8U)
+                                       for channel in color])
+            self._colors[color] = premultiplied
+        return premultiplied
+
+    def draw(self, frame, position, color):
+        """
+        Draw the sprite at a putText-style origin
+
+        Args:
+            frame (numpy.ndarray): BGR frame, drawn on in place
+            position (tuple): (x, y) the text would have been drawn at
+            color (tuple): BGR colour
+        """
+        x = position[0] + self.offset[0]
+        y = position[1] + self.offset[1]
+        height, width = self.alpha.shape
+
+        # Clip to the frame, e.g. the label of a box at the top edge
+        x1, y1 = max(x, 0), max(y, 0)
+        x2, y2 = min(x + width, frame.shape[1]), min(y + height, frame.shape[0])
+        if x1 >= x2 or y1 >= y2:
+            return
+        region = frame[y1:y2, x1:x2]
+        sprite = (slice(y1 - y, y2 - y), slice(x1 - x, x2 - x))
+
+        # frame = frame * (1 - alpha) + color * alpha, over the text's bounding box only
+        cv2.multiply(region, self.inverse[sprite], dst=region, scale=1 / 255.0)
+        cv2.add(region, self._premultiplied(color)[sprite], dst=region)
+
+
+class LabelSprites:
+    def __init__(self, scale=0.5, thickness=2, max_sprites=MAX_LABEL_SPRITES):
+        """
+        Box labels with the item name rendered once per class
+
+        The confidence and track id change from frame to frame, so caching
+        whole labels would miss almost every time. Only the name is cached;
+        the few characters around it are drawn with putText.
+
+        Args:
+            scale (float): Font scale
+            thickness (int): Stroke thickness
+            max_sprites (int): Names kept before the cache is emptied
+        """
+        self.scale = scale
+        self.thickness = thickness
+        self.max_sprites = max_sprites
+        # name -> (sprite, advance in pixels)
+        self._sprites = {}
+
+    def _advance(self, text):
+        # Where putText would start the next character; getTextSize reports one pixel more
+        return cv2.getTextSize(text, FONT, self.scale, self.thickness)[0][0] - 1
+
+    def draw(self, frame, name, position, color, prefix="", suffix=""):
+        """
+        Draw a label as putText(frame, prefix + name + suffix, position, ...) would
+
+        Args:
+            frame (numpy.ndarray): BGR frame, drawn on in place
+            name (str): Item name, drawn from the cache
+            position (tuple): Bottom-left (x, y) of the text
+            color (tuple): BGR colour
+            prefix (str): Text before the name, e.g. the track id
+            suffix (str): Text after the name, e.g. the confidence
+        """
+        cached = self._sprites.get(name)
+        if cached is None:
+            if len(self._sprites) >= self.max_sprites:
+                self._sprites.clear()
+            sprite = Sprite.from_rows([(name, self.scale, (0, 0))], self.thickness)
+            cached = self._sprites[name] = (sprite, self._advance(name))
+        sprite, advance = cached
+
+        x, y = position
+        if prefix:
+            cv2.putText(frame, prefix, (x, y), FONT, self.scale, color, self.thickness)
+            x += self._advance(prefix)
+        sprite.draw(frame, (x, y), color)
+        if suffix:
+            cv2.putText(frame, suffix, (x + advance, y), FONT, self.scale, color, self.thickness)
+
+    def __len__(self):
+        return len(self._sprites)
+
+
+class BillPanel:
+    def __init__(self, origin=(10, 30)):
+        """
+        The "Current Bill" text drawn on the video, rendered only when the bill changes
+
+        Args:
+            origin (tuple): Position of the first line, as passed to putText
+        """
+        self.origin = origin
+        self.renders = 0
+        self._key = None
+        self._sprite = None
+
+    def _render(self, lines, display_name):
+        x, y_offset = self.origin
+        rows = [("Current Bill:", 0.7, (x, y_offset))]
+        y_offset += 30
+
+        total_amount = 0
+        for cls_name, count, price in lines:
+            amount = count * price
+            total_amount += amount
+            rows.append((f"{display_name(cls_name)}: {count} x {price:.2f} = {amount:.2f}", 0.6, (x, y_offset)))
+            y_offset += 25
+
+        rows.append((f"Total: {total_amount:.2f}", 0.7, (x, y_offset)))
+        self.renders += 1
+        return Sprite.from_rows(rows)
+
+    def draw(self, frame, key, lines, display_name):
+        """
+        Blend the panel onto a frame, re-rendering it only for a new key
+
+        Args:
+            frame (numpy.ndarray): BGR frame, drawn on in place
+            key (hashable): Changes whenever the lines or their names do, e.g. the bill version
+            lines (tuple): (name, count, unit price) bill lines
+            display_name (callable): Maps a class name to the name shown
+        """
+        if key != self._key or self._sprite is None:
+            self._sprite = self._render(lines, display_name)
+            self._key = key
+        self._sprite.draw(frame, (0, 0), BILL_COLOR)
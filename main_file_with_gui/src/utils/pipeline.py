@@ -0,0 +1,274 @@
+import threading
+import time
+from collections import deque
+
+import cv2
+
+from src.utils.metrics import DISABLED
+
+
+class LatestQueue:
+    def __init__(self, maxsize=2):
+        """
+        Bounded queue that drops the oldest item when full
+
+        Args:
+            maxsize (int): Maximum number of items held before the oldest is dropped
+        """
+        self._items = deque(maxlen=maxsize)
+        self._cond = threading.Condition()
+        self.maxsize = maxsize
+        self.dropped = 0
+
+    def put(self, item):
+        """
+        Add an item, discarding the oldest one if the queue is full
+
+        Args:
+            item: Item to enqueue
+
+        Returns:
+            bool: True if an older item was dropped to make room
+        """
+        with self._cond:
+            dropped = len(self._items) == self.maxsize
+            if dropped:
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify_all()
+        return dropped
+
+    def wait_for_room(self, timeout=None):
+        """
+        Wait until the queue has a free slot, so the next put drops nothing
+
+        Args:
+            timeout (float): Seconds to wait, or None to wait forever
+
+        Returns:
+            bool: True if there is room, False if the timeout expired
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: len(self._items) < self.maxsize, timeout)
+
+    def get(self, timeout=None):
+        """
+        Remove and return the oldest item
+
+        Args:
+            timeout (float): Seconds to wait for an item, or None to wait forever
+
+        Returns:
+            The oldest item, or None if the timeout expired
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items, timeout):
+                return None
+            item = self._items.popleft()
+            self._cond.notify_all()
+            return item
+
+    def qsize(self):
+        """Number of items currently waiting"""
+        return len(self._items)
+
+
+class StageStats:
+    def __init__(self, name, window=1.0):
+        """
+        Frame rate and latency counters for a single pipeline stage
+
+        Args:
+            name (str): Stage name used in reports
+            window (float): Seconds over which the FPS figure is averaged
+        """
+        self.name = name
+        self.window = window
+        self.frames = 0
+        self.errors = 0
+        self.fps = 0.0
+        self.last_latency = 0.0
+        self._window_start = time.time()
+        self._window_frames = 0
+
+    def record(self, latency):
+        """Record one processed frame and how long it took"""
+        self.frames += 1
+        self.last_latency = latency
+        self._window_frames += 1
+
+        now = time.time()
+        elapsed = now - self._window_start
+        if elapsed >= self.window:
+            self.fps = self._window_frames / elapsed
+            self._window_start = now
+            self._window_frames = 0
+
+    def as_dict(self):
+        """Get the counters as a JSON-serialisable dictionary"""
+        return {
+            "frames": self.frames,
+            "errors": self.errors,
+            "fps": round(self.fps, 2),
+            "last_latency_ms": round(self.last_latency * 1000, 2)
+        }
+
+
+class FramePipeline:
+    def __init__(self, read_frame, process_frame, publish, queue_size=2, jpeg_quality=80, metrics=DISABLED,
+                 backpressure=None):
+        """
+        Run capture, inference and JPEG encoding as separate threads joined by
+        bounded queues, so a slow stage never stalls the ones before it
+
+        Args:
+            read_frame (callable): Returns the next camera frame or a (frame, capture timestamp) pair,
+                or None if none is available
+            process_frame (callable): Runs detection and billing on a frame and its capture timestamp
+                (passed as current_time) and returns the annotated frame
+            publish (callable): Receives the encoded JPEG bytes and the processed frame for every frame
+            queue_size (int): Maximum frames held between stages before the oldest is dropped
+            jpeg_quality (int): JPEG quality used by the encode stage
+            metrics (Metrics): Records the capture and encode stage times and queue counters
+            backpressure (callable): Returns True while a stage should wait for the next queue
+                to have room instead of dropping frames, e.g. when replaying a file
+        """
+        self.read_frame = read_frame
+        self.process_frame = process_frame
+        self.publish = publish
+        self.encode_params = [int(cv2.IMWRITE_JPEG_QUALITY), jpeg_quality]
+        self.metrics = metrics
+        self.backpressure = backpressure
+
+        self.inference_queue = LatestQueue(queue_size)
+        self.encode_queue = LatestQueue(queue_size)
+        self.stages = {
+            "capture": StageStats("capture"),
+            "inference": StageStats("inference"),
+            "encode": StageStats("encode")
+        }
+
+        self._running = threading.Event()
+        self._threads = []
+
+    def start(self):
+        """Start all pipeline stages in background threads"""
+        self._running.set()
+        for name, target in (("capture", self._capture_loop),
+                             ("inference", self._inference_loop),
+                             ("encode", self._encode_loop)):
+            thread = threading.Thread(target=target, name=f"pipeline-{name}")
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """Ask all stages to finish and wait for them"""
+        self._running.clear()
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+        self._threads = []
+
+    def _capture_loop(self):
+        stats = self.stages["capture"]
+        while self._running.is_set():
+            # A replayed file would otherwise be read as fast as it decodes and
+            # mostly dropped; leaving frames unread holds the source back too
+            if self.backpressure is not None and self.backpressure():
+                if not self.inference_queue.wait_for_room(timeout=0.5):
+                    continue
+            start = time.time()
+            try:
+                frame = self.read_frame()
+            except Exception as e:
+                stats.errors += 1
+                print(f"Capture error: {e}")
+                time.sleep(0.1)
+                continue
+            if frame is None:
+                continue
+            if isinstance(frame, tuple):
+                frame, captured_at = frame
+            else:
+                captured_at = time.time()
+            self.inference_queue.put((frame, captured_at))
+            latency = time.time() - start
+            stats.record(latency)
+            self.metrics.observe("capture", latency)
+
+    def _inference_loop(self):
+        stats = self.stages["inference"]
+        while self._running.is_set():
+            item = self.inference_queue.get(timeout=0.5)
+            if item is None:
+                continue
+            frame, captured_at = item
+            start = time.time()
+            try:
+                processed_frame = self.process_frame(frame, current_time=captured_at)
+            except Exception as e:
+                stats.errors += 1
+                print(f"Inference error: {e}")
+                continue
+            if self.backpressure is not None and self.backpressure():
+                while self._running.is_set() and not self.encode_queue.wait_for_room(timeout=0.5):
+                    pass
+            self.encode_queue.put((processed_frame, captured_at))
+            stats.record(time.time() - start)
+
+    def _encode_loop(self):
+        stats = self.stages["encode"]
+        while self._running.is_set():
+            item = self.encode_queue.get(timeout=0.5)
+            if item is None:
+                continue
+            processed_frame, captured_at = item
+            start = time.time()
+            ok, buffer = cv2.imencode('.jpg', processed_frame, self.encode_params)
+            if not ok:
+                stats.errors += 1
+                continue
+            self.publish(buffer.tobytes(), processed_frame)
+            latency = time.time() - start
+            stats.record(latency)
+            self.metrics.observe("encode", latency)
+
+    def collect_metrics(self):
+        """
+        Queue and stage counters for a Metrics collector
+
+        Returns:
+            list: (name, kind, labels, value) tuples
+        """
+        samples = []
+        for name, queue in (("inference", self.inference_queue), ("encode", self.encode_queue)):
+            samples.append(("queue_depth", "gauge", {"queue": name}, queue.qsize()))
+            samples.append(("frames_dropped", "counter", {"queue": name}, queue.dropped))
+        for name, stage in self.stages.items():
+            samples.append(("stage_frames", "counter", {"stage": name}, stage.frames))
+            samples.append(("stage_errors", "counter", {"stage": name}, stage.errors))
+            samples.append(("stage_fps", "gauge", {"stage": name}, round(stage.fps, 2)))
+        return samples
+
+    def stats(self):
+        """
+        Get per-stage FPS and per-queue depth counters
+
+        Returns:
+            dict: Stage and queue statistics
+        """
+        return {
+            "stages": {name: stage.as_dict() for name, stage in self.stages.items()},
+            "queues": {
+                "inference": {
+                    "depth": self.inference_queue.qsize(),
+                    "maxsize": self.inference_queue.maxsize,
+                    "dropped": self.inference_queue.dropped
+                },
+                "encode": {
+                    "depth": self.encode_queue.qsize(),
+                    "maxsize": self.encode_queue.maxsize,
+                    "dropped": self.encode_queue.dropped
+                }
+            }
+        }
@@ -0,0 +1,111 @@
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+# Frame shapes whose scratch buffers are kept, e.g. one per lane; the auto ROI
+# crops to a new shape whenever the tray region moves
+MAX_SHAPES = 8
+
+
+class Letterbox:
+    def __init__(self, input_shape, imgsz):
+        """
+        Scale and padding that map one frame shape into the square model input
+
+        Args:
+            input_shape (tuple): (height, width) of the incoming frames
+            imgsz (int): Side length of the model input
+        """
+        h, w = input_shape
+        self.scale = min(imgsz / h, imgsz / w)
+        self.new_w = int(round(w * self.scale))
+        self.new_h = int(round(h * self.scale))
+        self.left = (imgsz - self.new_w) // 2
+        self.top = (imgsz - self.new_h) // 2
+
+    def to_frame(self, xyxy):
+        """Map (N, 4) boxes from model input coordinates back to frame pixels"""
+        xyxy = xyxy.copy()
+        xyxy[:, [0, 2]] = (xyxy[:, [0, 2]] - self.left) / self.scale
+        xyxy[:, [1, 3]] = (xyxy[:, [1, 3]] - self.top) / self.scale
+        return xyxy
+
+
+class LetterboxPreprocessor:
+    def __init__(self, imgsz=640, pad_value=114, max_shapes=MAX_SHAPES):
+        """
+        Letterbox frames into preallocated buffers so the hot loop does not
+        allocate new resize, canvas and tensor arrays for every frame
+
+        Args:
+            imgsz (int): Side length of the square model input
+            pad_value (int): Grey level used for the letterbox border
+            max_shapes (int): Frame shapes whose buffers are kept before the least recently used is freed
+        """
+        self.imgsz = imgsz
+        self.pad_value = pad_value
+        self.max_shapes = max_shapes
+
+        # (letterbox, resize buffer) keyed by input frame shape, least recently used first
+        self._buffers = OrderedDict()
+        self._canvas = np.full((imgsz, imgsz, 3), pad_value, dtype=np.uint8)
+        self._canvas_shape = None
+
+        # Model input buffers keyed by batch size
+        self._tensors = {}
+
+    def _buffers_for(self, shape):
+        buffers = self._buffers.get(shape)
+        if buffers is None:
+            letterbox = Letterbox(shape, self.imgsz)
+            buffers = (letterbox, np.empty((letterbox.new_h, letterbox.new_w, 3), dtype=np.uint8))
+            self._buffers[shape] = buffers
+            while len(self._buffers) > self.max_shapes:
+                self._buffers.popitem(last=False)
+        else:
+            self._buffers.move_to_end(shape)
+        return buffers
+
+    def _tensor_for(self, batch_size):
+        tensor = self._tensors.get(batch_size)
+        if tensor is None:
+            import torch
+            array = np.empty((batch_size, 3, self.imgsz, self.imgsz), dtype=np.float32)
+            # torch.from_numpy shares memory, so filling the array fills the tensor
+            tensor = (array, torch.from_numpy(array))
+            self._tensors[batch_size] = tensor
+        return tensor
+
+    def __call__(self, frames):
+        """
+        Letterbox a batch of BGR frames into the reusable model input
+
+        Args:
+            frames (list): BGR frames, which may have different shapes
+
+        Returns:
+            tuple: (torch.Tensor of shape Bx3xHxW, list of Letterbox per frame)
+        """
+        array, tensor = self._tensor_for(len(frames))
+        letterboxes = []
+
+        for i, frame in enumerate(frames):
+            shape = frame.shape[:2]
+            letterbox, resized = self._buffers_for(shape)
+
+            cv2.resize(frame, (letterbox.new_w, letterbox.new_h), dst=resized, interpolation=cv2.INTER_LINEAR)
+
+            # Only the border needs re-filling when the frame shape changes
+            canvas = self._canvas
+            if self._canvas_shape != shape:
+                canvas.fill(self.pad_value)
+                self._canvas_shape = shape
+            canvas[letterbox.top:letterbox.top + letterbox.new_h,
+                   letterbox.left:letterbox.left + letterbox.new_w] = resized
+
+            # BGR HWC uint8 -> RGB CHW float in [0, 1], written straight into the batch slot
+            np.multiply(canvas[:, :, ::-1].transpose(2, 0, 1), np.float32(1 / 255.0), out=array[i])
+            letterboxes.append(letterbox)
+
+        return tensor, letterboxes
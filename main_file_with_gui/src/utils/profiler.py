@@ -0,0 +1,86 @@
+import sys
+import threading
+import time
+from collections import Counter
+
+
+class SamplingProfiler:
+    def __init__(self, interval=0.005, max_duration=30.0):
+        """
+        On-demand statistical profiler for the running process
+
+        While a profile runs, a background thread looks at the current stack
+        of every other thread every interval seconds. Nothing is traced
+        between profiles, so it costs nothing when idle.
+
+        Args:
+            interval (float): Seconds between stack samples
+            max_duration (float): Longest profile that may be requested
+        """
+        self.interval = interval
+        self.max_duration = max_duration
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._lock.locked()
+
+    def profile(self, duration, top=25):
+        """
+        Sample all threads for a while and report where they spend their time
+
+        Args:
+            duration (float): Seconds to sample for, capped at max_duration
+            top (int): Number of functions and stacks to report
+
+        Returns:
+            dict: Sample counts per thread, hottest functions and hottest stacks,
+                or None if another profile is already running
+        """
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            return self._sample(min(duration, self.max_duration), top)
+        finally:
+            self._lock.release()
+
+    def _sample(self, duration, top):
+        own_id = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        # Counts every function on a stack once per sample, and the innermost one separately
+        inclusive = Counter()
+        exclusive = Counter()
+        stacks = Counter()
+        per_thread = Counter()
+        samples = 0
+
+        end = time.perf_counter() + duration
+        while time.perf_counter() < end:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                thread_name = names.get(thread_id, str(thread_id))
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+                    frame = frame.f_back
+                if not stack:
+                    continue
+                per_thread[thread_name] += 1
+                exclusive[stack[0]] += 1
+                for function in set(stack):
+                    inclusive[function] += 1
+                stacks[(thread_name, " <- ".join(stack[:8]))] += 1
+            samples += 1
+            time.sleep(self.interval)
+
+        return {
+            "duration_seconds": duration,
+            "samples": samples,
+            "threads": dict(per_thread),
+            "self": [{"function": function, "samples": count} for function, count in exclusive.most_common(top)],
+            "total": [{"function": function, "samples": count} for function, count in inclusive.most_common(top)],
+            "stacks": [{"thread": thread_name, "stack": stack, "samples": count}
+                       for (thread_name, stack), count in stacks.most_common(top)]
+        }
@@ -0,0 +1,238 @@
+import itertools
+import io
+import json
+import os
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from src.utils.receipt_generator import ReceiptGenerator, FORMATS
+from src.utils.sales_store import iter_finalized_bills
+
+# How rendered receipts are written out
+OUTPUTS = ("files", "merged", "zip")
+
+# Formats merged into one stream; merged PDFs are written per chunk instead, as each worker renders one
+STREAM_FORMATS = ("text", "escpos")
+
+# Set in every worker process by _init_worker
+_generator = None
+
+
+def iter_bill_file(path):
+    """
+    Read bills from a JSON Lines file, one at a time
+
+    Args:
+        path (str): File with one {"bill_id", "lines": [[name, quantity, unit price], ...],
+            "tax_rate", "timestamp"} object per line; tax_rate and timestamp are optional
+
+    Yields:
+        dict: Bills in the form iter_finalized_bills yields
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            bill = json.loads(line)
+            if "lines" not in bill:
+                raise ValueError(f"{path}:{number}: bill has no lines")
+            yield {
+                "bill_id": str(bill.get("bill_id", number)),
+                "lane": bill.get("lane"),
+                "timestamp": bill.get("timestamp"),
+                "tax_rate": bill.get("tax_rate", 0.07),
+                "lines": [tuple(entry) for entry in bill["lines"]]
+            }
+
+
+def iter_bills(path, start_day=None, end_day=None, lane=None):
+    """
+    Read bills from a sales database or a JSON Lines file
+
+    Args:
+        path (str): .db file written by SalesStore, or a .jsonl file of bills
+        start_day (str): First day as YYYY-MM-DD, sales databases only
+        end_day (str): Last day as YYYY-MM-DD, sales databases only
+        lane (str): Only this lane, or None for all
+
+    Yields:
+        dict: {"bill_id", "lane", "timestamp", "tax_rate", "lines"}
+    """
+    if path.endswith((".jsonl", ".json")):
+        bills = iter_bill_file(path)
+        if start_day is not None:
+            print("Ignoring the day range, which only applies to sales databases")
+        if lane is None:
+            return bills
+        return (bill for bill in bills if bill["lane"] == lane)
+    return iter_finalized_bills(path, start_day, end_day, lane)
+
+
+def _init_worker(text_width):
+    # One generator per process, so the PDF layout and HTML template are set up once per worker
+    global _generator
+    _generator = ReceiptGenerator(None, text_width=text_width)
+
+
+def _safe_name(bill_id):
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in str(bill_id))
+
+
+def _render(receipt, output_format):
+    if output_format == "pdf":
+        buffer = io.BytesIO()
+        _generator.render_pdf(receipt, buffer)
+        return buffer.getvalue()
+    if output_format == "html":
+        return _generator.render_html(receipt).encode("utf-8")
+    return _generator.render_text(receipt, escpos=output_format == "escpos")
+
+
+def render_chunk(index, bills, output_format, output, output_directory):
+    """
+    Render a chunk of bills in a worker process
+
+    Args:
+        index (int): Position of the chunk, used to name merged PDF volumes
+        bills (list): Bills from iter_bills
+        output_format (str): One of FORMATS
+        output (str): One of OUTPUTS
+        output_directory (str): Where files and merged volumes are written
+
+    Returns:
+        tuple: (bills rendered, bytes rendered, [(archive name, data)] for zip and
+            merged text output, which the parent writes in order)
+    """
+    receipts = [(bill["bill_id"], _generator.build_receipt(bill["lines"], bill["tax_rate"], bill["timestamp"]))
+                for bill in bills]
+    extension = FORMATS[output_format]
+
+    if output == "merged" and output_format == "pdf":
+        filename = os.path.join(output_directory, f"receipts_{index + 1:05d}.pdf")
+        _generator.render_pdf_pages([receipt for _, receipt in receipts], filename)
+        return len(receipts), os.path.getsize(filename), []
+
+    size = 0
+    pending = []
+    for bill_id, receipt in receipts:
+        data = _render(receipt, output_format)
+        size += len(data)
+        name = f"receipt_{_safe_name(bill_id)}{extension}"
+        if output == "files":
+            with open(os.path.join(output_directory, name), 'wb') as f:
+                f.write(data)
+        else:
+            pending.append((name, data))
+    return len(receipts), size, pending
+
+
+def _chunks(bills, chunk_size):
+    bills = iter(bills)
+    while True:
+        chunk = list(itertools.islice(bills, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class _Progress:
+    def __init__(self, interval):
+        self.interval = interval
+        self.start = time.perf_counter()
+        self.bills = 0
+        self.bytes = 0
+        self._last_report = self.start
+
+    def update(self, bills, size):
+        self.bills += bills
+        self.bytes += size
+        now = time.perf_counter()
+        if now - self._last_report >= self.interval:
+            self._last_report = now
+            print(self.line(now))
+
+    def line(self, now=None):
+        elapsed = (now or time.perf_counter()) - self.start
+        rate = self.bills / elapsed if elapsed > 0 else 0.0
+        return (f"{self.bills} receipts, {self.bytes / 1e6:.1f} MB in {elapsed:.1f}s "
+                f"({rate:.0f} receipts/s)")
+
+
+def render_batch(bills, output_path, output_format="pdf", output="files", workers=None,
+                 chunk_size=100, text_width=42, progress_interval=2.0):
+    """
+    Render stored bills on a process pool and write them out as they finish
+
+    Bills are read lazily, rendered chunk by chunk in worker processes, and
+    at most two chunks per worker are in flight, so memory stays bounded
+    however many bills there are. Results are written in input order.
+
+    Args:
+        bills (iterable): Bills from iter_bills
+        output_path (str): Directory for "files" and "merged" output, .zip file for "zip"
+        output_format (str): One of FORMATS
+        output (str): "files" writes one file per receipt, "merged" one PDF per chunk or a
+            single text stream, "zip" one archive
+        workers (int): Worker processes, or None for one per CPU
+        chunk_size (int): Bills per worker task, and per file of merged PDFs
+        text_width (int): Characters per line of text and ESC/POS receipts
+        progress_interval (float): Seconds between progress lines
+
+    Returns:
+        dict: Receipts, bytes, seconds and throughput
+    """
+    if output_format not in FORMATS:
+        raise ValueError(f"Unknown receipt format {output_format}, expected one of {sorted(FORMATS)}")
+    if output not in OUTPUTS:
+        raise ValueError(f"Unknown output {output}, expected one of {OUTPUTS}")
+    if output == "merged" and output_format not in STREAM_FORMATS + ("pdf",):
+        raise ValueError(f"{output_format} receipts cannot be merged")
+
+    workers = workers or os.cpu_count() or 1
+    if output == "zip":
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        output_directory = None
+        sink = zipfile.ZipFile(output_path, 'w', compression=zipfile.ZIP_DEFLATED)
+    else:
+        os.makedirs(output_path, exist_ok=True)
+        output_directory = output_path
+        sink = None
+        if output == "merged" and output_format in STREAM_FORMATS:
+            sink = open(os.path.join(output_path, f"receipts{FORMATS[output_format]}"), 'wb')
+
+    progress = _Progress(progress_interval)
+    in_flight = deque()
+
+    def finish_oldest():
+        count, size, pending = in_flight.popleft().result()
+        for name, data in pending:
+            if output == "zip":
+                sink.writestr(name, data)
+            else:
+                sink.write(data)
+        progress.update(count, size)
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(text_width,)) as pool:
+            for index, chunk in enumerate(_chunks(bills, chunk_size)):
+                in_flight.append(pool.submit(render_chunk, index, chunk, output_format, output, output_directory))
+                if len(in_flight) >= 2 * workers:
+                    finish_oldest()
+            while in_flight:
+                finish_oldest()
+    finally:
+        if sink is not None:
+            sink.close()
+
+    elapsed = time.perf_counter() - progress.start
+    print(f"Done: {progress.line()}")
+    return {
+        "receipts": progress.bills,
+        "bytes": progress.bytes,
+        "seconds": round(elapsed, 3),
+        "receipts_per_second": round(progress.bills / elapsed, 1) if elapsed > 0 else 0.0,
+        "workers": workers,
+        "output": output_path
+    }
@@ -1,105 +1,355 @@
 import os
+import uuid
 import datetime
 from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
-from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib import colors
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'templates')
+RECEIPT_TEMPLATE = "receipt.html"
+
+# Output formats and the file extension each is written with
+FORMATS = {"pdf": ".pdf", "html": ".html", "text": ".txt", "escpos": ".bin"}
+
+# Characters per line of an 80 mm thermal printer in its default font
+TEXT_WIDTH = 42
+
+# ESC/POS control sequences
+ESC_INIT = b"\x1b@"
+ESC_BOLD_ON = b"\x1bE\x01"
+ESC_BOLD_OFF = b"\x1bE\x00"
+ESC_CENTER = b"\x1ba\x01"
+ESC_LEFT = b"\x1ba\x00"
+ESC_FEED_CUT = b"\n\n\n\x1dV\x00"
+
+
+class _PdfLayout:
+    def __init__(self, pagesize=letter):
+        """
+        Page geometry, fonts and colours of the PDF receipt, worked out once
+
+        Args:
+            pagesize (tuple): Page width and height in points
+        """
+        self.pagesize = pagesize
+        self.page_width, self.page_height = pagesize
+        self.margin = 72
+        self.row_height = 18
+        self.header_height = 26
+
+        # Item, quantity, unit price and total columns, centred on the page
+        self.column_widths = (220, 70, 90, 80)
+        table_width = sum(self.column_widths)
+        self.left = (self.page_width - table_width) / 2
+        self.right = self.left + table_width
+        self.column_edges = [self.left]
+        for width in self.column_widths:
+            self.column_edges.append(self.column_edges[-1] + width)
+        self.headers = ("Item", "Quantity", "Unit Price", "Total")
+
+        self.font = "Helvetica"
+        self.bold_font = "Helvetica-Bold"
+        self.font_size = 10
+        self.title_size = 18
+        self.header_fill = colors.grey
+        self.header_text = colors.whitesmoke
+        self.body_fill = colors.beige
+
+        # Width of the item column that text may use, and of the ellipsis that shortens longer names
+        self.name_width = self.column_widths[0] - 12
+        self.ellipsis_width = stringWidth("...", self.font, self.font_size)
+
+    def fit_name(self, name):
+        """Shorten an item name to fit its column"""
+        if stringWidth(name, self.font, self.font_size) <= self.name_width:
+            return name
+        while name and stringWidth(name, self.font, self.font_size) + self.ellipsis_width > self.name_width:
+            name = name[:-1]
+        return name + "..."
+
 
 class ReceiptGenerator:
-    def __init__(self, output_directory="output/receipts"):
+    def __init__(self, output_directory="output/receipts", template_dir=TEMPLATE_DIR, text_width=TEXT_WIDTH):
         """
-        Initialize receipt generator
-        
+        Render receipts as PDF, HTML, plain text or ESC/POS for thermal printers
+
+        The PDF layout and the compiled HTML template are built once and
+        reused for every receipt. PDFs are drawn straight onto a canvas
+        rather than laid out by platypus.
+
         Args:
-            output_directory (str): Directory to save receipts
+            output_directory (str): Directory to save receipts, or None if every caller passes a filename
+            template_dir (str): Directory holding receipt.html
+            text_width (int): Characters per line of text and ESC/POS receipts
         """
         self.output_directory = output_directory
-        os.makedirs(output_directory, exist_ok=True)
-    
-    def generate_receipt(self, items, prices, tax_rate=0.07):
+        if output_directory is not None:
+            os.makedirs(output_directory, exist_ok=True)
+        self.text_width = text_width
+
+        self.layout = _PdfLayout()
+        environment = Environment(loader=FileSystemLoader(template_dir), autoescape=select_autoescape(["html"]))
+        # receipt.html is also served by Flask; outside a request, static files are linked by path
+        environment.globals["url_for"] = lambda endpoint, filename="": f"/{endpoint}/{filename}"
+        self.template = environment.get_template(RECEIPT_TEMPLATE)
+
+    def unique_filename(self, extension=".pdf"):
+        """
+        Build a receipt path that concurrent checkouts cannot collide on
+
+        Args:
+            extension (str): File extension including the dot
+
+        Returns:
+            str: Path inside the output directory
+        """
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        return os.path.join(self.output_directory, f"receipt_{timestamp}_{uuid.uuid4().hex[:8]}{extension}")
+
+    def build_receipt(self, lines, tax_rate=0.07, timestamp=None):
+        """
+        Work out the figures every receipt format shows
+
+        Args:
+            lines (iterable): (item name, quantity, unit price) for every billed item
+            tax_rate (float): Tax rate to apply
+            timestamp (float): When the bill was paid, for reprints, or None for now
+
+        Returns:
+            dict: Date, items, subtotal, tax and total
+        """
+        items = []
+        subtotal = 0
+        for name, quantity, unit_price in lines:
+            if quantity > 0:
+                total = unit_price * quantity
+                subtotal += total
+                items.append({"name": name, "quantity": quantity, "unit_price": unit_price, "total": total})
+        tax = subtotal * tax_rate
+        paid = datetime.datetime.now() if timestamp is None else datetime.datetime.fromtimestamp(timestamp)
+        return {
+            "date_time": paid.strftime("%Y-%m-%d %H:%M:%S"),
+            "items": items,
+            "subtotal": subtotal,
+            "tax_rate": tax_rate,
+            "tax_label": f"Tax ({tax_rate * 100:g}%):",
+            "tax": tax,
+            "total": subtotal + tax
+        }
+
+    def render_pdf(self, receipt, filename):
+        """
+        Draw a receipt onto a PDF canvas
+
+        Args:
+            receipt (dict): Figures from build_receipt
+            filename (str or file): Where to write the PDF
+        """
+        self.render_pdf_pages([receipt], filename)
+
+    def render_pdf_pages(self, receipts, filename):
+        """
+        Draw several receipts into one PDF, each starting on a new page
+
+        Every reportlab call formats its coordinates in Python, so each table
+        is drawn with one fill per block, one grid and one text object.
+
+        Args:
+            receipts (iterable): Figures from build_receipt
+            filename (str or file): Where to write the PDF
+        """
+        # Receipts are a few kilobytes; compressing and ASCII85-encoding the page costs more than it saves
+        pdf = canvas.Canvas(filename, pagesize=self.layout.pagesize, pageCompression=0)
+        pdf.setTitle("Retail Billing Receipt")
+        for index, receipt in enumerate(receipts):
+            if index:
+                pdf.showPage()
+            self._pdf_receipt(pdf, receipt)
+        pdf.save()
+
+    def _pdf_receipt(self, pdf, receipt):
+        layout = self.layout
+        top = layout.page_height - layout.margin
+
+        pdf.setFont(layout.bold_font, layout.title_size)
+        pdf.drawCentredString(layout.page_width / 2, top, "Retail Billing Receipt")
+        pdf.setFont(layout.font, layout.font_size)
+        pdf.drawString(layout.left, top - 30, f"Date: {receipt['date_time']}")
+        y = top - 60
+
+        rows = [(layout.fit_name(item["name"]), str(item["quantity"]),
+                 f"{item['unit_price']:.2f}", f"{item['total']:.2f}") for item in receipt["items"]]
+        if not rows:
+            rows = [("No items detected", "0", "0.00", "0.00")]
+
+        # Items, continued on further pages if they do not fit
+        while True:
+            fit = max(int((y - layout.margin - layout.header_height) // layout.row_height), 1)
+            y = self._pdf_table(pdf, y, rows[:fit])
+            rows = rows[fit:]
+            if not rows:
+                break
+            pdf.showPage()
+            y = top
+
+        totals = [("", "", label, f"{amount:.2f}") for label, amount in (
+            ("Subtotal:", receipt["subtotal"]), (receipt["tax_label"], receipt["tax"]), ("Total:", receipt["total"]))]
+        if y - len(totals) * layout.row_height - 30 < layout.margin:
+            pdf.showPage()
+            y = top
+        y = self._pdf_rows(pdf, y, totals, layout.bold_font)
+
+        pdf.setFont(layout.font, layout.font_size)
+        pdf.drawString(layout.left, y - 30, "Thank you for shopping with us!")
+
+    def _pdf_table(self, pdf, y, rows):
+        """Draw the grey header and a gridded block of item rows, returning the y below them"""
+        layout = self.layout
+        width = layout.right - layout.left
+        bottom = y - layout.header_height - len(rows) * layout.row_height
+
+        pdf.setFillColor(layout.header_fill)
+        pdf.rect(layout.left, y - layout.header_height, width, layout.header_height, stroke=0, fill=1)
+        pdf.setFillColor(layout.header_text)
+        pdf.setFont(layout.bold_font, layout.font_size)
+        header = pdf.beginText()
+        for text, left, right in zip(layout.headers, layout.column_edges, layout.column_edges[1:]):
+            header.setTextOrigin((left + right - stringWidth(text, layout.bold_font, layout.font_size)) / 2,
+                                 y - layout.header_height + 12)
+            header.textOut(text)
+        pdf.drawText(header)
+
+        self._pdf_rows(pdf, y - layout.header_height, rows, layout.font)
+        pdf.setStrokeColor(colors.black)
+        pdf.grid(layout.column_edges, [y, y - layout.header_height] +
+                 [y - layout.header_height - (i + 1) * layout.row_height for i in range(len(rows))])
+        return bottom
+
+    def _pdf_rows(self, pdf, y, rows, font):
+        """Draw rows on a beige block, names left and numbers right-aligned, returning the y below them"""
+        layout = self.layout
+        bottom = y - len(rows) * layout.row_height
+        pdf.setFillColor(layout.body_fill)
+        pdf.rect(layout.left, bottom, layout.right - layout.left, y - bottom, stroke=0, fill=1)
+
+        pdf.setFillColor(colors.black)
+        pdf.setFont(font, layout.font_size)
+        text = pdf.beginText()
+        for i, row in enumerate(rows):
+            baseline = y - (i + 1) * layout.row_height + 5
+            if row[0]:
+                text.setTextOrigin(layout.column_edges[0] + 6, baseline)
+                text.textOut(row[0])
+            for cell, right in zip(row[1:], layout.column_edges[2:]):
+                if cell:
+                    text.setTextOrigin(right - 6 - stringWidth(cell, font, layout.font_size), baseline)
+                    text.textOut(cell)
+        pdf.drawText(text)
+        return bottom
+
+    def render_html(self, receipt, download_url=None):
+        """
+        Render a receipt with templates/receipt.html
+
+        Args:
+            receipt (dict): Figures from build_receipt
+            download_url (str): Link to the PDF, or None to leave it out
+
+        Returns:
+            str: The HTML page
+        """
+        return self.template.render(download_url=download_url, **receipt)
+
+    def render_text(self, receipt, escpos=False):
+        """
+        Render a receipt as fixed-width text for a thermal printer
+
+        Args:
+            receipt (dict): Figures from build_receipt
+            escpos (bool): Add ESC/POS initialise, bold, centre and cut commands
+
+        Returns:
+            bytes: The receipt, ASCII with unsupported characters replaced
+        """
+        width = self.text_width
+
+        def columns(left, right):
+            left = left[:max(width - len(right) - 1, 0)]
+            return f"{left}{' ' * (width - len(left) - len(right))}{right}"
+
+        body = [f"Date: {receipt['date_time']}", "-" * width]
+        for item in receipt["items"]:
+            body.append(item["name"][:width])
+            body.append(columns(f"  {item['quantity']} x {item['unit_price']:.2f}", f"{item['total']:.2f}"))
+        if not receipt["items"]:
+            body.append("No items detected")
+        body.append("-" * width)
+        body.append(columns("Subtotal:", f"{receipt['subtotal']:.2f}"))
+        body.append(columns(receipt["tax_label"], f"{receipt['tax']:.2f}"))
+        total = columns("Total:", f"{receipt['total']:.2f}")
+
+        def encode(text):
+            return text.encode("ascii", "replace")
+
+        title = "Retail Billing Receipt"
+        thanks = "Thank you for shopping with us!"
+        if not escpos:
+            return encode("\n".join([title.center(width).rstrip()] + body + [total, "", thanks.center(width).rstrip()]) + "\n")
+        return b"".join([
+            ESC_INIT, ESC_CENTER, ESC_BOLD_ON, encode(title), b"\n", ESC_BOLD_OFF, ESC_LEFT,
+            encode("\n".join(body)), b"\n",
+            ESC_BOLD_ON, encode(total), b"\n", ESC_BOLD_OFF,
+            b"\n", ESC_CENTER, encode(thanks), ESC_FEED_CUT
+        ])
+
+    def write_receipt(self, lines, tax_rate=0.07, output_format="pdf", filename=None):
+        """
+        Render a receipt in one of FORMATS and save it
+
+        Args:
+            lines (iterable): (item name, quantity, unit price) for every billed item
+            tax_rate (float): Tax rate to apply
+            output_format (str): "pdf", "html", "text" or "escpos"
+            filename (str): Where to write the receipt, or None for a unique name
+
+        Returns:
+            str: Path to the generated receipt file
+        """
+        if output_format not in FORMATS:
+            raise ValueError(f"Unknown receipt format {output_format}, expected one of {sorted(FORMATS)}")
+        if filename is None:
+            filename = self.unique_filename(FORMATS[output_format])
+
+        receipt = self.build_receipt(lines, tax_rate)
+        if not receipt["items"]:
+            print("Warning: No items with count > 0 found")
+
+        if output_format == "pdf":
+            self.render_pdf(receipt, filename)
+        elif output_format == "html":
+            with open(filename, 'w', encoding='utf-8') as f:
+                f.write(self.render_html(receipt))
+        else:
+            with open(filename, 'wb') as f:
+                f.write(self.render_text(receipt, escpos=output_format == "escpos"))
+
+        print(f"Receipt generated: {filename}")
+        return filename
+
+    def generate_receipt(self, items, prices, tax_rate=0.07, filename=None):
         """
         Generate a PDF receipt based on the current items
-        
+
         Args:
             items (dict): Dictionary of items with counts
             prices (dict): Dictionary of prices for each item
             tax_rate (float): Tax rate to apply
-            
+            filename (str): Where to write the receipt, or None for a unique name
+
         Returns:
             str: Path to the generated receipt file
         """
-        # Create filename with timestamp
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = os.path.join(self.output_directory, f"receipt_{timestamp}.pdf")
-        
-        # Get current date and time for receipt
-        current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
-        # Create PDF document
-        doc = SimpleDocTemplate(filename, pagesize=letter)
-        styles = getSampleStyleSheet()
-        elements = []
-        
-        # Add header
-        header = Paragraph("<b>Retail Billing Receipt</b>", styles["Title"])
-        elements.append(header)
-        
-        # Add date and time
-        date_time = Paragraph(f"Date: {current_time}", styles["Normal"])
-        elements.append(date_time)
-        elements.append(Paragraph("<br/><br/>", styles["Normal"]))
-        
-        # Create data for table
-        data = [['Item', 'Quantity', 'Unit Price', 'Total']]
-        total_amount = 0
-        
-        # Add items to the bill
-        items_added = False
-        for cls_name, item_info in items.items():
-            if item_info["count"] > 0:
-                items_added = True
-                unit_price = prices.get(cls_name, 0)
-                total_price = unit_price * item_info["count"]
-                total_amount += total_price
-                
-                data.append([
-                    cls_name, 
-                    str(item_info["count"]), 
-                    f"{unit_price:.2f}", 
-                    f"{total_price:.2f}"
-                ])
-        
-        # If no items were added, show a placeholder
-        if not items_added:
-            print("Warning: No items with count > 0 found")
-            data.append(['No items detected', '0', '0.00', '0.00'])
-        
-        # Add subtotal, tax, and total
-        tax_amount = total_amount * tax_rate
-        final_total = total_amount + tax_amount
-        
-        data.append(['', '', 'Subtotal:', f"{total_amount:.2f}"])
-        data.append(['', '', f'Tax ({tax_rate*100}%):', f"{tax_amount:.2f}"])
-        data.append(['', '', 'Total:', f"{final_total:.2f}"])
-        
-        # Create table and set style
-        table = Table(data)
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -2), 1, colors.black),
-            ('ALIGN', (1, 1), (-1, -1), 'RIGHT'),
-            ('FONTNAME', (0, -3), (-1, -1), 'Helvetica-Bold'),
-        ]))
-        
-        elements.append(table)
-        elements.append(Paragraph("<br/><br/>Thank you for shopping with us!", styles["Normal"]))
-        
-        # Build PDF
-        doc.build(elements)
-        print(f"Receipt generated: {filename}")
-        return filename
\ No newline at end of file
+        lines = [(cls_name, item_info["count"], prices.get(cls_name, 0)) for cls_name, item_info in items.items()]
+        return self.write_receipt(lines, tax_rate, "pdf", filename)
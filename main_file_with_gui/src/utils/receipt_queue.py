@@ -0,0 +1,101 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class ReceiptJobQueue:
+    def __init__(self, generator, max_workers=2, max_jobs=500, on_finished=None):
+        """
+        Render receipts on a worker pool so checkout requests return at once
+
+        Workers are threads rather than processes: one receipt renders in
+        milliseconds, and the job table and on_finished callback, which logs the
+        receipt in the sales store, live in the server process. Re-rendering
+        many stored bills at once uses a process pool instead (see receipt_batch).
+
+        Args:
+            generator (ReceiptGenerator): Renders a receipt from bill lines
+            max_workers (int): Receipts rendered concurrently
+            max_jobs (int): Finished jobs remembered before the oldest are forgotten
+            on_finished (callable): Called with a copy of each job once it is done or failed
+        """
+        self.generator = generator
+        self.on_finished = on_finished
+        self.max_jobs = max_jobs
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="receipt")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, lines, tax_rate=0.07, bill_id=None, output_format="pdf"):
+        """
+        Queue a receipt for a snapshot of the bill
+
+        Args:
+            lines (tuple): (item name, quantity, unit price) for every billed item
+            tax_rate (float): Tax rate to apply
+            bill_id (str): Bill the receipt is for, kept with the job
+            output_format (str): "pdf", "html", "text" or "escpos"
+
+        Returns:
+            str: Job ID for status and download requests
+        """
+        job_id = uuid.uuid4().hex
+        job = {"id": job_id, "bill_id": bill_id, "format": output_format, "status": QUEUED,
+               "filename": None, "error": None,
+               "created": time.time(), "finished": None}
+
+        with self._lock:
+            self._jobs[job_id] = job
+            self._prune()
+
+        self._executor.submit(self._run, job, tuple(lines), tax_rate)
+        return job_id
+
+    def _run(self, job, lines, tax_rate):
+        job["status"] = RUNNING
+        try:
+            job["filename"] = self.generator.write_receipt(lines, tax_rate, job["format"])
+            job["status"] = DONE
+        except Exception as e:
+            print(f"Receipt job {job['id']} failed: {e}")
+            job["error"] = str(e)
+            job["status"] = FAILED
+        job["finished"] = time.time()
+
+        if self.on_finished is not None:
+            try:
+                self.on_finished(dict(job))
+            except Exception as e:
+                print(f"Error handling finished receipt job {job['id']}: {e}")
+
+    def _prune(self):
+        """Forget the oldest finished jobs once more than max_jobs are remembered"""
+        excess = len(self._jobs) - self.max_jobs
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job["status"] in (DONE, FAILED)][:max(excess, 0)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        """
+        Look up a job
+
+        Args:
+            job_id (str): ID returned by submit
+
+        Returns:
+            dict: Copy of the job state, or None if the job is unknown
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def shutdown(self):
+        """Wait for queued receipts to finish"""
+        self._executor.shutdown(wait=True)
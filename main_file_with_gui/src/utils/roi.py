@@ -0,0 +1,96 @@
+import numpy as np
+
+
+class RegionOfInterest:
+    def __init__(self, box=None, auto=False, margin=0.1, warmup_detections=30):
+        """
+        Part of the camera frame that is sent to the model
+
+        Args:
+            box (list): [x1, y1, x2, y2] as fractions of the frame size, or None for the whole frame
+            auto (bool): Learn the region from where detections have appeared
+            margin (float): Fraction of the frame added around the learned region
+            warmup_detections (int): Detections to collect before the learned region is used
+        """
+        self.box = tuple(box) if box is not None else (0.0, 0.0, 1.0, 1.0)
+        self.auto = auto
+        self.margin = margin
+        self.warmup_detections = warmup_detections
+
+        self.observed = 0
+        self._extent = None
+
+    @classmethod
+    def from_config(cls, config):
+        """Build a region from a {"box": ..., "auto": ..., ...} config entry"""
+        config = config or {}
+        return cls(box=config.get("box"),
+                   auto=config.get("auto", False),
+                   margin=config.get("margin", 0.1),
+                   warmup_detections=config.get("warmup_detections", 30))
+
+    @property
+    def is_full_frame(self):
+        return self.current_box() == (0.0, 0.0, 1.0, 1.0)
+
+    def current_box(self):
+        """Region in use as fractions of the frame, including anything learned"""
+        if not self.auto or self._extent is None or self.observed < self.warmup_detections:
+            return self.box
+
+        x1, y1, x2, y2 = self._extent
+        learned = (x1 - self.margin, y1 - self.margin, x2 + self.margin, y2 + self.margin)
+        # A learned region never reaches outside the configured one
+        return (max(learned[0], self.box[0]), max(learned[1], self.box[1]),
+                min(learned[2], self.box[2]), min(learned[3], self.box[3]))
+
+    def pixel_box(self, frame_shape):
+        """Region in use as integer pixel coordinates for a frame of the given shape"""
+        h, w = frame_shape[:2]
+        x1, y1, x2, y2 = self.current_box()
+        return (int(x1 * w), int(y1 * h), max(int(x1 * w) + 1, int(x2 * w)), max(int(y1 * h) + 1, int(y2 * h)))
+
+    def crop(self, frame):
+        """
+        Cut the region out of a frame without copying
+
+        Args:
+            frame (numpy.ndarray): Full camera frame
+
+        Returns:
+            tuple: (cropped view, (x offset, y offset))
+        """
+        x1, y1, x2, y2 = self.pixel_box(frame.shape)
+        return frame[y1:y2, x1:x2], (x1, y1)
+
+    def observe(self, detections, frame_shape):
+        """
+        Grow the learned region to cover new full-frame detections
+
+        Args:
+            detections (Detections): Detections in full-frame pixel coordinates
+            frame_shape (tuple): Shape of the frame they came from
+        """
+        if not self.auto or len(detections) == 0:
+            return
+
+        h, w = frame_shape[:2]
+        boxes = detections.xyxy / np.array([w, h, w, h], dtype=np.float32)
+        extent = (float(boxes[:, 0].min()), float(boxes[:, 1].min()),
+                  float(boxes[:, 2].max()), float(boxes[:, 3].max()))
+
+        if self._extent is None:
+            self._extent = extent
+        else:
+            self._extent = (min(self._extent[0], extent[0]), min(self._extent[1], extent[1]),
+                            max(self._extent[2], extent[2]), max(self._extent[3], extent[3]))
+        self.observed += len(detections)
+
+    def stats(self):
+        """Get the configured and current region"""
+        return {
+            "box": list(self.box),
+            "auto": self.auto,
+            "current": [round(v, 3) for v in self.current_box()],
+            "observed": self.observed
+        }
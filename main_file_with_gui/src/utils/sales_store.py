@@ -0,0 +1,288 @@
+import datetime
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bills (
+    bill_id TEXT PRIMARY KEY,
+    lane TEXT,
+    finalized REAL,
+    day TEXT,
+    subtotal REAL,
+    tax REAL,
+    total REAL
+);
+CREATE TABLE IF NOT EXISTS bill_items (
+    bill_id TEXT,
+    sku TEXT,
+    name TEXT,
+    quantity INTEGER,
+    unit_price REAL,
+    amount REAL,
+    PRIMARY KEY (bill_id, sku)
+);
+CREATE TABLE IF NOT EXISTS item_events (
+    ts REAL,
+    day TEXT,
+    lane TEXT,
+    bill_id TEXT,
+    event TEXT,
+    sku TEXT,
+    quantity INTEGER
+);
+CREATE TABLE IF NOT EXISTS receipts (
+    job_id TEXT PRIMARY KEY,
+    bill_id TEXT,
+    ts REAL,
+    status TEXT,
+    filename TEXT
+);
+CREATE INDEX IF NOT EXISTS bills_by_day ON bills (day, lane);
+CREATE INDEX IF NOT EXISTS item_events_by_day ON item_events (day, lane);
+"""
+
+INSERT_EVENT = "INSERT INTO item_events (ts, day, lane, bill_id, event, sku, quantity) VALUES (?, ?, ?, ?, ?, ?, ?)"
+UPSERT_BILL = "INSERT OR REPLACE INTO bills (bill_id, lane, finalized, day, subtotal, tax, total) VALUES (?, ?, ?, ?, ?, ?, ?)"
+DELETE_BILL_ITEMS = "DELETE FROM bill_items WHERE bill_id = ?"
+INSERT_BILL_ITEM = "INSERT INTO bill_items (bill_id, sku, name, quantity, unit_price, amount) VALUES (?, ?, ?, ?, ?, ?)"
+UPSERT_RECEIPT = "INSERT OR REPLACE INTO receipts (job_id, bill_id, ts, status, filename) VALUES (?, ?, ?, ?, ?)"
+
+# Queued to stop the writer thread
+_STOP = object()
+
+
+def day_of(timestamp):
+    """Local calendar day of a timestamp as YYYY-MM-DD"""
+    return datetime.datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d")
+
+
+def iter_finalized_bills(path, start_day=None, end_day=None, lane=None):
+    """
+    Read finalized bills back from a sales database, one at a time
+
+    Opens the database read-only and streams a single ordered query, so
+    any number of bills can be read without holding them all in memory.
+
+    Args:
+        path (str): SQLite database written by SalesStore
+        start_day (str): First day as YYYY-MM-DD, or None for the earliest
+        end_day (str): Last day as YYYY-MM-DD, defaults to start_day if that is given
+        lane (str): Only read this lane, or None for all lanes
+
+    Yields:
+        dict: {"bill_id", "lane", "timestamp", "tax_rate", "lines"} with (name, quantity, unit price) lines
+    """
+    sql = ("SELECT b.bill_id, b.lane, b.finalized, b.subtotal, b.tax, i.name, i.quantity, i.unit_price "
+           "FROM bills b JOIN bill_items i ON i.bill_id = b.bill_id")
+    conditions = []
+    params = []
+    if start_day is not None:
+        conditions.append("b.day BETWEEN ? AND ?")
+        params += [start_day, end_day or start_day]
+    if lane is not None:
+        conditions.append("b.lane = ?")
+        params.append(lane)
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += " ORDER BY b.finalized, b.bill_id, i.sku"
+
+    conn = sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True, timeout=30)
+    try:
+        bill = None
+        for bill_id, bill_lane, finalized, subtotal, tax, name, quantity, unit_price in conn.execute(sql, params):
+            if bill is None or bill["bill_id"] != bill_id:
+                if bill is not None:
+                    yield bill
+                bill = {"bill_id": bill_id, "lane": bill_lane, "timestamp": finalized,
+                        "tax_rate": round(tax / subtotal, 6) if subtotal else 0.0, "lines": []}
+            bill["lines"].append((name, quantity, unit_price))
+        if bill is not None:
+            yield bill
+    finally:
+        conn.close()
+
+
+class SalesStore:
+    def __init__(self, path="output/sales.db", batch_size=500, flush_interval=0.5):
+        """
+        Record of item events, finalized bills and receipts in a local SQLite database
+
+        Callers only put rows on a queue. A single writer thread inserts them in
+        batches, one transaction per batch, so the frame loop never waits for
+        the disk. The database runs in WAL mode with synchronous=NORMAL: a
+        commit appends to the log without an fsync, and readers never block
+        the writer. A power cut can lose the last commits, but never corrupts
+        the database.
+
+        Args:
+            path (str): SQLite database file
+            batch_size (int): Most queued writes applied in one transaction
+            flush_interval (float): Seconds the writer waits to fill a batch
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self.written = 0
+        self.batches = 0
+        self.errors = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._queue = queue.SimpleQueue()
+        self._connect().close()
+        self._writer = threading.Thread(target=self._run, name="sales-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        return conn
+
+    def _run(self):
+        conn = self._connect()
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.time() + self.flush_interval
+            while len(batch) < self.batch_size and batch[-1] is not _STOP:
+                try:
+                    batch.append(self._queue.get(timeout=max(0, deadline - time.time())))
+                except queue.Empty:
+                    break
+
+            stop = batch[-1] is _STOP
+            writes = [write for write in batch if write is not _STOP]
+            if writes:
+                self._write(conn, writes)
+            if stop:
+                conn.close()
+                return
+
+    def _write(self, conn, writes):
+        """Apply a batch of (sql, rows) writes in one transaction"""
+        try:
+            with conn:
+                for sql, rows in writes:
+                    conn.executemany(sql, rows)
+            self.written += len(writes)
+            self.batches += 1
+        except sqlite3.Error as e:
+            print(f"Error writing {len(writes)} sales records: {e}")
+            self.errors += 1
+
+    def record_items(self, lane, bill_id, skus, current_time=None):
+        """
+        Log items added to a bill
+
+        Args:
+            lane (str): Lane the bill belongs to
+            bill_id (str): Bill the items were added to
+            skus (list): Class name of every added item, repeated for several of one kind
+            current_time (float): When they were added, defaults to now
+        """
+        if current_time is None:
+            current_time = time.time()
+        day = day_of(current_time)
+        self._queue.put((INSERT_EVENT, [(current_time, day, lane, bill_id, "add", sku, 1) for sku in skus]))
+
+    def record_reset(self, lane, bill_id, current_time=None):
+        """
+        Log a bill that was reset instead of paid
+
+        Args:
+            lane (str): Lane the bill belongs to
+            bill_id (str): Bill that was reset
+            current_time (float): When it was reset, defaults to now
+        """
+        if current_time is None:
+            current_time = time.time()
+        self._queue.put((INSERT_EVENT, [(current_time, day_of(current_time), lane, bill_id, "reset", None, 0)]))
+
+    def record_bill(self, lane, bill_id, lines, tax_rate=0.07, current_time=None):
+        """
+        Store a finalized bill, replacing any earlier version of the same bill
+
+        Args:
+            lane (str): Lane the bill belongs to
+            bill_id (str): ID of the bill
+            lines (list): (sku, display name, quantity, unit price) for every billed product
+            tax_rate (float): Tax rate applied to the bill
+            current_time (float): When it was finalized, defaults to now
+        """
+        if current_time is None:
+            current_time = time.time()
+        items = [(bill_id, sku, name, quantity, unit_price, quantity * unit_price)
+                 for sku, name, quantity, unit_price in lines]
+        subtotal = sum(item[5] for item in items)
+        tax = subtotal * tax_rate
+
+        self._queue.put((UPSERT_BILL, [(bill_id, lane, current_time, day_of(current_time),
+                                        subtotal, tax, subtotal + tax)]))
+        self._queue.put((DELETE_BILL_ITEMS, [(bill_id,)]))
+        self._queue.put((INSERT_BILL_ITEM, items))
+
+    def record_receipt(self, job_id, bill_id, status, filename=None, current_time=None):
+        """
+        Log the state of a receipt job
+
+        Args:
+            job_id (str): Receipt job ID
+            bill_id (str): Bill the receipt is for
+            status (str): Job status
+            filename (str): Rendered receipt, once there is one
+            current_time (float): When the status changed, defaults to now
+        """
+        if current_time is None:
+            current_time = time.time()
+        self._queue.put((UPSERT_RECEIPT, [(job_id, bill_id, current_time, status, filename)]))
+
+    def daily_totals(self, start_day, end_day=None, lane=None):
+        """
+        Units sold and revenue per SKU per day, from finalized bills
+
+        Args:
+            start_day (str): First day as YYYY-MM-DD
+            end_day (str): Last day as YYYY-MM-DD, defaults to start_day
+            lane (str): Only count this lane, or None for all lanes
+
+        Returns:
+            list: {"day", "sku", "name", "quantity", "amount", "bills"} per day and SKU
+        """
+        sql = ("SELECT b.day, i.sku, MAX(i.name), SUM(i.quantity), SUM(i.amount), COUNT(DISTINCT b.bill_id) "
+               "FROM bills b JOIN bill_items i ON i.bill_id = b.bill_id "
+               "WHERE b.day BETWEEN ? AND ?")
+        params = [start_day, end_day or start_day]
+        if lane is not None:
+            sql += " AND b.lane = ?"
+            params.append(lane)
+        sql += " GROUP BY b.day, i.sku ORDER BY b.day, i.sku"
+
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            rows = conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+        return [{"day": day, "sku": sku, "name": name, "quantity": quantity, "amount": amount, "bills": bills}
+                for day, sku, name, quantity, amount, bills in rows]
+
+    def close(self):
+        """Write everything still queued and stop the writer thread"""
+        self._queue.put(_STOP)
+        self._writer.join()
+
+    def stats(self):
+        """Get writer counters"""
+        return {
+            "pending": self._queue.qsize(),
+            "written": self.written,
+            "batches": self.batches,
+            "errors": self.errors
+        }
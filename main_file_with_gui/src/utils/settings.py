@@ -0,0 +1,90 @@
+import copy
+import json
+import os
+
+SETTINGS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'settings.json')
+
+# Used for any section or key missing from settings.json
+DEFAULT_SETTINGS = {
+    "inference": {
+        "backend": "pytorch",
+        "int8": False,
+        "imgsz": 640,
+        "export_dir": "models/exported",
+        "calibration_dir": "data",
+        "calibration_images": 64,
+        "parity_check": True,
+        "min_parity": 0.9,
+        "warmup_runs": 2,
+        "warmup_size": [640, 480]
+    },
+    "roi": {
+        "box": None,
+        "auto": False,
+        "margin": 0.1,
+        "warmup_detections": 30
+    },
+    "tracking": {
+        "enabled": False,
+        "iou_threshold": 0.3,
+        "min_hits": 3,
+        "max_age": 1.5
+    },
+    "metrics": {
+        "enabled": True,
+        "window": 1024
+    },
+    "overlay": {
+        "client_side": False
+    },
+    "receipts": {
+        "format": "pdf",
+        "text_width": 42
+    },
+    "video": {
+        "source": [0, 1],
+        "width": None,
+        "height": None,
+        "fps": None,
+        "loop": False,
+        "reconnect_delay": 0.5,
+        "max_reconnect_delay": 10.0
+    },
+    "detection_cache": {
+        "enabled": True,
+        "size": 64,
+        "ttl": 1.0,
+        "max_distance": 4,
+        "hash_size": 16,
+        "min_contrast": 2.0
+    }
+}
+
+
+def load_settings(settings_file=SETTINGS_FILE):
+    """
+    Load runtime settings, filling in defaults for anything not configured
+
+    Args:
+        settings_file (str): Path to the JSON settings file
+
+    Returns:
+        dict: Settings grouped by section
+    """
+    settings = copy.deepcopy(DEFAULT_SETTINGS)
+
+    if os.path.exists(settings_file):
+        try:
+            with open(settings_file, 'r') as f:
+                overrides = json.load(f)
+        except Exception as e:
+            print(f"Error loading settings from {settings_file}: {e}")
+            overrides = {}
+
+        for section, values in overrides.items():
+            if isinstance(values, dict) and isinstance(settings.get(section), dict):
+                settings[section].update(values)
+            else:
+                settings[section] = values
+
+    return settings
@@ -0,0 +1,87 @@
+import json
+
+import numpy as np
+
+
+class _Array:
+    """Stands in for a torch tensor in ultralytics results"""
+
+    def __init__(self, values):
+        self._values = values
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self._values
+
+
+class _Boxes:
+    def __init__(self, xyxy, conf, cls):
+        self.xyxy = _Array(xyxy)
+        self.conf = _Array(conf)
+        self.cls = _Array(cls)
+
+
+class _Result:
+    def __init__(self, boxes):
+        self.boxes = boxes
+
+
+class StubModel:
+    def __init__(self, names, events=None):
+        """
+        Scripted stand-in for a YOLO model, for benchmarks and CI without weights
+
+        Each event makes one class visible for a range of frames. The caller
+        sets frame_index before every inference so skipped frames do not
+        shift the script.
+
+        Args:
+            names (dict): Mapping of class id to class name, like model.names
+            events (list): {"class": name, "start": first frame, "end": frame after the last,
+                "box": [x1, y1, x2, y2]} entries, box optional
+        """
+        self.names = dict(names)
+        self.frame_index = 0
+        self.calls = 0
+
+        class_ids = {name: cls_id for cls_id, name in self.names.items()}
+        self.events = []
+        for event in events or []:
+            if event["class"] not in class_ids:
+                raise ValueError(f"Stub event for unknown class {event['class']}")
+            box = event.get("box", [10 + 60 * len(self.events), 60, 60 + 60 * len(self.events), 140])
+            self.events.append((int(event["start"]), int(event["end"]), class_ids[event["class"]], box))
+
+    @classmethod
+    def from_script(cls, path):
+        """
+        Load a stub from a JSON script
+
+        Args:
+            path (str): File with {"names": [...] or {id: name}, "events": [...]}
+
+        Returns:
+            StubModel: The scripted model
+        """
+        with open(path, 'r') as f:
+            script = json.load(f)
+        names = script["names"]
+        if isinstance(names, list):
+            names = dict(enumerate(names))
+        else:
+            names = {int(cls_id): name for cls_id, name in names.items()}
+        return cls(names, script.get("events"))
+
+    def _detect(self, index):
+        active = [event for event in self.events if event[0] <= index < event[1]]
+        xyxy = np.array([event[3] for event in active], dtype=np.float32).reshape(-1, 4)
+        conf = np.full(len(active), 0.9, dtype=np.float32)
+        cls = np.array([event[2] for event in active], dtype=np.float32)
+        return _Result(_Boxes(xyxy, conf, cls))
+
+    def __call__(self, frames, conf=0.25, **kwargs):
+        """Return scripted results for every frame of a batch, all at frame_index"""
+        self.calls += 1
+        return [self._detect(self.frame_index) for _ in range(len(frames))]
@@ -0,0 +1,422 @@
+import os
+import threading
+import time
+
+import cv2
+
+from src.utils.clock import CaptureClock
+from src.utils.pipeline import StageStats
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+# Kinds of source
+DEVICE = "device"
+FILE = "file"
+STREAM = "stream"
+FOLDER = "folder"
+
+# Source states
+CONNECTING = "connecting"
+CONNECTED = "connected"
+RECONNECTING = "reconnecting"
+ENDED = "ended"
+STOPPED = "stopped"
+
+
+def source_kind(source):
+    """
+    Tell what a configured source is
+
+    Args:
+        source (int or str): Camera index, video file, image folder, or stream URL
+
+    Returns:
+        str: DEVICE, FILE, FOLDER or STREAM
+    """
+    if isinstance(source, int) or (isinstance(source, str) and source.isdigit()):
+        return DEVICE
+    if os.path.isdir(source):
+        return FOLDER
+    if os.path.isfile(source):
+        return FILE
+    # RTSP/HTTP URLs, and anything else OpenCV can open such as GStreamer pipelines
+    return STREAM
+
+
+def list_images(folder):
+    """Image files in a folder, in name order"""
+    return sorted(os.path.join(folder, name) for name in os.listdir(folder)
+                  if name.lower().endswith(IMAGE_EXTENSIONS))
+
+
+class CaptureReader:
+    def __init__(self, source, kind, width=None, height=None, fps=None, clock=time.time):
+        """
+        Frames from a camera, video file or network stream through cv2.VideoCapture
+
+        Args:
+            source (int or str): Camera index, file path or stream URL
+            kind (str): DEVICE, FILE or STREAM
+            width (int): Frame width asked of cameras, or None for the default
+            height (int): Frame height asked of cameras, or None for the default
+            fps (float): Frame rate asked of cameras, or None for the default
+            clock (callable): Returns the current time in seconds
+        """
+        self.source = int(source) if kind == DEVICE else source
+        self.kind = kind
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.clock = clock
+        self.cap = None
+        self._capture_clock = None
+
+    def open(self):
+        """
+        Open the source
+
+        Returns:
+            bool: True if it opened
+        """
+        if self.kind == DEVICE and os.name == "nt":
+            # DirectShow opens most Windows webcams faster than the default backend
+            self.cap = cv2.VideoCapture(self.source, cv2.CAP_DSHOW)
+            if not self.cap.isOpened():
+                self.cap = cv2.VideoCapture(self.source)
+        else:
+            self.cap = cv2.VideoCapture(self.source)
+        if not self.cap.isOpened():
+            self.close()
+            return False
+
+        if self.kind == DEVICE:
+            if self.width and self.height:
+                self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+                self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+            if self.fps:
+                self.cap.set(cv2.CAP_PROP_FPS, self.fps)
+        if self.kind != FILE:
+            # Backends that support it then hold one frame instead of a queue of stale ones
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        # Files are timed by their stream position, live sources by when a frame arrives
+        self._capture_clock = CaptureClock(self.cap, use_position=self.kind == FILE, clock=self.clock)
+        return True
+
+    def read(self):
+        """
+        Read the next frame
+
+        Returns:
+            tuple: (frame, capture timestamp), or None at the end of a file or if the source failed
+        """
+        ret, frame = self.cap.read()
+        if not ret or frame is None:
+            return None
+        return frame, self._capture_clock.stamp()
+
+    def close(self):
+        """Release the capture"""
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+
+class FolderReader:
+    def __init__(self, folder, fps=None, clock=time.time):
+        """
+        Frames from the images in a folder, in name order
+
+        Args:
+            folder (str): Folder of .jpg, .jpeg, .png or .bmp images
+            fps (float): Rate the images are timestamped at, 30 if None
+            clock (callable): Returns the current time in seconds, read once for the first image
+        """
+        self.folder = folder
+        self.fps = fps or 30.0
+        self.clock = clock
+        self._paths = []
+        self._index = 0
+        self._start = 0.0
+
+    def open(self):
+        """
+        List the images
+
+        Returns:
+            bool: True if the folder has any
+        """
+        self._paths = list_images(self.folder)
+        self._index = 0
+        self._start = self.clock()
+        return bool(self._paths)
+
+    def read(self):
+        """
+        Read the next image
+
+        Returns:
+            tuple: (frame, timestamp), or None after the last image
+        """
+        while self._index < len(self._paths):
+            path = self._paths[self._index]
+            timestamp = self._start + self._index / self.fps
+            self._index += 1
+            frame = cv2.imread(path)
+            if frame is not None:
+                return frame, timestamp
+            print(f"Skipping unreadable image {path}")
+        return None
+
+    def close(self):
+        self._paths = []
+
+
+class VideoSource:
+    def __init__(self, source, width=None, height=None, fps=None, loop=False, reconnect_delay=0.5,
+                 max_reconnect_delay=10.0, clock=time.time, name="camera", on_status=None):
+        """
+        Frames from a camera, file, network stream or image folder, grabbed on a
+        dedicated thread
+
+        Live sources are read as fast as they deliver and only the newest frame
+        is kept, so a slow consumer always gets a current frame instead of one
+        that sat in a driver buffer. Files and folders are replays: each frame
+        is read once the previous one was taken, so none are skipped and
+        counting follows their own timestamps.
+
+        When a source cannot be opened or stops delivering, it is reopened
+        after reconnect_delay seconds, doubling up to max_reconnect_delay
+        while it keeps failing. read() returns nothing in the meantime.
+
+        Args:
+            source (int, str or list): Camera index, video file, stream URL or image folder,
+                or a list of them tried in order on every (re)connect
+            width (int): Frame width; asked of cameras, and other frames of a different size are resized
+            height (int): Frame height, as for width
+            fps (float): Frame rate asked of cameras; live frames arriving faster are dropped, and
+                image folders are timestamped at this rate
+            loop (bool): Start files and folders over at the end instead of stopping
+            reconnect_delay (float): Seconds before the first reconnect attempt
+            max_reconnect_delay (float): Longest wait between reconnect attempts
+            clock (callable): Returns the current time in seconds
+            name (str): Used in log messages
+            on_status (callable): Called with the new state whenever it changes, on the grab thread
+        """
+        self.sources = list(source) if isinstance(source, (list, tuple)) else [source]
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.loop = loop
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.clock = clock
+        self.name = name
+        self.on_status = on_status
+
+        self.status = CONNECTING
+        self.source = None
+        self.kind = None
+        self.capture_stats = StageStats("capture")
+        self.reconnects = 0
+        self.dropped = 0
+        self.throttled = 0
+        self.frame_size = None
+        self.last_frame_time = None
+
+        self._latest = None
+        self._cond = threading.Condition()
+        self._running = threading.Event()
+        self._thread = None
+        self._last_stamp = 0.0
+        self._next_due = 0.0
+
+    @property
+    def connected(self):
+        """True while the source is delivering frames"""
+        return self.status == CONNECTED
+
+    @property
+    def replay(self):
+        """True if the current source is a file or folder, whose frames are all kept"""
+        return self.kind in (FILE, FOLDER)
+
+    def start(self):
+        """Start the grab thread"""
+        self._running.set()
+        self._thread = threading.Thread(target=self._run, name=f"grab-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the grab thread and release the source"""
+        self._running.clear()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        self._set_status(STOPPED)
+
+    def read(self, timeout=None):
+        """
+        Take the newest frame that has not been read yet
+
+        Args:
+            timeout (float): Seconds to wait for one, or None to wait until there is one
+
+        Returns:
+            tuple: (frame, capture timestamp), or None if none arrived in time
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._latest is not None, timeout):
+                return None
+            item, self._latest = self._latest, None
+            # Lets a replay grab its next frame
+            self._cond.notify_all()
+        return item
+
+    def _set_status(self, status):
+        if status == self.status:
+            return
+        self.status = status
+        if self.on_status is not None:
+            try:
+                self.on_status(status)
+            except Exception as e:
+                print(f"{self.name}: error in status callback: {e}")
+
+    def _replay_clock(self):
+        # A looped file starts its positions over; keep its timestamps moving forward
+        return max(self.clock(), self._last_stamp)
+
+    def _open(self):
+        """Open the first source that works, or return None"""
+        for source in self.sources:
+            kind = source_kind(source)
+            if kind == FOLDER:
+                reader = FolderReader(source, self.fps, clock=self._replay_clock)
+            else:
+                reader = CaptureReader(source, kind, self.width, self.height, self.fps,
+                                       clock=self._replay_clock if kind == FILE else self.clock)
+            if reader.open():
+                self.source, self.kind = source, kind
+                print(f"{self.name}: opened {kind} {source}")
+                return reader
+            print(f"{self.name}: failed to open {kind} {source}")
+        return None
+
+    def _run(self):
+        delay = self.reconnect_delay
+        while self._running.is_set():
+            reader = self._open()
+            if reader is None:
+                self._set_status(RECONNECTING)
+                print(f"{self.name}: no source available, retrying in {delay:.1f}s")
+                self._sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+                continue
+
+            self._set_status(CONNECTED)
+            frames = self._grab(reader)
+            reader.close()
+            if frames:
+                delay = self.reconnect_delay
+            if not self._running.is_set():
+                break
+
+            if self.replay and frames:
+                if self.loop:
+                    continue
+                print(f"{self.name}: reached the end of {self.source}")
+                self._set_status(ENDED)
+                return
+
+            self.reconnects += 1
+            self._set_status(RECONNECTING)
+            print(f"{self.name}: lost {self.source}, reconnecting in {delay:.1f}s")
+            self._sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    def _sleep(self, seconds):
+        # Returns early when stopped
+        with self._cond:
+            self._cond.wait_for(lambda: not self._running.is_set(), seconds)
+
+    def _grab(self, reader):
+        """Read frames until the source fails, ends or the source is stopped; returns how many were read"""
+        frames = 0
+        min_interval = 1.0 / self.fps if self.fps and not self.replay else 0
+        while self._running.is_set():
+            if self.replay:
+                with self._cond:
+                    if not self._cond.wait_for(lambda: self._latest is None or not self._running.is_set(), 0.1):
+                        continue
+                    if not self._running.is_set():
+                        break
+
+            start = time.time()
+            item = reader.read()
+            if item is None:
+                if not self.replay:
+                    self.capture_stats.errors += 1
+                return frames
+            frame, captured_at = item
+            frames += 1
+
+            if min_interval:
+                # Keep the requested rate on average, with some room for capture jitter
+                if captured_at < self._next_due - min_interval / 4:
+                    self.throttled += 1
+                    continue
+                self._next_due = max(self._next_due, captured_at - min_interval / 2) + min_interval
+
+            if self.width and self.height and (frame.shape[1], frame.shape[0]) != (self.width, self.height):
+                frame = cv2.resize(frame, (self.width, self.height), interpolation=cv2.INTER_AREA)
+
+            with self._cond:
+                if self._latest is not None:
+                    self.dropped += 1
+                self._latest = (frame, captured_at)
+                self._cond.notify_all()
+            self._last_stamp = captured_at
+            self.frame_size = (frame.shape[1], frame.shape[0])
+            self.last_frame_time = time.time()
+            self.capture_stats.record(self.last_frame_time - start)
+        return frames
+
+    def stats(self):
+        """Get the state and capture counters"""
+        return {
+            "status": self.status,
+            "source": str(self.source) if self.source is not None else None,
+            "kind": self.kind,
+            "frame_size": self.frame_size,
+            "capture": self.capture_stats.as_dict(),
+            "reconnects": self.reconnects,
+            "dropped": self.dropped,
+            "throttled": self.throttled,
+            "seconds_since_frame": (round(time.time() - self.last_frame_time, 3)
+                                    if self.last_frame_time is not None else None)
+        }
+
+    @classmethod
+    def from_config(cls, source, config, clock=time.time, name="camera", on_status=None):
+        """
+        Build a source from the "video" settings section
+
+        Args:
+            source (int, str or list): What to open, e.g. config["source"] or a lane's source
+            config (dict): {"width", "height", "fps", "loop", "reconnect_delay", "max_reconnect_delay"};
+                other keys are ignored
+            clock (callable): Returns the current time in seconds
+            name (str): Used in log messages
+            on_status (callable): Called with the new state whenever it changes
+
+        Returns:
+            VideoSource: The source, not started yet
+        """
+        config = config or {}
+        return cls(source, width=config.get("width"), height=config.get("height"), fps=config.get("fps"),
+                   loop=config.get("loop", False), reconnect_delay=config.get("reconnect_delay", 0.5),
+                   max_reconnect_delay=config.get("max_reconnect_delay", 10.0),
+                   clock=clock, name=name, on_status=on_status)
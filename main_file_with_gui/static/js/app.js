@@ -1,40 +1,48 @@
+function renderBill(data) {
+    // Update bill items table
+    const billItemsBody = document.getElementById('bill-items-body');
+    billItemsBody.innerHTML = '';
+    
+    if (data.items.length === 0) {
+        const emptyRow = document.createElement('tr');
+        emptyRow.innerHTML = '<td colspan="4" style="text-align: center;">No items detected</td>';
+        billItemsBody.appendChild(emptyRow);
+    } else {
+        data.items.forEach(item => {
+            const row = document.createElement('tr');
+            row.innerHTML = `
+                <td>${item.name}</td>
+                <td>${item.quantity}</td>
+                <td>$${item.unit_price.toFixed(2)}</td>
+                <td>$${item.total.toFixed(2)}</td>
+            `;
+            billItemsBody.appendChild(row);
+        });
+    }
+    
+    // Update summary values
+    document.getElementById('subtotal').textContent = `$${data.subtotal.toFixed(2)}`;
+    document.getElementById('tax').textContent = `$${data.tax.toFixed(2)}`;
+    document.getElementById('total').textContent = `$${data.total.toFixed(2)}`;
+}
+
 function updateBill() {
-    fetch('/api/current_bill')
-        .then(response => response.json())
-        .then(data => {
-            // Update bill items table
-            const billItemsBody = document.getElementById('bill-items-body');
-            billItemsBody.innerHTML = '';
-            
-            if (data.items.length === 0) {
-                const emptyRow = document.createElement('tr');
-                emptyRow.innerHTML = '<td colspan="4" style="text-align: center;">No items detected</td>';
-                billItemsBody.appendChild(emptyRow);
-            } else {
-                data.items.forEach(item => {
-                    const row = document.createElement('tr');
-                    row.innerHTML = `
-                        <td>${item.name}</td>
-                        <td>${item.quantity}</td>
-                        <td>$${item.unit_price.toFixed(2)}</td>
-                        <td>$${item.total.toFixed(2)}</td>
-                    `;
-                    billItemsBody.appendChild(row);
-                });
+    // The browser revalidates with the ETag, so unchanged bills cost a 304
+    fetch('/api/current_bill', { cache: 'no-cache' })
+        .then(response => {
+            // 503 while the model is still loading
+            if (!response.ok) {
+                throw new Error(`HTTP ${response.status}`);
             }
-            
-            // Update summary values
-            document.getElementById('subtotal').textContent = `$${data.subtotal.toFixed(2)}`;
-            document.getElementById('tax').textContent = `$${data.tax.toFixed(2)}`;
-            document.getElementById('total').textContent = `$${data.total.toFixed(2)}`;
+            return response.json();
         })
+        .then(renderBill)
         .catch(error => {
             console.error('Error fetching bill data:', error);
         });
 }
 
-// Generate receipt and view it
-// Replace the generate-receipt handler in app.js
+// Generate receipt and wait for the background job to finish
 document.getElementById('generate-receipt').addEventListener('click', function() {
     // Show loading message
     showMessage('Generating receipt...', 'info');
@@ -43,7 +51,7 @@ document.getElementById('generate-receipt').addEventListener('click', function()
         .then(response => response.json())
         .then(data => {
             if (data.success) {
-                showMessage('Bill Generated Successfully!', 'success');
+                waitForReceipt(data.status_url);
             } else {
                 showMessage('Failed to generate bill.', 'error');
             }
@@ -54,6 +62,25 @@ document.getElementById('generate-receipt').addEventListener('click', function()
         });
 });
 
+// Poll a receipt job until it is done or has failed
+function waitForReceipt(statusUrl) {
+    fetch(statusUrl)
+        .then(response => response.json())
+        .then(job => {
+            if (job.status === 'done') {
+                showMessage('Bill Generated Successfully!', 'success');
+            } else if (job.status === 'failed') {
+                showMessage('Failed to generate bill.', 'error');
+            } else {
+                setTimeout(() => waitForReceipt(statusUrl), 250);
+            }
+        })
+        .catch(error => {
+            console.error('Error checking receipt:', error);
+            showMessage('Error generating receipt.', 'error');
+        });
+}
+
 // Reset the bill
 document.getElementById('reset-bill').addEventListener('click', function() {
     fetch('/reset_bill')
@@ -114,8 +141,92 @@ function printReceipt() {
     window.print();
 }
 
-// Update the bill every 2 seconds
-setInterval(updateBill, 2000);
+// Receive the bill whenever it changes, falling back to polling every
+// 2 seconds if the browser or a proxy does not support server-sent events
+let pollTimer = null;
+
+function startPolling() {
+    if (pollTimer === null) {
+        pollTimer = setInterval(updateBill, 2000);
+    }
+}
+
+function stopPolling() {
+    if (pollTimer !== null) {
+        clearInterval(pollTimer);
+        pollTimer = null;
+    }
+}
+
+function subscribeToBill() {
+    if (!window.EventSource) {
+        startPolling();
+        return;
+    }
+    const source = new EventSource('/api/bill_stream');
+    source.addEventListener('bill', event => renderBill(JSON.parse(event.data)));
+    source.onopen = stopPolling;
+    // EventSource reconnects by itself; poll until it does
+    source.onerror = () => {
+        startPolling();
+        // An error response, e.g. 503 while the model loads, closes the stream for good
+        if (source.readyState === EventSource.CLOSED) {
+            setTimeout(subscribeToBill, 2000);
+        }
+    };
+}
+
+function drawOverlay(canvas, overlay) {
+    // Draw in frame pixels; CSS scales the canvas with the video
+    if (canvas.width !== overlay.width || canvas.height !== overlay.height) {
+        canvas.width = overlay.width;
+        canvas.height = overlay.height;
+    }
+    const ctx = canvas.getContext('2d');
+    ctx.clearRect(0, 0, canvas.width, canvas.height);
+    ctx.lineWidth = 2;
+    ctx.font = '14px sans-serif';
+    
+    overlay.boxes.forEach(item => {
+        const [x1, y1, x2, y2] = item.box;
+        let label = `${item.label}: ${item.confidence.toFixed(2)}`;
+        if (item.track_id !== null) {
+            label = `#${item.track_id} ${label}`;
+        }
+        ctx.strokeStyle = ctx.fillStyle = 'rgb(0, 255, 0)';
+        ctx.strokeRect(x1, y1, x2 - x1, y2 - y1);
+        ctx.fillText(label, x1, y1 - 10);
+    });
+    
+    if (overlay.roi) {
+        const [x1, y1, x2, y2] = overlay.roi;
+        ctx.lineWidth = 1;
+        ctx.strokeStyle = 'rgb(0, 255, 255)';
+        ctx.strokeRect(x1, y1, x2 - x1, y2 - y1);
+    }
+}
+
+function subscribeToOverlay() {
+    // Only present when the server streams undrawn frames
+    const canvas = document.getElementById('video-overlay');
+    if (!canvas || !window.EventSource) {
+        return;
+    }
+    const source = new EventSource(canvas.dataset.stream);
+    source.addEventListener('overlay', event => drawOverlay(canvas, JSON.parse(event.data)));
+    source.onerror = () => {
+        // Boxes from before the drop no longer match the video
+        canvas.getContext('2d').clearRect(0, 0, canvas.width, canvas.height);
+        // An error response closes the stream for good, so open a new one
+        if (source.readyState === EventSource.CLOSED) {
+            setTimeout(subscribeToOverlay, 2000);
+        }
+    };
+}
 
 // Initialize the bill display on page load
-document.addEventListener('DOMContentLoaded', updateBill);
+document.addEventListener('DOMContentLoaded', () => {
+    updateBill();
+    subscribeToBill();
+    subscribeToOverlay();
+});
@@ -0,0 +1,138 @@
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.utils.bill_state import BillState, BillSnapshot, RESET_BILL
+
+ITEMS = (("apple", 30.0), ("nivea", 120.0), ("Moong Dal", 85.5))
+
+# Length of the stress run and number of threads reading the bill
+DURATION = 2.0
+READERS = 8
+
+
+def build_bill(lines):
+    """Build a bill the way the web handlers do, from a snapshot's lines"""
+    return {
+        "lines": lines,
+        "total": sum(count * price for _, count, price in lines)
+    }
+
+
+class CameraThread:
+    def __init__(self, state, reset_every=50):
+        """
+        Stand-in for the thread owning the ItemTracker: counts items, applies
+        queued commands and publishes a snapshot after every change
+
+        Args:
+            state (BillState): State to publish to
+            reset_every (int): Frames between resets it asks for itself
+        """
+        self.state = state
+        self.reset_every = reset_every
+        self.version = 0
+        self.bill_id = "bill-0"
+        self.counts = {}
+        self.resets = 0
+        # version -> (lines, bill_id) of every snapshot published
+        self.published = {0: ((), None)}
+
+    def lines(self):
+        return [(name, self.counts[name], price) for name, price in ITEMS if name in self.counts]
+
+    def run(self, stop):
+        frame = 0
+        while not stop.is_set():
+            frame += 1
+            if frame % self.reset_every == 0:
+                self.state.submit(RESET_BILL)
+
+            for command in self.state.take_commands():
+                if command == RESET_BILL:
+                    self.counts.clear()
+                    self.resets += 1
+                    self.bill_id = f"bill-{self.resets}"
+                    self.version += 1
+                    self.publish()
+
+            name = ITEMS[frame % len(ITEMS)][0]
+            self.counts[name] = self.counts.get(name, 0) + 1
+            self.version += 1
+            self.publish()
+
+    def publish(self):
+        # Recorded before publishing, so readers can look up what they should see
+        self.published[self.version] = (tuple(self.lines()), self.bill_id)
+        self.state.publish(self.version, self.lines, self.bill_id)
+
+
+def check_snapshot(camera, snapshot):
+    lines, bill_id = camera.published[snapshot.version]
+    assert snapshot == BillSnapshot(snapshot.version, lines, bill_id), f"torn snapshot {snapshot}"
+
+
+def read_bills(state, camera, stop, submit_resets, errors):
+    try:
+        last_version = 0
+        waits = 0
+        while not stop.is_set():
+            snapshot = state.snapshot
+            check_snapshot(camera, snapshot)
+            assert snapshot.version >= last_version, f"version went back from {last_version} to {snapshot.version}"
+            last_version = snapshot.version
+
+            version, bill = state.bill(build_bill)
+            assert version >= last_version, f"bill version went back from {last_version} to {version}"
+            assert bill == build_bill(camera.published[version][0]), f"bill {bill} is not version {version}"
+            last_version = version
+
+            changed = state.wait_for_change(version, timeout=0.5)
+            check_snapshot(camera, changed)
+            assert changed.version >= last_version, f"version went back from {last_version} to {changed.version}"
+            last_version = changed.version
+            waits += 1
+
+            if submit_resets and waits % 20 == 0:
+                state.submit(RESET_BILL)
+    except AssertionError as e:
+        errors.append(str(e))
+        stop.set()
+
+
+def test_readers_see_consistent_snapshots_while_bill_changes():
+    state = BillState()
+    camera = CameraThread(state)
+    stop = threading.Event()
+    errors = []
+
+    # Every other reader also resets the bill, like the /reset_bill handler
+    readers = [threading.Thread(target=read_bills, args=(state, camera, stop, i % 2 == 1, errors))
+               for i in range(READERS)]
+    writer = threading.Thread(target=camera.run, args=(stop,))
+    for thread in readers + [writer]:
+        thread.start()
+    time.sleep(DURATION)
+    stop.set()
+    for thread in readers + [writer]:
+        thread.join(timeout=5)
+
+    assert not errors, errors[0]
+    assert camera.version > 0 and camera.resets > 0
+    assert state.version == camera.version
+
+
+def test_wait_for_change_times_out_with_known_version():
+    state = BillState()
+    start = time.time()
+    snapshot = state.wait_for_change(0, timeout=0.05)
+    assert snapshot.version == 0
+    assert time.time() - start >= 0.05
+
+
+if __name__ == "__main__":
+    test_readers_see_consistent_snapshots_while_bill_changes()
+    test_wait_for_change_times_out_with_known_version()
+    print("BillState stress test passed")
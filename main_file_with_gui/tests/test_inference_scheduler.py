@@ -0,0 +1,23 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.utils.inference_scheduler import InferenceScheduler
+
+
+def test_frames_served_without_the_model_do_not_delay_the_next_pass():
+    scheduler = InferenceScheduler(interval=3)
+
+    assert scheduler.should_run(0.0)
+    scheduler.record(0.01, 0.0)
+    assert not scheduler.should_run(0.1)
+    assert not scheduler.should_run(0.2)
+
+    # Due, but the motion gate or detection cache serves it, so record is not called
+    assert scheduler.should_run(0.3)
+    assert scheduler.should_run(0.4)
+    scheduler.record(0.01, 0.4)
+    assert not scheduler.should_run(0.5)
+
+    assert scheduler.scheduled == 2
+    assert scheduler.skipped == 3
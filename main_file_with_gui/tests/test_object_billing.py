@@ -0,0 +1,97 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.object_billing import ObjectBillingSystem
+from src.utils.catalogue import Catalogue
+from src.utils.detection_cache import DetectionCache
+from src.utils.detections import Detections
+from src.utils.object_tracker import ObjectTracker
+
+NAMES = {0: "nivea", 1: "Moong Dal"}
+
+
+class RecordingSalesStore:
+    """Keeps the calls a SalesStore would write to the database"""
+
+    def __init__(self):
+        self.bills = []
+        self.resets = []
+
+    def record_items(self, lane, bill_id, skus, current_time=None):
+        pass
+
+    def record_bill(self, lane, bill_id, lines, tax_rate=0.07, current_time=None):
+        self.bills.append(bill_id)
+
+    def record_reset(self, lane, bill_id, current_time=None):
+        self.resets.append(bill_id)
+
+
+def make_system(tmp_path, sales_store=None):
+    prices = tmp_path / "prices.json"
+    prices.write_text('{"nivea": 120.0, "Moong Dal": 85.5}')
+    # Only names are read from the model when detections are passed in
+    model = SimpleNamespace(names=NAMES)
+    return ObjectBillingSystem(None, model=model, object_tracker=ObjectTracker(min_hits=3, max_age=1.5),
+                               catalogue=Catalogue(NAMES, price_file=str(prices)), sales_store=sales_store,
+                               client_overlay=True)
+
+
+def show(system, frame, current_time):
+    # A new Detections object per frame, as a fresh model pass would give
+    detections = Detections([[10, 10, 60, 60], [100, 10, 160, 60]], [0.9, 0.8], [0, 1])
+    system.process_frame(frame, detections, current_time)
+
+
+def test_reset_counts_items_still_on_the_tray_again(tmp_path):
+    system = make_system(tmp_path)
+    frame = np.zeros((240, 320, 3), dtype=np.uint8)
+
+    for i in range(3):
+        show(system, frame, i * 0.1)
+    assert dict(system.tracker.billed()) == {"nivea": 1, "Moong Dal": 1}
+
+    # The items stay in view across the reset, well within the tracks' max_age
+    system.reset_bill()
+    for i in range(3, 6):
+        show(system, frame, i * 0.1)
+    assert dict(system.tracker.billed()) == {"nivea": 1, "Moong Dal": 1}
+
+
+def test_reset_after_receipt_is_not_logged_as_abandoned(tmp_path):
+    sales_store = RecordingSalesStore()
+    system = make_system(tmp_path, sales_store)
+    frame = np.zeros((240, 320, 3), dtype=np.uint8)
+
+    for i in range(3):
+        show(system, frame, i * 0.1)
+    paid_bill = system.bill_id
+    system.finalize_bill(system.bill_state.snapshot)
+    system.reset_bill()
+    show(system, frame, 0.3)
+    assert sales_store.bills == [paid_bill]
+    assert sales_store.resets == []
+
+    # The items are counted again on the new bill, which is abandoned
+    for i in range(4, 6):
+        show(system, frame, i * 0.1)
+    abandoned_bill = system.bill_id
+    system.reset_bill()
+    show(system, frame, 0.6)
+    assert sales_store.resets == [abandoned_bill]
+
+
+def test_reset_forgets_cached_detections(tmp_path):
+    system = make_system(tmp_path)
+    system.detection_cache = DetectionCache()
+    frame = np.zeros((240, 320, 3), dtype=np.uint8)
+    key, _ = system.detection_cache.lookup(frame, 0.0)
+    system.detection_cache.store(key, Detections(), 0.0)
+
+    system.reset_bill()
+    show(system, frame, 0.1)
+    assert len(system.detection_cache) == 0